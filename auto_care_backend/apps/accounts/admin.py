@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from auto_care.counts import EstimatedCountPaginator
 from .models import User, OTP
 
 
@@ -10,6 +11,10 @@ class UserAdmin(BaseUserAdmin):
     search_fields = ['mobile_number', 'name', 'email']
     ordering = ['-id']
     
+    # Large table: planner-estimated counts (also serves user autocomplete)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
     fieldsets = (
         (None, {'fields': ('mobile_number', 'password')}),
         ('Personal Info', {'fields': ('name', 'email', 'address', 'vehicle')}),
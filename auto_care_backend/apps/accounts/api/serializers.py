@@ -1,7 +1,10 @@
 from datetime import date as date_type
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from apps.accounts.models import User
+from apps.accounts.tokens import RotatingRefreshToken
 from apps.bookings.models import Booking  # ✅ Import fixed (main issue)
+from apps.bookings.slots import get_slot_table, slot_idx, slot_label
 from apps.accounts.models import User
 
 
@@ -13,11 +16,17 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "mobile_number", "email"]
         read_only_fields = ["id", "mobile_number"]
 
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """Token refresh that blacklists rotated tokens in the jti store, not the DB."""
+
+    token_class = RotatingRefreshToken
+
 class BookingSerializer(serializers.ModelSerializer):
     """Serializer for creating and validating user bookings."""
 
     user_name = serializers.CharField(source='user.name', read_only=True)
     user_mobile = serializers.CharField(source='user.mobile_number', read_only=True)
+    time_slot = serializers.CharField(max_length=50)
 
     class Meta:
         model = Booking
@@ -43,10 +52,16 @@ class BookingSerializer(serializers.ModelSerializer):
         return value
 
     def validate_time_slot(self, value):
-        """Ensure time slot is provided."""
+        """Ensure time slot is one of the offered slots."""
         if not value or not value.strip():
             raise serializers.ValidationError("Time slot is required.")
-        return value.strip()
+        try:
+            idx = slot_idx(value)
+        except ValueError:
+            raise serializers.ValidationError("Invalid time slot.")
+        if idx not in get_slot_table():
+            raise serializers.ValidationError("This time slot is not available for booking.")
+        return slot_label(idx)
 
     def validate(self, data):
         """Prevent duplicate bookings for the same date/time."""
@@ -63,7 +78,7 @@ class BookingSerializer(serializers.ModelSerializer):
             existing = Booking.objects.filter(
                 user=user,
                 date=booking_date,
-                time_slot=time_slot,
+                slot_id=slot_idx(time_slot),
                 status__in=['pending', 'confirmed']
             )
 
@@ -1,5 +1,6 @@
 from django.urls import path
-from .views import SendOTPView, VerifyOTPView, UserProfileView, AddressListCreateView, AddressDetailView, SetDefaultAddressView
+from .views import SendOTPView, VerifyOTPView, UserProfileView, AddressListCreateView, AddressDetailView
+from apps.locations.api.views import SetDefaultAddressView
 from rest_framework_simplejwt.views import TokenRefreshView
 
 urlpatterns = [
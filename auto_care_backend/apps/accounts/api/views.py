@@ -5,12 +5,16 @@ from apps.accounts.models import User, OTP
 from datetime import timedelta
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.utils import timezone
-from rest_framework_simplejwt.tokens import RefreshToken
+from apps.accounts.tokens import RotatingRefreshToken
 from apps.accounts.api.serializers import UserProfileSerializer
 from apps.accounts.utils import generate_otp, normalize_mobile_number, validate_mobile_number
 import logging
 from apps.locations.models import Address
 from apps.locations.api.serializers import AddressSerializer
+from apps.locations.services import save_address
+from auto_care.idempotency import idempotent
+from auto_care.querybudget import query_budget
+from auto_care.throttling import AnonSlidingWindowThrottle, OTPRequestThrottle, OTPVerifyThrottle
 # from apps.accounts.models import Address
 # from apps.accounts.api.serializers import AddressSerializer
 
@@ -21,9 +25,16 @@ logger = logging.getLogger(__name__)
 # -------------------
 class SendOTPView(APIView):
     permission_classes = [AllowAny]
-    OTP_EXPIRY_MINUTES = 5
+    throttle_classes = [AnonSlidingWindowThrottle, OTPRequestThrottle]
+    OTP_EXPIRY_MINUTES = OTP.EXPIRY_MINUTES
     OTP_COOLDOWN_SECONDS = 60  # Minimum time before requesting a new OTP
     
+    def get_idempotency_scope(self, request):
+        """Idempotency keys from anonymous callers are scoped per mobile number"""
+        return normalize_mobile_number(str(request.data.get("mobile_number", "")).strip()) or None
+    
+    @query_budget(8)
+    @idempotent
     def post(self, request):
         logger.info(f"OTP request received from IP: {request.META.get('REMOTE_ADDR')}")
         
@@ -80,8 +91,10 @@ class SendOTPView(APIView):
 # -------------------
 class VerifyOTPView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [AnonSlidingWindowThrottle, OTPVerifyThrottle]
     MAX_OTP_ATTEMPTS = 3
 
+    @query_budget(7)
     def post(self, request):
         mobile_number_raw = request.data.get("mobile_number", "").strip()
         otp_input = request.data.get("otp", "").strip()
@@ -120,7 +133,7 @@ class VerifyOTPView(APIView):
             )
         
         # Check expiry (5 minutes)
-        if timezone.now() - otp_obj.created_at > timedelta(minutes=5):
+        if timezone.now() - otp_obj.created_at > timedelta(minutes=OTP.EXPIRY_MINUTES):
             otp_obj.delete()
             logger.info(f"Expired OTP deleted for {mobile_number}")
             return Response(
@@ -159,7 +172,7 @@ class VerifyOTPView(APIView):
         otp_obj.delete()
         
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = RotatingRefreshToken.for_user(user)
         
         logger.info(f"Successful login for {mobile_number} (New user: {created})")
         
@@ -181,11 +194,13 @@ class VerifyOTPView(APIView):
 class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @query_budget(1)
     def get(self, request):
         serializer = UserProfileSerializer(request.user)
         logger.info(f"Profile fetched for {request.user.mobile_number}")
         return Response(serializer.data)
 
+    @query_budget(3)
     def put(self, request):
         serializer = UserProfileSerializer(request.user, data=request.data, partial=True)
         if serializer.is_valid():
@@ -195,6 +210,7 @@ class UserProfileView(APIView):
         logger.warning(f"Profile update failed for {request.user.mobile_number}: {serializer.errors}")
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @query_budget(3)
     def patch(self, request):
         """Allow partial updates via PATCH"""
         return self.put(request)
@@ -206,18 +222,21 @@ class UserProfileView(APIView):
 class AddressListCreateView(APIView):
     permission_classes = [IsAuthenticated]
     
+    @query_budget(2)
     def get(self, request):
         """Get all addresses for logged-in user"""
         addresses = Address.objects.filter(user=request.user)
         serializer = AddressSerializer(addresses, many=True)
-        logger.info(f"Addresses listed for user {request.user.mobile_number}: {addresses.count()} addresses")
+        logger.info(f"Addresses listed for user {request.user.mobile_number}: {len(serializer.data)} addresses")
         return Response(serializer.data)
     
+    @query_budget(6)
+    @idempotent
     def post(self, request):
         """Create new address"""
         serializer = AddressSerializer(data=request.data)
         if serializer.is_valid():
-            address = serializer.save(user=request.user)
+            address = save_address(serializer, request.user, user=request.user)
             logger.info(f"Address created: {address.id} for user {request.user.mobile_number}")
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         logger.warning(f"Address creation failed for {request.user.mobile_number}: {serializer.errors}")
@@ -236,6 +255,7 @@ class AddressDetailView(APIView):
         except Address.DoesNotExist:
             return None
     
+    @query_budget(2)
     def get(self, request, pk):
         """Get single address"""
         address = self.get_object(pk, request.user)
@@ -247,6 +267,7 @@ class AddressDetailView(APIView):
         serializer = AddressSerializer(address)
         return Response(serializer.data)
     
+    @query_budget(6)
     def put(self, request, pk):
         """Update address (full update)"""
         address = self.get_object(pk, request.user)
@@ -258,11 +279,12 @@ class AddressDetailView(APIView):
         
         serializer = AddressSerializer(address, data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            save_address(serializer, request.user)
             logger.info(f"Address {pk} updated by user {request.user.mobile_number}")
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @query_budget(6)
     def patch(self, request, pk):
         """Update address (partial update)"""
         address = self.get_object(pk, request.user)
@@ -274,11 +296,12 @@ class AddressDetailView(APIView):
         
         serializer = AddressSerializer(address, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            save_address(serializer, request.user)
             logger.info(f"Address {pk} partially updated by user {request.user.mobile_number}")
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @query_budget(4)
     def delete(self, request, pk):
         """Delete address"""
         address = self.get_object(pk, request.user)
@@ -297,30 +320,4 @@ class AddressDetailView(APIView):
         )
 
 
-# -------------------
-# Set Default Address API
-# -------------------
-class SetDefaultAddressView(APIView):
-    permission_classes = [IsAuthenticated]
-    
-    def post(self, request, pk):
-        """Set an address as default"""
-        try:
-            address = Address.objects.get(pk=pk, user=request.user)
-        except Address.DoesNotExist:
-            return Response(
-                {"error": "Address not found"},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Unset all other defaults
-        Address.objects.filter(user=request.user).update(is_default=False)
-        
-        # Set this as default
-        address.is_default = True
-        address.save()
-        
-        logger.info(f"Address {pk} set as default by user {request.user.mobile_number}")
-        
-        serializer = AddressSerializer(address)
-        return Response(serializer.data)
\ No newline at end of file
+# Set Default Address API lives in apps.locations.api.views (shared by both URL trees)
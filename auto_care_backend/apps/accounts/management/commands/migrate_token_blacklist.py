@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.accounts.token_blacklist import copy_db_blacklist, flush_expired_token_rows
+
+
+class Command(BaseCommand):
+    help = "Copy blacklisted refresh-token jtis from the simplejwt tables into the jti store."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Also delete expired OutstandingToken/BlacklistedToken rows.",
+        )
+
+    def handle(self, *args, **options):
+        copied = copy_db_blacklist(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Copied {copied} blacklisted jti(s)"))
+
+        if options["flush"]:
+            flushed = flush_expired_token_rows()
+            self.stdout.write(self.style.SUCCESS(f"Flushed {flushed} expired token row(s)"))
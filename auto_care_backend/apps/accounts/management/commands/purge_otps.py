@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+
+from apps.accounts import otp_storage
+
+
+class Command(BaseCommand):
+    help = "Purge expired/verified OTPs in batches and maintain daily OTP partitions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.OTP_PURGE_BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, default=settings.OTP_PURGE_MAX_BATCHES)
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be removed.")
+        parser.add_argument(
+            "--convert-partitioned",
+            action="store_true",
+            help="Convert accounts_otp to daily range partitions (PostgreSQL only, one-off).",
+        )
+
+    def handle(self, *args, **options):
+        if options["convert_partitioned"]:
+            try:
+                converted = otp_storage.convert_to_partitioned()
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write("Converted OTP table to daily partitions." if converted
+                              else "OTP table is already partitioned.")
+
+        partitioned = otp_storage.is_partitioned()
+        self.stdout.write(f"Partitioned storage: {'yes' if partitioned else 'no'}")
+        if partitioned:
+            partitions = otp_storage.list_daily_partitions()
+            self.stdout.write(f"Daily partitions: {len(partitions)}")
+
+        if options["dry_run"]:
+            self.stdout.write(f"Stale OTPs pending purge: {otp_storage.count_stale_otps()}")
+            return
+
+        stats = otp_storage.run_otp_cleanup(
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+        )
+        for name in stats["partitions_created"]:
+            self.stdout.write(f"Created partition {name}")
+        for name in stats["partitions_dropped"]:
+            self.stdout.write(f"Dropped partition {name}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {stats['deleted']} OTP(s) in {stats['batches']} batch(es)"
+            + ("" if stats["complete"] else " - more remain, run again")
+        ))
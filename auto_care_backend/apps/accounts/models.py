@@ -52,6 +52,8 @@ class User(AbstractBaseUser, PermissionsMixin):
 # OTP Model
 # -------------------
 class OTP(models.Model):
+    EXPIRY_MINUTES = 5
+
     mobile_number = models.CharField(max_length=15)
     otp = models.CharField(max_length=6)
     created_at = models.DateTimeField(default=timezone.now)
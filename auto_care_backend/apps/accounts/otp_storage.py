@@ -0,0 +1,166 @@
+"""
+OTP storage maintenance.
+
+Expired and verified OTP rows are purged in bounded batches so a single run
+never holds long locks. On PostgreSQL the `accounts_otp` table can optionally
+be converted to daily range partitions on `created_at`; whole days are then
+dropped with `DROP TABLE` instead of row-by-row deletes.
+"""
+from datetime import datetime, time, timedelta
+import logging
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.accounts.models import OTP
+from auto_care import partitioning
+
+logger = logging.getLogger(__name__)
+
+OTP_TABLE = OTP._meta.db_table
+PARTITION_PREFIX = f"{OTP_TABLE}_p"
+_PARTITION_RE = re.compile(rf"^{PARTITION_PREFIX}(\d{{8}})$")
+
+
+def stale_otp_filter(now=None):
+    """OTPs that can never be used again: expired or already verified."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(minutes=OTP.EXPIRY_MINUTES)
+    return Q(created_at__lt=cutoff) | Q(is_verified=True)
+
+
+def count_stale_otps(now=None):
+    return OTP.objects.filter(stale_otp_filter(now)).count()
+
+
+def purge_stale_otps(batch_size=None, max_batches=None, now=None):
+    """
+    Delete stale OTPs in batches of `batch_size` primary keys.
+    Returns {'deleted': int, 'batches': int, 'complete': bool}.
+    """
+    batch_size = batch_size or settings.OTP_PURGE_BATCH_SIZE
+    max_batches = max_batches or settings.OTP_PURGE_MAX_BATCHES
+    stale = OTP.objects.filter(stale_otp_filter(now))
+
+    deleted = 0
+    batches = 0
+    complete = False
+    while batches < max_batches:
+        ids = list(stale.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            complete = True
+            break
+        batch_deleted, _ = OTP.objects.filter(id__in=ids).delete()
+        deleted += batch_deleted
+        batches += 1
+        if len(ids) < batch_size:
+            complete = True
+            break
+
+    logger.info(f"OTP purge removed {deleted} row(s) in {batches} batch(es) (complete: {complete})")
+    return {"deleted": deleted, "batches": batches, "complete": complete}
+
+
+# -------------------
+# Daily partitions (PostgreSQL only)
+# -------------------
+def is_partitioned():
+    return partitioning.is_partitioned(OTP_TABLE)
+
+
+def list_daily_partitions():
+    """Return {date: partition_name} for the existing daily partitions."""
+    partitions = {}
+    for name in partitioning.list_partitions(OTP_TABLE):
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions[datetime.strptime(match.group(1), "%Y%m%d").date()] = name
+    return partitions
+
+
+def _day_bounds(day):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(day, time.min), tz)
+    return start, start + timedelta(days=1)
+
+
+def ensure_daily_partitions(days_ahead=None, today=None):
+    """Create partitions from yesterday up to `days_ahead` days in the future."""
+    days_ahead = settings.OTP_PARTITION_DAYS_AHEAD if days_ahead is None else days_ahead
+    today = today or timezone.localdate()
+    existing = list_daily_partitions()
+    created = []
+
+    for offset in range(-1, days_ahead + 1):
+        day = today + timedelta(days=offset)
+        if day in existing:
+            continue
+        name = f"{PARTITION_PREFIX}{day:%Y%m%d}"
+        start, end = _day_bounds(day)
+        partitioning.create_range_partition(OTP_TABLE, "created_at", name, start, end)
+        created.append(name)
+
+    if created:
+        logger.info(f"Created OTP partitions: {', '.join(created)}")
+    return created
+
+
+def drop_expired_partitions(now=None):
+    """Drop daily partitions whose whole day is older than the OTP expiry."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(minutes=OTP.EXPIRY_MINUTES)
+    dropped = []
+
+    for day, name in sorted(list_daily_partitions().items()):
+        _, end = _day_bounds(day)
+        if end > cutoff:
+            continue
+        partitioning.drop_partition(name)
+        dropped.append(name)
+
+    if dropped:
+        logger.info(f"Dropped expired OTP partitions: {', '.join(dropped)}")
+    return dropped
+
+
+def convert_to_partitioned(days_ahead=None):
+    """
+    One-off conversion of `accounts_otp` into a table partitioned by day.
+    Only still-usable OTPs are carried over; everything else is stale anyway.
+    The primary key becomes (id, created_at) as PostgreSQL requires the
+    partition key in every unique index.
+    """
+    if connection.vendor != "postgresql":
+        raise RuntimeError("OTP partitioning requires PostgreSQL.")
+    if is_partitioned():
+        return False
+
+    legacy = f"{OTP_TABLE}_legacy"
+    cutoff = timezone.now() - timedelta(minutes=OTP.EXPIRY_MINUTES)
+
+    with transaction.atomic():
+        partitioning.recreate_as_partitioned(OTP, "created_at", legacy)
+        ensure_daily_partitions(days_ahead)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO "{OTP_TABLE}" SELECT * FROM "{legacy}" '
+                f"WHERE created_at >= %s AND NOT is_verified",
+                [cutoff],
+            )
+            cursor.execute(f'DROP TABLE "{legacy}"')
+
+    logger.info(f"Converted {OTP_TABLE} to daily range partitions")
+    return True
+
+
+def run_otp_cleanup(batch_size=None, max_batches=None):
+    """Entry point shared by the beat task and the management command."""
+    stats = {"partitions_created": [], "partitions_dropped": []}
+    if is_partitioned():
+        stats["partitions_created"] = ensure_daily_partitions()
+        stats["partitions_dropped"] = drop_expired_partitions()
+    stats.update(purge_stale_otps(batch_size=batch_size, max_batches=max_batches))
+    return stats
@@ -0,0 +1,23 @@
+from celery import shared_task
+import logging
+
+from auto_care.celery import app  # noqa: F401 - configures the app shared_task binds to
+from apps.accounts.otp_storage import run_otp_cleanup
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="apps.accounts.tasks.purge_expired_otps", ignore_result=False)
+def purge_expired_otps():
+    """Periodic (beat) cleanup of expired/verified OTPs and old OTP partitions."""
+    stats = run_otp_cleanup()
+    logger.info(f"OTP cleanup finished: {stats}")
+    return stats
+
+
+@shared_task(name="apps.accounts.tasks.flush_expired_token_rows")
+def flush_expired_token_rows():
+    """Periodic (beat) flush of expired simplejwt OutstandingToken/BlacklistedToken rows."""
+    from apps.accounts.token_blacklist import flush_expired_token_rows as flush_rows
+
+    return flush_rows()
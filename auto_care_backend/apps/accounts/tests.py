@@ -1,3 +1,135 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+
+from apps.accounts import otp_storage
+from apps.accounts.models import OTP, User
+from apps.accounts.token_blacklist import InMemoryTokenBlacklist
+from apps.accounts.tokens import RotatingRefreshToken
+
+
+class RefreshTokenRotationTests(TestCase):
+    """A refresh token rotates once; reuse (even concurrent) is rejected."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(mobile_number="9876543210", name="Asha")
+        self.store = InMemoryTokenBlacklist()
+        patcher = mock.patch("apps.accounts.tokens.get_token_blacklist", return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_rotated_token_cannot_be_reused(self):
+        client = APIClient()
+        refresh = str(RotatingRefreshToken.for_user(self.user))
+
+        first = client.post("/api/accounts/token/refresh/", {"refresh": refresh}, format="json")
+        self.assertEqual(first.status_code, 200)
+        self.assertNotEqual(first.data["refresh"], refresh)
+
+        reused = client.post("/api/accounts/token/refresh/", {"refresh": refresh}, format="json")
+        self.assertEqual(reused.status_code, 401)
+
+        rotated = client.post("/api/accounts/token/refresh/", {"refresh": first.data["refresh"]}, format="json")
+        self.assertEqual(rotated.status_code, 200)
+
+    def test_concurrent_refreshes_rotate_once(self):
+        raw = str(RotatingRefreshToken.for_user(self.user))
+        # Both requests pass check_blacklist() before either blacklists the jti
+        first, second = RotatingRefreshToken(raw), RotatingRefreshToken(raw)
+
+        self.assertTrue(first.blacklist())
+        with self.assertRaises(TokenError):
+            second.blacklist()
+
+
+class AnonymousIdempotencyTests(TestCase):
+    """Anonymous Idempotency-Keys are scoped per mobile number, not shared."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_same_key_for_different_numbers_does_not_collide(self):
+        client = APIClient()
+        headers = {"HTTP_IDEMPOTENCY_KEY": "retry-1"}
+
+        first = client.post("/api/accounts/send-otp/", {"mobile_number": "9876543210"}, format="json", **headers)
+        second = client.post("/api/accounts/send-otp/", {"mobile_number": "9123456780"}, format="json", **headers)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertNotIn("Idempotent-Replayed", second)
+        self.assertEqual(second.data["mobile_number"], "9123456780")
+
+        replayed = client.post("/api/accounts/send-otp/", {"mobile_number": "9123456780"}, format="json", **headers)
+        self.assertEqual(replayed["Idempotent-Replayed"], "true")
+
+
+class OTPPurgeTests(TestCase):
+    """Stale OTPs are purged in bounded batches; usable ones are kept."""
+
+    def setUp(self):
+        now = timezone.now()
+        expired = now - timedelta(minutes=OTP.EXPIRY_MINUTES + 1)
+        OTP.objects.bulk_create(
+            [OTP(mobile_number="9876543210", otp="111111", created_at=expired) for _ in range(7)]
+            + [OTP(mobile_number="9876543210", otp="222222", created_at=now, is_verified=True) for _ in range(3)]
+            + [OTP(mobile_number="9123456780", otp="333333", created_at=now) for _ in range(2)]
+        )
+
+    def test_purge_spans_several_batches(self):
+        stats = otp_storage.purge_stale_otps(batch_size=4, max_batches=10)
+
+        self.assertEqual(stats, {"deleted": 10, "batches": 3, "complete": True})
+        self.assertEqual(list(OTP.objects.values_list("otp", flat=True)), ["333333", "333333"])
+
+    def test_purge_stops_at_max_batches(self):
+        stats = otp_storage.purge_stale_otps(batch_size=4, max_batches=2)
+
+        self.assertEqual(stats, {"deleted": 8, "batches": 2, "complete": False})
+        self.assertEqual(otp_storage.count_stale_otps(), 2)
+
+    def test_command_dry_run_and_purge(self):
+        out = StringIO()
+        call_command("purge_otps", "--dry-run", stdout=out)
+        self.assertIn("Stale OTPs pending purge: 10", out.getvalue())
+        self.assertEqual(OTP.objects.count(), 12)
+
+        out = StringIO()
+        call_command("purge_otps", "--batch-size", "3", stdout=out)
+        self.assertIn("Deleted 10 OTP(s) in 4 batch(es)", out.getvalue())
+        self.assertEqual(OTP.objects.count(), 2)
+
+
+class OTPPartitionTests(SimpleTestCase):
+    """Daily partition bookkeeping (the DDL itself is PostgreSQL only)."""
+
+    def test_only_days_past_expiry_are_dropped(self):
+        now = timezone.make_aware(datetime(2026, 10, 19, 0, 2))
+        names = ["accounts_otp_p20261017", "accounts_otp_p20261018", "accounts_otp_p20261019", "accounts_otp_default"]
+
+        with mock.patch.object(otp_storage.partitioning, "list_partitions", return_value=names), \
+                mock.patch.object(otp_storage.partitioning, "drop_partition") as drop:
+            dropped = otp_storage.drop_expired_partitions(now=now)
+
+        # The 18th ended two minutes ago: OTPs from 23:58 on may still be usable
+        self.assertEqual(dropped, ["accounts_otp_p20261017"])
+        drop.assert_called_once_with("accounts_otp_p20261017")
+
+    def test_missing_days_are_created(self):
+        existing = ["accounts_otp_p20261018", "accounts_otp_p20261019"]
+
+        with mock.patch.object(otp_storage.partitioning, "list_partitions", return_value=existing), \
+                mock.patch.object(otp_storage.partitioning, "create_range_partition") as create:
+            created = otp_storage.ensure_daily_partitions(days_ahead=2, today=date(2026, 10, 19))
+
+        self.assertEqual(created, ["accounts_otp_p20261020", "accounts_otp_p20261021"])
+        table, column, name, start, end = create.call_args_list[0].args
+        self.assertEqual((table, column, name), ("accounts_otp", "created_at", "accounts_otp_p20261020"))
+        self.assertEqual(end - start, timedelta(days=1))
@@ -0,0 +1,169 @@
+"""
+Refresh-token blacklist stores.
+
+Rotated refresh tokens are remembered by `jti` only, with a TTL equal to the
+token's remaining lifetime, so entries expire on their own. This replaces the
+`OutstandingToken`/`BlacklistedToken` tables on the `/token/refresh/` hot path.
+
+`add()` is an atomic claim: it returns False when the jti is already there,
+so of two concurrent refreshes with the same token only one can rotate it.
+
+Backends:
+- "redis": shared store for multi-process deployments (default)
+- "memory": per-process stand-in for tests and local development
+"""
+from threading import Lock
+import time
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryTokenBlacklist:
+    """Process-local jti -> expiry map; expired entries are dropped lazily."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = Lock()
+
+    def add(self, jti, expires_at):
+        """Blacklist `jti`; False if it already was (or has expired)."""
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return False
+        with self._lock:
+            if self._contains(jti):
+                return False
+            self._entries[jti] = expires_at
+        return True
+
+    def contains(self, jti):
+        with self._lock:
+            return self._contains(jti)
+
+    def _contains(self, jti):
+        expires_at = self._entries.get(jti)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del self._entries[jti]
+            return False
+        return True
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [jti for jti, expires_at in self._entries.items() if expires_at <= now]
+            for jti in expired:
+                del self._entries[jti]
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisTokenBlacklist:
+    """One `SET key 1 NX EX ttl` per blacklisted jti; Redis expires the keys."""
+
+    def __init__(self, url, key_prefix):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._key_prefix = key_prefix
+
+    def _key(self, jti):
+        return f"{self._key_prefix}{jti}"
+
+    def add(self, jti, expires_at):
+        """Blacklist `jti`; False if it already was (or has expired)."""
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return False
+        return bool(self._client.set(self._key(jti), 1, ex=ttl, nx=True))
+
+    def contains(self, jti):
+        return bool(self._client.exists(self._key(jti)))
+
+    def purge_expired(self):
+        # Redis expires keys itself
+        return 0
+
+    def clear(self):
+        for key in self._client.scan_iter(match=f"{self._key_prefix}*"):
+            self._client.delete(key)
+
+
+_blacklist = None
+_blacklist_lock = Lock()
+
+
+def get_token_blacklist():
+    """Return the configured blacklist store (created once per process)."""
+    global _blacklist
+    if _blacklist is None:
+        with _blacklist_lock:
+            if _blacklist is None:
+                backend = settings.TOKEN_BLACKLIST_BACKEND
+                if backend == "redis":
+                    _blacklist = RedisTokenBlacklist(
+                        settings.TOKEN_BLACKLIST_REDIS_URL,
+                        settings.TOKEN_BLACKLIST_KEY_PREFIX,
+                    )
+                elif backend == "memory":
+                    _blacklist = InMemoryTokenBlacklist()
+                else:
+                    raise ValueError(f"Unknown TOKEN_BLACKLIST_BACKEND: {backend}")
+                logger.info(f"Token blacklist backend: {backend}")
+    return _blacklist
+
+
+# -------------------
+# simplejwt DB tables (legacy)
+# -------------------
+def copy_db_blacklist(chunk_size=2000):
+    """
+    Copy still-valid jtis from `BlacklistedToken` into the configured store.
+    Run once when switching over so tokens revoked before the switch stay
+    revoked. Returns the number of jtis copied.
+    """
+    from django.utils import timezone
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+    store = get_token_blacklist()
+    rows = BlacklistedToken.objects.filter(
+        token__expires_at__gt=timezone.now()
+    ).values_list("token__jti", "token__expires_at")
+
+    copied = 0
+    for jti, expires_at in rows.iterator(chunk_size=chunk_size):
+        if store.add(jti, expires_at.timestamp()):
+            copied += 1
+    logger.info(f"Copied {copied} blacklisted jti(s) into the token blacklist store")
+    return copied
+
+
+def flush_expired_token_rows(batch_size=None):
+    """
+    Delete expired `OutstandingToken` rows (and their `BlacklistedToken`
+    rows via cascade) in batches. Returns the number of outstanding tokens removed.
+    """
+    from django.utils import timezone
+    from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+    batch_size = batch_size or settings.TOKEN_FLUSH_BATCH_SIZE
+    expired = OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+
+    flushed = 0
+    while True:
+        ids = list(expired.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            break
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        flushed += len(ids)
+        if len(ids) < batch_size:
+            break
+    logger.info(f"Flushed {flushed} expired outstanding token row(s)")
+    return flushed
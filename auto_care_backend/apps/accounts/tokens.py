@@ -0,0 +1,35 @@
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, Token
+
+from apps.accounts.token_blacklist import get_token_blacklist
+
+
+class RotatingRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist lives in the jti store from
+    `apps.accounts.token_blacklist` instead of the simplejwt DB tables.
+    Issuing and rotating tokens no longer writes `OutstandingToken` rows.
+    """
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if get_token_blacklist().contains(jti):
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        # check_blacklist() and blacklist() are separate steps during a
+        # refresh; the atomic add decides which concurrent refresh rotates
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not get_token_blacklist().add(jti, self.payload["exp"]):
+            raise TokenError("Token is blacklisted")
+        return True
+
+    def outstand(self):
+        # Only membership of the blacklist is ever checked
+        return None
+
+    @classmethod
+    def for_user(cls, user):
+        # Skip BlacklistMixin.for_user, which inserts an OutstandingToken row
+        return Token.for_user.__func__(cls, user)
@@ -1,5 +1,11 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import Booking
+from django.db import transaction
+from django.urls import reverse
+from django.utils.html import format_html
+from auto_care.counts import EstimatedCountPaginator
+from .bulk import transition_bookings
+from .models import Booking, BookingBulkJob, DemandForecast, TimeSlot
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
@@ -21,9 +27,21 @@ class BookingAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
     readonly_fields = ['created_at']
     
+    # Changelist performance: join users, no full-table COUNT(*), no user dropdowns
+    list_select_related = ['user']
+    changelist_only_fields = [
+        'id', 'vehicle_type', 'date', 'slot', 'status', 'created_at',
+        'user__id', 'user__mobile_number',
+    ]
+    autocomplete_fields = ['user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # No date_hierarchy: its DISTINCT date_trunc() scans the whole filtered
+    # table on every load. The 'date' list filter gives bounded ranges instead.
+    
     fieldsets = (
         ('Booking Information', {
-            'fields': ('user', 'vehicle_type', 'date', 'time_slot', 'status')
+            'fields': ('user', 'vehicle_type', 'date', 'slot', 'status')
         }),
         ('Additional Information', {
             'fields': ('notes', 'created_at'),
@@ -33,12 +51,117 @@ class BookingAdmin(admin.ModelAdmin):
     
     actions = ['mark_confirmed', 'mark_completed']
     
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        if match and match.url_name and match.url_name.endswith('_changelist'):
+            # Only load the columns the changelist renders
+            queryset = queryset.only(*self.changelist_only_fields)
+        return queryset
+    
+    def _bulk_transition(self, request, queryset, from_status, to_status, action):
+        """Apply small selections inline; hand large ones to a chunked Celery job."""
+        booking_ids = list(
+            queryset.filter(status=from_status).order_by('id').values_list('id', flat=True)
+        )
+        
+        if len(booking_ids) <= settings.BOOKING_BULK_SYNC_LIMIT:
+            updated = transition_bookings(booking_ids, from_status, to_status)
+            self.message_user(request, f'{updated} booking(s) marked as {to_status}.')
+            return
+        
+        from .tasks import run_booking_bulk_job
+        
+        job = BookingBulkJob.objects.create(
+            action=action,
+            from_status=from_status,
+            to_status=to_status,
+            booking_ids=booking_ids,
+            total=len(booking_ids),
+            created_by=request.user,
+        )
+        transaction.on_commit(lambda: run_booking_bulk_job.delay(job.pk))
+        
+        job_url = reverse('admin:bookings_bookingbulkjob_change', args=[job.pk])
+        self.message_user(
+            request,
+            format_html(
+                '{} booking(s) queued to be marked as {}. <a href="{}">Track progress</a>',
+                len(booking_ids), to_status, job_url
+            )
+        )
+    
     def mark_confirmed(self, request, queryset):
-        updated = queryset.filter(status='pending').update(status='confirmed')
-        self.message_user(request, f'{updated} booking(s) marked as confirmed.')
+        self._bulk_transition(request, queryset, 'pending', 'confirmed', 'mark_confirmed')
     mark_confirmed.short_description = 'Mark selected bookings as Confirmed'
     
     def mark_completed(self, request, queryset):
-        updated = queryset.filter(status='confirmed').update(status='completed')
-        self.message_user(request, f'{updated} booking(s) marked as completed.')
-    mark_completed.short_description = 'Mark selected bookings as Completed'
\ No newline at end of file
+        self._bulk_transition(request, queryset, 'confirmed', 'completed', 'mark_completed')
+    mark_completed.short_description = 'Mark selected bookings as Completed'
+
+
+@admin.register(BookingBulkJob)
+class BookingBulkJobAdmin(admin.ModelAdmin):
+    """Read-only progress view for background bulk actions"""
+    
+    list_display = [
+        'id', 'action', 'status', 'progress_display', 'updated', 'created_by', 'created_at', 'finished_at'
+    ]
+    list_filter = ['status', 'action']
+    list_select_related = ['created_by']
+    ordering = ['-created_at']
+    exclude = ['booking_ids']
+    readonly_fields = [
+        'action', 'from_status', 'to_status', 'total', 'processed', 'updated',
+        'status', 'error', 'created_by', 'created_at', 'finished_at',
+    ]
+    
+    def get_queryset(self, request):
+        # booking_ids can hold thousands of ids - never needed for display
+        return super().get_queryset(request).defer('booking_ids')
+    
+    def progress_display(self, obj):
+        return f"{obj.progress_percent}% ({obj.processed}/{obj.total})"
+    progress_display.short_description = 'Progress'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DemandForecast)
+class DemandForecastAdmin(admin.ModelAdmin):
+    """Read-only nightly forecast (rebuilt by the forecast_booking_demand task)"""
+    
+    list_display = ['service_area', 'weekday', 'time_slot', 'expected', 'low', 'high', 'history_mean', 'history_max', 'generated_at']
+    list_filter = ['weekday', 'service_area', 'slot']
+    list_select_related = ['service_area']
+    ordering = ['service_area_id', 'weekday', 'slot_id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+
+@admin.register(TimeSlot)
+class TimeSlotAdmin(admin.ModelAdmin):
+    """Bookable slots; deactivate a slot instead of deleting it"""
+    
+    list_display = ['label', 'start', 'end', 'active']
+    list_editable = ['active']
+    list_filter = ['active']
+    ordering = ['idx']
+    
+    def get_readonly_fields(self, request, obj=None):
+        # The start time is the slot's key (idx) once bookings point at it
+        return ['start'] if obj else []
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
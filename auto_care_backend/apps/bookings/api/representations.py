@@ -0,0 +1,135 @@
+"""
+Fast read-only booking representation.
+
+Renders the exact JSON shape of ``BookingSerializer`` straight from
+``values_list()`` tuples, without instantiating ``Booking`` models or going
+through per-field serializer dispatch. Used by the list endpoints, where
+serialization dominates the response time.
+"""
+from functools import lru_cache
+import logging
+
+from apps.locations.geometry import get_coverage_index
+from ..slots import slot_label
+from .serializers import BookingSerializer
+
+logger = logging.getLogger(__name__)
+
+# Columns pulled for every row (joined user/address columns included).
+BOOKING_ROW_COLUMNS = (
+    "id",
+    "vehicle_type",
+    "service_id",
+    "date",
+    "slot_id",
+    "status",
+    "created_at",
+    "notes",
+    "user__name",
+    "user__mobile_number",
+    "latitude",
+    "longitude",
+    "service_address",
+    "address_id",
+    "address__label",
+)
+
+_COL = {name: index for index, name in enumerate(BOOKING_ROW_COLUMNS)}
+
+# Serializer field name -> row column it is read from
+_FIELD_SOURCES = {
+    "user_name": "user__name",
+    "user_mobile": "user__mobile_number",
+    "service": "service_id",
+    "time_slot": "slot_id",
+    "address": "address_id",
+    "address_label": "address__label",
+}
+
+# Fields whose DRF representation is not a plain passthrough
+_FORMATTED_FIELDS = {"date", "created_at", "latitude", "longitude"}
+
+# Fields computed from a column rather than formatted by the DRF field
+_COLUMN_FORMATTERS = {"time_slot": slot_label}
+
+
+@lru_cache(maxsize=None)
+def _field_plan():
+    """
+    Compile the serializer's field list into (key, column index, formatter)
+    steps once. Formatters reuse the DRF field's own ``to_representation`` so
+    date/decimal formatting always matches the serializer.
+    """
+    fields = BookingSerializer().fields
+    plan = []
+    for name, field in fields.items():
+        if name == "location_summary":
+            plan.append((name, None, None))
+            continue
+        column = _FIELD_SOURCES.get(name, name)
+        formatter = _COLUMN_FORMATTERS.get(name)
+        if name in _FORMATTED_FIELDS:
+            formatter = field.to_representation
+        plan.append((name, _COL[column], formatter))
+    return tuple(plan)
+
+
+def _location_summary(row, coverage):
+    """Same dict as ``Booking.get_location_summary()`` without extra queries."""
+    latitude = row[_COL["latitude"]]
+    longitude = row[_COL["longitude"]]
+    in_service_area = False
+    if latitude is not None and longitude is not None:
+        in_service_area = coverage.is_covered(latitude, longitude)
+
+    summary = {
+        "coordinates": f"{latitude}, {longitude}",
+        "address": row[_COL["service_address"]],
+        "in_service_area": in_service_area,
+    }
+
+    address_id = row[_COL["address_id"]]
+    if address_id is not None:
+        summary["saved_address"] = {
+            "id": address_id,
+            "label": row[_COL["address__label"]],
+        }
+
+    return summary
+
+
+def render_booking_rows(rows, coverage=None):
+    """Render already-fetched row tuples into serializer-shaped dicts."""
+    if coverage is None:
+        coverage = get_coverage_index()
+
+    plan = _field_plan()
+    address_label_col = _COL["address__label"]
+    address_id_col = _COL["address_id"]
+    output = []
+
+    for row in rows:
+        item = {}
+        for key, index, formatter in plan:
+            if index is None:
+                item[key] = _location_summary(row, coverage)
+                continue
+            if index == address_label_col and row[address_id_col] is None:
+                # Serializer skips `address_label` when there is no address
+                continue
+            value = row[index]
+            if value is not None and formatter is not None:
+                value = formatter(value)
+            item[key] = value
+        output.append(item)
+
+    return output
+
+
+def render_bookings(queryset):
+    """
+    Return the ``BookingSerializer(queryset, many=True).data`` equivalent for
+    a Booking queryset, fetched as a single joined ``values_list()`` query.
+    """
+    rows = queryset.values_list(*BOOKING_ROW_COLUMNS)
+    return render_booking_rows(rows)
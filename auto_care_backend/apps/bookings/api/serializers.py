@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from ..models import Booking
+from ..slots import get_slot_table, slot_idx, slot_label
 from apps.locations.models import Address, ServiceArea
+from apps.locations.geometry import get_coverage_index
+from apps.services.catalog import get_catalog
 from datetime import date as date_type
 import logging
 
@@ -18,12 +21,18 @@ class BookingSerializer(serializers.ModelSerializer):
     
     # Address details if booking uses saved address
     address_label = serializers.CharField(source='address.label', read_only=True)
+    
+    # Catalog service id, checked against the in-process catalog snapshot
+    service = serializers.IntegerField(source='service_id', required=False, allow_null=True)
+    
+    # Slot label ("09:00 AM"); stored as Booking.slot_idx
+    time_slot = serializers.CharField(max_length=50)
 
     class Meta:
         model = Booking
         fields = [
             # Original fields
-            "id", "vehicle_type", "date", "time_slot", "status", "created_at", "notes",
+            "id", "vehicle_type", "service", "date", "time_slot", "status", "created_at", "notes",
             "user_name", "user_mobile",
             
             # 🆕 NEW LOCATION FIELDS
@@ -43,12 +52,23 @@ class BookingSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Cannot book service for past dates.")
         return value
 
+    def validate_time_slot(self, value):
+        """Validate the slot is one of the active TimeSlot rows"""
+        try:
+            idx = slot_idx(value)
+        except ValueError:
+            raise serializers.ValidationError("Invalid time slot.")
+        if idx not in get_slot_table():
+            raise serializers.ValidationError("This time slot is not available for booking.")
+        return slot_label(idx)
+
     def validate_address(self, value):
         """Validate address belongs to the requesting user"""
         if value:
             request = self.context.get('request')
             if request and request.user:
-                if value.user != request.user:
+                # Compare ids: `value.user` would load the owner with an extra query
+                if value.user_id != request.user.id:
                     raise serializers.ValidationError("Invalid address selection.")
         return value
 
@@ -70,41 +90,49 @@ class BookingSerializer(serializers.ModelSerializer):
 
     def validate_service_area_coverage(self, latitude, longitude):
         """Validate location is within active service areas"""
-        active_areas = ServiceArea.objects.filter(active=True)
+        coverage = get_coverage_index()
         
         # If no service areas defined, allow all locations
-        if not active_areas.exists():
+        if not coverage:
             logger.warning("No active service areas defined - allowing all locations")
             return True
         
-        # Check if location is within any active service area
-        is_covered = any(
-            area.contains(latitude, longitude) 
-            for area in active_areas
-        )
+        # Check if location is within any active service area (bbox prefilter + exact test)
+        is_covered = coverage.is_covered(latitude, longitude)
         
         if not is_covered:
             # Get nearest service area for better error message
-            distances = []
-            for area in active_areas:
-                from apps.locations.models import haversine_distance
-                distance = haversine_distance(
-                    float(area.center_lat), float(area.center_lng),
-                    latitude, longitude
-                )
-                distances.append((area.name, distance))
+            distances = coverage.nearest(latitude, longitude, limit=1)
             
             if distances:
-                nearest_area, distance = min(distances, key=lambda x: x[1])
+                nearest_area, distance = distances[0]
                 raise serializers.ValidationError(
                     f"Location is outside our service area. "
-                    f"Nearest service area is {nearest_area} ({distance:.1f} km away)."
+                    f"Nearest service area is {nearest_area.name} ({distance:.1f} km away)."
                 )
             else:
                 raise serializers.ValidationError("Location is outside our service area.")
         
         return True
 
+    def validate_catalog_service(self, data):
+        """Vehicle type must be offered; a chosen service must be active and match it"""
+        catalog = get_catalog()
+        vehicle_type = data.get('vehicle_type') or (self.instance and self.instance.vehicle_type)
+        if vehicle_type and not catalog.offers_vehicle(vehicle_type):
+            raise serializers.ValidationError({
+                "vehicle_type": "No services are currently offered for this vehicle type."
+            })
+        
+        service_id = data.get('service_id')
+        if service_id is None:
+            return
+        service = catalog.get(service_id)
+        if service is None:
+            raise serializers.ValidationError({"service": "Unknown or inactive service."})
+        if service['vehicle_type'] != vehicle_type:
+            raise serializers.ValidationError({"service": "Service is not available for this vehicle type."})
+
     def validate(self, data):
         """Cross-field validation for location data"""
         latitude = data.get('latitude')
@@ -112,6 +140,9 @@ class BookingSerializer(serializers.ModelSerializer):
         service_address = data.get('service_address', '').strip()
         address = data.get('address')
         
+        # Catalog checks use the in-process snapshot (no queries)
+        self.validate_catalog_service(data)
+        
         # Ensure location coordinates are provided
         if latitude is None or longitude is None:
             raise serializers.ValidationError({
@@ -157,10 +188,9 @@ class BookingSerializer(serializers.ModelSerializer):
         time_slot = data.get('time_slot')
         
         if booking_date and time_slot:
-            existing = Booking.objects.filter(
+            existing = Booking.objects.on_date(booking_date).filter(
                 user=user,
-                date=booking_date,
-                time_slot=time_slot,
+                slot_id=slot_idx(time_slot),
                 status__in=['pending', 'confirmed']
             )
             
@@ -1,8 +1,21 @@
 from django.urls import path
-from .views import BookingListCreateView, BookingDetailView
+from .views import (
+    BookingListCreateView, BookingDetailView, export_bookings,
+    archived_booking_list, archived_booking_detail, booking_map_clusters,
+)
 
 urlpatterns = [
     # Basic booking endpoints
     path('', BookingListCreateView.as_view(), name='booking-list-create'),
     path('<int:pk>/', BookingDetailView.as_view(), name='booking-detail'),
+    
+    # Staff export (streaming CSV / NDJSON)
+    path('export/', export_bookings, name='booking-export'),
+    
+    # Staff ops map: clustered upcoming bookings
+    path('map/clusters/', booking_map_clusters, name='booking-map-clusters'),
+    
+    # Staff access to archived (cold) bookings
+    path('archive/', archived_booking_list, name='booking-archive-list'),
+    path('archive/<int:pk>/', archived_booking_detail, name='booking-archive-detail'),
 ]
\ No newline at end of file
@@ -1,11 +1,22 @@
 from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.decorators import api_view, permission_classes
-from django.db.models import Q
-from ..models import Booking
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
+from ..models import Booking, ArchivedBooking, BookingArchiveRollup
 from .serializers import BookingSerializer
+from .representations import render_bookings
+from ..availability import slot_availability
+from ..archive import load_archived_bookings, location_key
+from ..clustering import ClusterError, booking_clusters, parse_bbox
+from ..export import EXPORT_FORMATS, build_export_queryset, iter_export_rows, stream_export
 from apps.locations.models import ServiceArea, Address
+from apps.locations.geometry import get_coverage_index
+from auto_care.counts import CountResult, cached_count, count_rows
+from auto_care.idempotency import idempotent
+from auto_care.querybudget import query_budget
+from auto_care.throttling import ServiceCheckThrottle, SlotLookupThrottle, UserSlidingWindowThrottle
 import logging
 from datetime import datetime, date
 
@@ -15,6 +26,7 @@ class BookingListCreateView(APIView):
     """Enhanced booking list/create with location support"""
     permission_classes = [permissions.IsAuthenticated]
 
+    @query_budget(3)
     def get(self, request, *args, **kwargs):
         """Get all bookings for logged-in user with location info"""
         bookings = Booking.objects.filter(user=request.user).order_by("-created_at")
@@ -29,26 +41,27 @@ class BookingListCreateView(APIView):
         date_to = request.query_params.get('date_to')
         if date_from:
             try:
-                date_from = datetime.strptime(date_from, '%Y-%m-%d').date()
-                bookings = bookings.filter(date__gte=date_from)
+                bookings = bookings.between(date_from=datetime.strptime(date_from, '%Y-%m-%d').date())
             except ValueError:
                 pass
         if date_to:
             try:
-                date_to = datetime.strptime(date_to, '%Y-%m-%d').date()
-                bookings = bookings.filter(date__lte=date_to)
+                bookings = bookings.between(date_to=datetime.strptime(date_to, '%Y-%m-%d').date())
             except ValueError:
                 pass
         
-        serializer = BookingSerializer(bookings, many=True)
+        # Read-only list: render from joined value rows instead of the ModelSerializer
+        booking_data = render_bookings(bookings)
         
-        logger.info(f"Bookings listed for user {request.user.mobile_number}: {bookings.count()} bookings")
+        logger.info(f"Bookings listed for user {request.user.mobile_number}: {len(booking_data)} bookings")
         
         return Response({
-            'count': bookings.count(),
-            'bookings': serializer.data
+            'count': len(booking_data),
+            'bookings': booking_data
         })
 
+    @query_budget(10)
+    @idempotent
     def post(self, request, *args, **kwargs):
         """Create new location-aware booking"""
         # Log incoming request data for debugging
@@ -111,6 +124,7 @@ class BookingDetailView(APIView):
         except Booking.DoesNotExist:
             return None
 
+    @query_budget(2)
     def get(self, request, pk):
         """Get single booking details with location info"""
         booking = self.get_object(pk, request.user)
@@ -123,6 +137,7 @@ class BookingDetailView(APIView):
         serializer = BookingSerializer(booking)
         return Response(serializer.data)
 
+    @query_budget(7)
     def patch(self, request, pk):
         """Update booking with location validation"""
         booking = self.get_object(pk, request.user)
@@ -152,6 +167,7 @@ class BookingDetailView(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @query_budget(8)
     def delete(self, request, pk):
         """Cancel booking"""
         booking = self.get_object(pk, request.user)
@@ -177,6 +193,8 @@ class BookingDetailView(APIView):
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@throttle_classes([UserSlidingWindowThrottle, ServiceCheckThrottle])
+@query_budget(1)
 def check_service_availability(request):
     """Check if location is within service area"""
     try:
@@ -199,23 +217,23 @@ def check_service_availability(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check service area coverage
-        active_areas = ServiceArea.objects.filter(active=True)
+        # Check service area coverage (cached compiled areas, no per-request queries)
+        coverage = get_coverage_index()
         
-        if not active_areas.exists():
+        if not coverage:
             return Response({
                 'service_available': True,
                 'message': 'Service available everywhere (no areas configured)'
             })
         
         # Check if location is within any active service area
-        covered_areas = []
-        for area in active_areas:
-            if area.contains(lat, lng):
-                covered_areas.append({
-                    'name': area.name,
-                    'distance_from_center': area.distance_from_center(lat, lng) if hasattr(area, 'distance_from_center') else 0
-                })
+        covered_areas = [
+            {
+                'name': area.name,
+                'distance_from_center': area.distance_from_center(lat, lng)
+            }
+            for area in coverage.covering(lat, lng)
+        ]
         
         if covered_areas:
             return Response({
@@ -225,19 +243,13 @@ def check_service_availability(request):
             })
         else:
             # Find nearest service area
-            from apps.locations.models import haversine_distance
-            nearest_areas = []
-            for area in active_areas:
-                distance = haversine_distance(
-                    float(area.center_lat), float(area.center_lng),
-                    lat, lng
-                )
-                nearest_areas.append({
+            nearest_areas = [
+                {
                     'name': area.name,
                     'distance_km': round(distance, 1)
-                })
-            
-            nearest_areas.sort(key=lambda x: x['distance_km'])
+                }
+                for area, distance in coverage.nearest(lat, lng)
+            ]
             
             return Response({
                 'service_available': False,
@@ -259,6 +271,7 @@ def check_service_availability(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@query_budget(0)
 def reverse_geocode(request):
     """Simple reverse geocoding (placeholder for external service)"""
     try:
@@ -289,6 +302,8 @@ def reverse_geocode(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@throttle_classes([UserSlidingWindowThrottle, SlotLookupThrottle])
+@query_budget(2)
 def available_time_slots(request):
     """Get available time slots for a specific date"""
     date_str = request.query_params.get('date')
@@ -307,61 +322,240 @@ def available_time_slots(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Default time slots
-    all_slots = [
-        "05:00 AM", "06:00 AM", "07:00 AM", "08:00 AM", "09:00 AM", "10:00 AM",
-        "11:00 AM", "12:00 PM", "01:00 PM", "02:00 PM", "03:00 PM", "04:00 PM",
-        "05:00 PM", "06:00 PM", "07:00 PM", "08:00 PM"
-    ]
-    
-    # Get booked slots for the date
-    booked_slots = Booking.objects.filter(
-        date=booking_date,
-        status__in=['pending', 'confirmed']
-    ).values_list('time_slot', flat=True).distinct()
-    
-    available_slots = [slot for slot in all_slots if slot not in booked_slots]
+    # One booked-slot query per date serves all concurrent callers (short cache + SWR)
+    availability = slot_availability(booking_date)
+    available_slots = availability['available_slots']
     
     return Response({
         'date': date_str,
         'available_slots': available_slots,
-        'booked_slots': list(booked_slots),
+        'booked_slots': availability['booked_slots'],
         'total_available': len(available_slots)
     })
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@query_budget(4)
 def booking_statistics(request):
     """Get user's booking statistics with location insights"""
     user_bookings = Booking.objects.filter(user=request.user)
+    # Archived (cold) bookings only survive as per-user rollups
+    rollup = BookingArchiveRollup.objects.filter(user=request.user).first()
     
+    # Exact counts: one user's bookings are a small, (user, date)-indexed set,
+    # so one conditional aggregate replaces a COUNT(*) per status
+    counts = user_bookings.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+        completed=Count('id', filter=Q(status='completed')),
+        cancelled=Count('id', filter=Q(status='cancelled')),
+    )
     stats = {
-        'total_bookings': user_bookings.count(),
-        'pending_bookings': user_bookings.filter(status='pending').count(),
-        'completed_bookings': user_bookings.filter(status='completed').count(),
-        'cancelled_bookings': user_bookings.filter(status='cancelled').count(),
-        'unique_locations': user_bookings.values('latitude', 'longitude').distinct().count(),
+        'total_bookings': counts['total'],
+        'pending_bookings': counts['pending'],
+        'completed_bookings': counts['completed'],
+        'cancelled_bookings': counts['cancelled'],
         'most_used_addresses': []
     }
+    if not rollup:
+        stats['unique_locations'] = user_bookings.values('latitude', 'longitude').distinct().count()
     
     # Get most frequently used addresses
-    if user_bookings.exists():
-        from django.db.models import Count
+    usage_counts = {}
+    if counts['total']:
         address_usage = user_bookings.filter(
             address__isnull=False
         ).values(
             'address__id', 'address__label'
         ).annotate(
             usage_count=Count('id')
-        ).order_by('-usage_count')[:5]
+        )
         
-        stats['most_used_addresses'] = [
-            {
-                'address_id': item['address__id'],
+        for item in address_usage:
+            usage_counts[item['address__id']] = {
                 'label': item['address__label'],
-                'usage_count': item['usage_count']
+                'count': item['usage_count']
             }
-            for item in address_usage
-        ]
     
-    return Response(stats)
\ No newline at end of file
+    if rollup:
+        stats['total_bookings'] += rollup.total
+        stats['completed_bookings'] += rollup.completed
+        stats['cancelled_bookings'] += rollup.cancelled
+        live_locations = {
+            location_key(latitude, longitude)
+            for latitude, longitude in user_bookings.values_list('latitude', 'longitude').distinct()
+        }
+        stats['unique_locations'] = len(live_locations.union(rollup.location_keys))
+        for address_id, usage in rollup.address_usage.items():
+            entry = usage_counts.setdefault(int(address_id), {'label': usage['label'], 'count': 0})
+            entry['count'] += usage['count']
+    
+    top_addresses = sorted(usage_counts.items(), key=lambda item: item[1]['count'], reverse=True)[:5]
+    stats['most_used_addresses'] = [
+        {
+            'address_id': address_id,
+            'label': usage['label'],
+            'usage_count': usage['count']
+        }
+        for address_id, usage in top_addresses
+    ]
+    
+    return Response(stats)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+@query_budget(2)
+def export_bookings(request):
+    """Stream bookings as CSV or NDJSON (staff only)"""
+    # Not `format`: DRF reserves it for renderer negotiation
+    export_format = request.query_params.get('export_format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            {'error': f'export_format must be one of: {", ".join(EXPORT_FORMATS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    filters = {}
+    for param in ('date_from', 'date_to'):
+        value = request.query_params.get(param)
+        if value:
+            try:
+                filters[param] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                return Response(
+                    {'error': f'Invalid {param}. Use YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+    
+    status_filter = request.query_params.get('status')
+    if status_filter:
+        if status_filter not in dict(Booking.STATUS_CHOICES):
+            return Response(
+                {'error': 'Invalid status'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        filters['status'] = status_filter
+    
+    service_area = None
+    service_area_id = request.query_params.get('service_area')
+    if service_area_id:
+        try:
+            service_area = ServiceArea.objects.get(pk=int(service_area_id))
+        except (ValueError, ServiceArea.DoesNotExist):
+            return Response(
+                {'error': 'Service area not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+    
+    queryset = build_export_queryset(service_area=service_area, **filters)
+    rows = iter_export_rows(queryset, service_area=service_area)
+    
+    content_type = 'application/x-ndjson' if export_format == 'ndjson' else 'text/csv'
+    response = StreamingHttpResponse(stream_export(rows, export_format), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="bookings.{export_format}"'
+    
+    logger.info(f"Booking export ({export_format}) started by {request.user.mobile_number}: {request.query_params.dict()}")
+    return response
+
+
+# -------------------
+# Ops map clusters (staff)
+# -------------------
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+@query_budget(2)
+def booking_map_clusters(request):
+    """Grid clusters of upcoming bookings for a map bbox and zoom (staff only)"""
+    try:
+        bbox = parse_bbox(request.query_params.get('bbox'))
+        zoom = int(request.query_params.get('zoom', ''))
+    except ValueError as exc:
+        message = str(exc) if isinstance(exc, ClusterError) else 'zoom must be an integer'
+        return Response({'error': message}, status=status.HTTP_400_BAD_REQUEST)
+    
+    statuses = request.query_params.getlist('status') or None
+    if statuses and any(value not in dict(Booking.STATUS_CHOICES) for value in statuses):
+        return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    filters = {}
+    for param in ('date_from', 'date_to'):
+        value = request.query_params.get(param)
+        if value:
+            try:
+                filters[param] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                return Response(
+                    {'error': f'Invalid {param}. Use YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+    if statuses:
+        filters['statuses'] = tuple(statuses)
+    
+    try:
+        clusters = booking_clusters(bbox, zoom, **filters)
+    except ClusterError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(clusters)
+
+
+# -------------------
+# Archived bookings (staff)
+# -------------------
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+@query_budget(4)
+def archived_booking_list(request):
+    """Rehydrate archived bookings, filtered by user and/or date range (staff only)"""
+    archived = ArchivedBooking.objects.order_by('-date', '-id')
+    filtered = False
+    
+    user_id = request.query_params.get('user')
+    if user_id:
+        if not user_id.isdigit():
+            return Response({'error': 'user must be a numeric id'}, status=status.HTTP_400_BAD_REQUEST)
+        archived = archived.filter(user_id=int(user_id))
+        filtered = True
+    
+    for param, lookup in (('date_from', 'date__gte'), ('date_to', 'date__lte')):
+        value = request.query_params.get(param)
+        if value:
+            try:
+                archived = archived.filter(**{lookup: datetime.strptime(value, '%Y-%m-%d').date()})
+                filtered = True
+            except ValueError:
+                return Response(
+                    {'error': f'Invalid {param}. Use YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+    
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 100)), 500))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    bookings = load_archived_bookings(archived[:limit])
+    # A short page is the whole result. Otherwise the unfiltered total (the
+    # archive only grows) is cached, filtered ones are exact when small and
+    # planner estimates when large
+    if len(bookings) < limit:
+        total = CountResult(len(bookings), 'exact')
+    elif not filtered:
+        total = cached_count('archived_bookings', archived)
+    else:
+        total = count_rows(archived)
+    return Response({
+        'count': len(bookings),
+        **total.as_dict('total'),
+        'bookings': bookings
+    })
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+@query_budget(2)
+def archived_booking_detail(request, pk):
+    """Rehydrate a single archived booking (staff only)"""
+    archived = ArchivedBooking.objects.filter(pk=pk)
+    bookings = load_archived_bookings(archived)
+    if not bookings:
+        return Response({'error': 'Archived booking not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(bookings[0])
@@ -0,0 +1,217 @@
+"""
+Cold archival of old completed/cancelled bookings.
+
+Bookings in a final state older than `BOOKING_ARCHIVE_AFTER_MONTHS` are only
+ever read for per-user statistics, so they are moved out of the live table in
+batches. Each batch:
+
+* stores the full rows either in `ArchivedBooking.payload` ("table" storage)
+  or in a gzip-compressed NDJSON file under `BOOKING_ARCHIVE_DIR` ("file"
+  storage; the ArchivedBooking row then only points at the file),
+* folds the rows into `BookingArchiveRollup` so `booking_statistics` stays
+  correct,
+* deletes the rows from `bookings_booking`,
+
+all in one transaction that first locks the batch with
+`SELECT ... FOR UPDATE SKIP LOCKED` (a file whose transaction rolls back is
+simply never referenced). Only the rows locked there are stored, folded and
+deleted, so concurrent runs (the beat job and `manage.py archive_bookings`)
+never count a booking twice, and a status change made before the lock is
+archived as it now is. Archived rows are rehydrated on demand with
+`load_archived_bookings()`.
+"""
+from functools import lru_cache
+from pathlib import Path
+import gzip
+import json
+import logging
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedBooking, Booking, BookingArchiveRollup
+from .partitions import add_months, month_start
+from .slots import slot_label
+
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_STATUSES = ("completed", "cancelled")
+ARCHIVE_STORAGES = ("table", "file")
+
+# Booking columns kept in the archive (attnames, plus the address label)
+ARCHIVE_COLUMNS = tuple(field.attname for field in Booking._meta.concrete_fields) + ("address__label",)
+
+
+def archive_cutoff(months=None, today=None):
+    """Bookings dated before the returned day are eligible for archival."""
+    months = settings.BOOKING_ARCHIVE_AFTER_MONTHS if months is None else months
+    return add_months(month_start(today or timezone.localdate()), -months)
+
+
+def archivable_bookings(cutoff):
+    return Booking.objects.filter(status__in=ARCHIVABLE_STATUSES, date__lt=cutoff)
+
+
+# -------------------
+# Storage
+# -------------------
+def _payload(row):
+    payload = dict(row)
+    payload["address_label"] = payload.pop("address__label")
+    # Keep the label as well: rows archived before slot_idx existed only have time_slot
+    payload["time_slot"] = slot_label(payload["slot_id"])
+    return payload
+
+
+def write_archive_file(rows):
+    """Write one batch as gzip NDJSON and return its path relative to BOOKING_ARCHIVE_DIR."""
+    archive_dir = Path(settings.BOOKING_ARCHIVE_DIR)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    name = f"bookings-{rows[0]['id']}-{rows[-1]['id']}-{timezone.now():%Y%m%d%H%M%S}.ndjson.gz"
+    tmp_path = archive_dir / f"{name}.tmp"
+
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as handle:
+        for row in rows:
+            handle.write(json.dumps(_payload(row), cls=DjangoJSONEncoder))
+            handle.write("\n")
+    # Rename last so a crash never leaves a half-written archive behind
+    tmp_path.rename(archive_dir / name)
+    return name
+
+
+@lru_cache(maxsize=16)
+def read_archive_file(name):
+    """{booking_id: payload} for one archive file. Files are immutable, so this is cached."""
+    rows = {}
+    with gzip.open(Path(settings.BOOKING_ARCHIVE_DIR) / name, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                payload = json.loads(line)
+                rows[payload["id"]] = payload
+    return rows
+
+
+# -------------------
+# Rollups
+# -------------------
+def location_key(latitude, longitude):
+    return f"{latitude},{longitude}"
+
+
+def _fold_into_rollups(rows):
+    by_user = {}
+    for row in rows:
+        by_user.setdefault(row["user_id"], []).append(row)
+
+    for user_id, user_rows in by_user.items():
+        rollup, _ = BookingArchiveRollup.objects.select_for_update().get_or_create(user_id=user_id)
+        locations = set(rollup.location_keys)
+        for row in user_rows:
+            rollup.total += 1
+            if row["status"] == "completed":
+                rollup.completed += 1
+            elif row["status"] == "cancelled":
+                rollup.cancelled += 1
+            locations.add(location_key(row["latitude"], row["longitude"]))
+            if row["address_id"] is not None:
+                usage = rollup.address_usage.setdefault(
+                    str(row["address_id"]), {"label": row["address__label"], "count": 0}
+                )
+                usage["count"] += 1
+        rollup.location_keys = sorted(locations)
+        rollup.save()
+
+
+# -------------------
+# Pipeline
+# -------------------
+def archive_batch(cutoff, batch_size, storage):
+    """Lock and archive up to `batch_size` eligible bookings. Returns the number archived."""
+    with transaction.atomic():
+        # Lock ids first (rows another run holds are skipped): FOR UPDATE is not
+        # allowed on the nullable side of the address join the full read needs
+        ids = list(
+            archivable_bookings(cutoff)
+            .select_for_update(skip_locked=True)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        rows = list(Booking.objects.filter(id__in=ids).order_by("id").values(*ARCHIVE_COLUMNS))
+        archive_file = write_archive_file(rows) if storage == "file" else ""
+
+        ArchivedBooking.objects.bulk_create(
+            [
+                ArchivedBooking(
+                    id=row["id"],
+                    user_id=row["user_id"],
+                    date=row["date"],
+                    status=row["status"],
+                    payload=None if archive_file else _payload(row),
+                    archive_file=archive_file,
+                )
+                for row in rows
+            ],
+            ignore_conflicts=True,
+        )
+        _fold_into_rollups(rows)
+        Booking.objects.filter(id__in=ids).delete()
+
+    return len(rows)
+
+
+def archive_old_bookings(months=None, batch_size=None, max_batches=None, storage=None, dry_run=False):
+    """
+    Archive eligible bookings in batches of `batch_size`.
+    Returns {'cutoff', 'archived', 'batches', 'complete'}; a dry run only
+    adds 'eligible' and archives nothing.
+    """
+    storage = storage or settings.BOOKING_ARCHIVE_STORAGE
+    if storage not in ARCHIVE_STORAGES:
+        raise ValueError(f"Unknown archive storage: {storage}")
+    batch_size = batch_size or settings.BOOKING_ARCHIVE_BATCH_SIZE
+    max_batches = max_batches or settings.BOOKING_ARCHIVE_MAX_BATCHES
+    cutoff = archive_cutoff(months)
+
+    stats = {"cutoff": cutoff, "archived": 0, "batches": 0, "complete": False}
+    if dry_run:
+        stats["eligible"] = archivable_bookings(cutoff).count()
+        return stats
+
+    while stats["batches"] < max_batches:
+        archived = archive_batch(cutoff, batch_size, storage)
+        if not archived:
+            stats["complete"] = True
+            break
+        stats["archived"] += archived
+        stats["batches"] += 1
+        if archived < batch_size:
+            stats["complete"] = True
+            break
+
+    logger.info(
+        f"Archived {stats['archived']} booking(s) dated before {cutoff} "
+        f"in {stats['batches']} batch(es) to {storage} (complete: {stats['complete']})"
+    )
+    return stats
+
+
+# -------------------
+# Rehydration
+# -------------------
+def load_archived_bookings(archived):
+    """Full booking dicts for an iterable of ArchivedBooking rows."""
+    bookings = []
+    for entry in archived:
+        if entry.archive_file:
+            payload = read_archive_file(entry.archive_file).get(entry.id)
+            if payload is None:
+                logger.error(f"Archived booking {entry.id} missing from {entry.archive_file}")
+                continue
+        else:
+            payload = entry.payload
+        bookings.append({**payload, "archived_at": entry.archived_at})
+    return bookings
@@ -0,0 +1,46 @@
+"""
+Time-slot availability per date.
+
+Availability is read-heavy and spiky (everyone asks for the same date when
+slots open), so lookups go through `auto_care.singleflight`: one booked-slot
+query per date serves all concurrent callers, and results are briefly cached
+with stale-while-revalidate. Booking changes invalidate the affected dates
+(see `apps.bookings.signals`). The booked-slot query reads slot_idx off the
+(date, slot_idx) index; slots offered come from the TimeSlot table.
+"""
+from auto_care.singleflight import cached_single_flight, invalidate
+
+from .models import Booking
+from .slots import get_slot_table, slot_label
+
+ACTIVE_STATUSES = ("pending", "confirmed")
+
+
+def availability_key(booking_date):
+    return f"slots:{booking_date.isoformat()}"
+
+
+def compute_slot_availability(booking_date):
+    booked = set(
+        Booking.objects.on_date(booking_date).filter(
+            status__in=ACTIVE_STATUSES
+        ).values_list('slot_id', flat=True).distinct()
+    )
+    slots = get_slot_table()
+    return {
+        'available_slots': [label for idx, label in zip(slots.indexes, slots.labels) if idx not in booked],
+        'booked_slots': [slot_label(idx) for idx in sorted(booked)],
+    }
+
+
+def slot_availability(booking_date):
+    """{'available_slots': [...], 'booked_slots': [...]} for `booking_date`."""
+    return cached_single_flight(
+        availability_key(booking_date),
+        lambda: compute_slot_availability(booking_date),
+    )
+
+
+def invalidate_availability(*dates):
+    for booking_date in set(dates):
+        invalidate(availability_key(booking_date))
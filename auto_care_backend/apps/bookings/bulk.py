@@ -0,0 +1,77 @@
+"""
+Chunked booking status transitions for admin bulk actions.
+
+Small selections are applied inline; large ones become a `BookingBulkJob`
+that the `run_booking_bulk_job` Celery task works through in chunks. Every
+chunk commits on its own (keeping row locks short) and sends
+`booking_status_changed` for the bookings it actually moved.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+import logging
+
+from .models import Booking, BookingBulkJob
+from .signals import booking_status_changed
+
+logger = logging.getLogger(__name__)
+
+
+def transition_chunk(booking_ids, from_status, to_status):
+    """Move one chunk of bookings `from_status` -> `to_status`. Returns moved ids."""
+    with transaction.atomic():
+        moved_ids = list(
+            Booking.objects.select_for_update()
+            .filter(id__in=booking_ids, status=from_status)
+            .values_list("id", flat=True)
+        )
+        if moved_ids:
+            Booking.objects.filter(id__in=moved_ids).update(
+                status=to_status, status_version=F("status_version") + 1
+            )
+            booking_status_changed.send(
+                sender=Booking,
+                booking_ids=moved_ids,
+                from_status=from_status,
+                to_status=to_status,
+            )
+    return moved_ids
+
+
+def transition_bookings(booking_ids, from_status, to_status, chunk_size=None):
+    """Synchronous path for small selections. Returns the number of moved bookings."""
+    chunk_size = chunk_size or settings.BOOKING_BULK_CHUNK_SIZE
+    updated = 0
+    for start in range(0, len(booking_ids), chunk_size):
+        updated += len(transition_chunk(booking_ids[start:start + chunk_size], from_status, to_status))
+    return updated
+
+
+def run_bulk_job(job_id, chunk_size=None):
+    """
+    Process a BookingBulkJob from its saved cursor. Progress is committed
+    together with each chunk, so re-running after a crash resumes safely.
+    """
+    chunk_size = chunk_size or settings.BOOKING_BULK_CHUNK_SIZE
+    job = BookingBulkJob.objects.get(pk=job_id)
+    if job.status == "completed":
+        return job
+
+    BookingBulkJob.objects.filter(pk=job.pk).update(status="running")
+
+    while job.processed < job.total:
+        chunk = job.booking_ids[job.processed:job.processed + chunk_size]
+        with transaction.atomic():
+            moved_ids = transition_chunk(chunk, job.from_status, job.to_status)
+            job.processed += len(chunk)
+            job.updated += len(moved_ids)
+            BookingBulkJob.objects.filter(pk=job.pk).update(
+                processed=job.processed, updated=job.updated
+            )
+        logger.info(f"Bulk job {job.pk}: {job.processed}/{job.total} processed, {job.updated} updated")
+
+    job.status = "completed"
+    job.finished_at = timezone.now()
+    BookingBulkJob.objects.filter(pk=job.pk).update(status=job.status, finished_at=job.finished_at)
+    return job
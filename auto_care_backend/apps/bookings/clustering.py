@@ -0,0 +1,118 @@
+"""
+Grid clustering of upcoming bookings for the ops map.
+
+The map asks for a bbox and zoom level. Bookings are bucketed into square
+grid cells of BOOKING_MAP_CELL_PX screen pixels at that zoom (web-map tiles
+are 256 px and halve in degrees per zoom level), and the bucketing runs in
+SQL: one GROUP BY on FLOOR(lat / cell), FLOOR(lng / cell) over the (date,
+lat/lng)-indexed rows, returning one centroid and count per non-empty cell.
+So the response grows with the viewport, not with the number of bookings.
+At most BOOKING_MAP_MAX_CLUSTERS (largest first) are returned; `total` still
+counts every matching booking in the bbox.
+
+Cells are aligned to a global grid and the bbox is snapped out to cell
+edges, so clusters stay put while panning and neighbouring requests share a
+cache key. Results go through `auto_care.singleflight` for a few seconds.
+"""
+from decimal import Decimal
+import math
+
+from django.conf import settings
+from django.db.models import Avg, Count, F, Min, Value
+from django.db.models.functions import Floor
+from django.utils import timezone
+
+from auto_care.singleflight import cached_single_flight
+
+from .availability import ACTIVE_STATUSES
+from .models import Booking
+
+MAX_ZOOM = 20
+TILE_PX = 256
+CLUSTER_COLUMNS = ("lat", "lng", "count", "booking_id")
+
+
+class ClusterError(ValueError):
+    """Raised for an unusable bbox/zoom request."""
+
+
+def cell_degrees(zoom):
+    """Grid cell edge in degrees for a zoom level."""
+    return 360 / (TILE_PX * 2 ** zoom) * settings.BOOKING_MAP_CELL_PX
+
+
+def snap_bbox(bbox, cell):
+    """Grow (min_lng, min_lat, max_lng, max_lat) out to whole grid cells."""
+    min_lng, min_lat, max_lng, max_lat = bbox
+    return (
+        math.floor(min_lng / cell) * cell,
+        math.floor(min_lat / cell) * cell,
+        math.ceil(max_lng / cell) * cell,
+        math.ceil(max_lat / cell) * cell,
+    )
+
+
+def parse_bbox(value):
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in value.split(","))
+    except (AttributeError, ValueError):
+        raise ClusterError("bbox must be min_lng,min_lat,max_lng,max_lat")
+    if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+        raise ClusterError("bbox is out of range or empty")
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def compute_clusters(bbox, zoom, statuses, date_from, date_to):
+    cell = cell_degrees(zoom)
+    min_lng, min_lat, max_lng, max_lat = bbox
+    # Decimal keeps the division in NUMERIC, same as the lat/lng columns
+    cell_value = Value(Decimal(repr(cell)))
+
+    bookings = Booking.objects.between(date_from=date_from, date_to=date_to).filter(
+        status__in=statuses,
+        latitude__gte=min_lat, latitude__lt=max_lat,
+        longitude__gte=min_lng, longitude__lt=max_lng,
+    )
+    # One row past the limit tells a full page from a truncated one
+    rows = list(
+        bookings
+        .annotate(cell_y=Floor(F("latitude") / cell_value), cell_x=Floor(F("longitude") / cell_value))
+        .values("cell_y", "cell_x")
+        .annotate(count=Count("id"), lat=Avg("latitude"), lng=Avg("longitude"), first_id=Min("id"))
+        .order_by("-count")[:settings.BOOKING_MAP_MAX_CLUSTERS + 1]
+    )
+    truncated = len(rows) > settings.BOOKING_MAP_MAX_CLUSTERS
+
+    clusters = [
+        [round(float(row["lat"]), 5), round(float(row["lng"]), 5), row["count"],
+         row["first_id"] if row["count"] == 1 else None]
+        for row in rows[:settings.BOOKING_MAP_MAX_CLUSTERS]
+    ]
+    return {
+        "zoom": zoom,
+        "cell_degrees": cell,
+        "bbox": [round(edge, 6) for edge in bbox],
+        # Every booking in the bbox; only a truncated response needs the extra count
+        "total": bookings.count() if truncated else sum(cluster[2] for cluster in clusters),
+        "truncated": truncated,
+        "columns": CLUSTER_COLUMNS,
+        "clusters": clusters,
+    }
+
+
+def booking_clusters(bbox, zoom, statuses=ACTIVE_STATUSES, date_from=None, date_to=None):
+    """Clusters of bookings in `bbox` at `zoom` (upcoming active bookings by default)."""
+    if not 0 <= zoom <= MAX_ZOOM:
+        raise ClusterError(f"zoom must be between 0 and {MAX_ZOOM}")
+    date_from = date_from or timezone.localdate()
+    bbox = snap_bbox(bbox, cell_degrees(zoom))
+
+    key = ":".join([
+        "bookings:clusters", str(zoom), ",".join(f"{edge:.6f}" for edge in bbox),
+        ",".join(sorted(statuses)), str(date_from), str(date_to or ""),
+    ])
+    return cached_single_flight(
+        key,
+        lambda: compute_clusters(bbox, zoom, statuses, date_from, date_to),
+        fresh_seconds=settings.BOOKING_MAP_CACHE_SECONDS,
+    )
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.bookings import archive
+
+
+class Command(BaseCommand):
+    help = "Move old completed/cancelled bookings to cold storage in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months", type=int, default=settings.BOOKING_ARCHIVE_AFTER_MONTHS,
+                            help="Archive bookings dated before the start of the month N months ago.")
+        parser.add_argument("--storage", choices=archive.ARCHIVE_STORAGES, default=settings.BOOKING_ARCHIVE_STORAGE)
+        parser.add_argument("--batch-size", type=int, default=settings.BOOKING_ARCHIVE_BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, default=settings.BOOKING_ARCHIVE_MAX_BATCHES)
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many bookings qualify.")
+
+    def handle(self, *args, **options):
+        stats = archive.archive_old_bookings(
+            months=options["months"],
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+            storage=options["storage"],
+            dry_run=options["dry_run"],
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(f"Bookings dated before {stats['cutoff']} eligible for archival: {stats['eligible']}")
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {stats['archived']} booking(s) dated before {stats['cutoff']} "
+            f"in {stats['batches']} batch(es) to {options['storage']} storage"
+            + ("" if stats["complete"] else " - more remain, run again")
+        ))
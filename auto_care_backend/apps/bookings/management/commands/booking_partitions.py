@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bookings import partitions
+
+
+class Command(BaseCommand):
+    help = "Show, create or convert to monthly range partitions of bookings_booking (PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="One-off conversion of the bookings table to monthly partitions on `date`.",
+        )
+        parser.add_argument("--months-ahead", type=int, default=settings.BOOKING_PARTITION_MONTHS_AHEAD)
+
+    def handle(self, *args, **options):
+        if options["convert"]:
+            try:
+                converted = partitions.convert_to_partitioned(months_ahead=options["months_ahead"])
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write("Converted bookings table to monthly partitions." if converted
+                              else "Bookings table is already partitioned.")
+
+        if not partitions.is_partitioned():
+            self.stdout.write("Bookings table is not partitioned.")
+            return
+
+        for name in partitions.ensure_future_partitions(months_ahead=options["months_ahead"]):
+            self.stdout.write(f"Created partition {name}")
+
+        existing = partitions.list_monthly_partitions()
+        self.stdout.write(f"Monthly partitions: {len(existing)}")
+        for month, name in sorted(existing.items()):
+            self.stdout.write(f"  {month:%Y-%m}  {name}")
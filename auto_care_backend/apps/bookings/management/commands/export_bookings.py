@@ -0,0 +1,58 @@
+from datetime import datetime
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bookings.export import EXPORT_FORMATS, build_export_queryset, iter_export_rows, stream_export
+from apps.bookings.models import Booking
+from apps.locations.models import ServiceArea
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}. Use YYYY-MM-DD")
+
+
+class Command(BaseCommand):
+    help = "Stream bookings (with user and address fields) to CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument("--output", "-o", help="File path (default: stdout).")
+        parser.add_argument("--date-from", type=_parse_date)
+        parser.add_argument("--date-to", type=_parse_date)
+        parser.add_argument("--status", choices=[value for value, _ in Booking.STATUS_CHOICES])
+        parser.add_argument("--service-area", type=int, help="ServiceArea id.")
+        parser.add_argument("--chunk-size", type=int, default=settings.BOOKING_EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        service_area = None
+        if options["service_area"]:
+            try:
+                service_area = ServiceArea.objects.get(pk=options["service_area"])
+            except ServiceArea.DoesNotExist:
+                raise CommandError(f"Service area {options['service_area']} not found")
+
+        queryset = build_export_queryset(
+            date_from=options["date_from"],
+            date_to=options["date_to"],
+            status=options["status"],
+            service_area=service_area,
+        )
+        rows = iter_export_rows(queryset, service_area=service_area, chunk_size=options["chunk_size"])
+
+        output = open(options["output"], "w", newline="") if options["output"] else sys.stdout
+        written = 0
+        try:
+            for line in stream_export(rows, options["format"]):
+                output.write(line)
+                written += 1
+        finally:
+            if options["output"]:
+                output.close()
+
+        if options["output"]:
+            self.stderr.write(f"Wrote {written} line(s) to {options['output']}")
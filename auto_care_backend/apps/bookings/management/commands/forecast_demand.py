@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.bookings.forecast import forecast_demand
+
+
+class Command(BaseCommand):
+    help = "Rebuild the demand forecast per service area, weekday and time slot."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--weeks", type=int, default=settings.BOOKING_FORECAST_HISTORY_WEEKS,
+                            help="Weeks of booking history to fit.")
+        parser.add_argument("--alpha", type=float, default=settings.BOOKING_FORECAST_ALPHA,
+                            help="Smoothing factor (0-1); higher follows recent weeks more closely.")
+
+    def handle(self, *args, **options):
+        stats = forecast_demand(weeks=options["weeks"], alpha=options["alpha"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {stats['rows']} forecast row(s) from {stats['bookings']} booking(s) "
+            f"between {stats['start']} and {stats['end']}"
+        ))
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_rename_bookings_bo_latitud_idx_bookings_bo_latitud_93164c_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['date', 'status'], name='bookings_bo_date_d1c66f_idx'),
+        ),
+    ]
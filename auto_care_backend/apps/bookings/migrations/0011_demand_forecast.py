@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_booking_service'),
+        ('locations', '0003_service_area_boundary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('time_slot', models.CharField(max_length=50)),
+                ('expected', models.FloatField()),
+                ('low', models.FloatField()),
+                ('high', models.FloatField()),
+                ('history_mean', models.FloatField()),
+                ('history_max', models.PositiveIntegerField()),
+                ('history_weeks', models.PositiveSmallIntegerField()),
+                ('generated_at', models.DateTimeField()),
+                ('service_area', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='demand_forecasts', to='locations.servicearea')),
+            ],
+            options={
+                'ordering': ['service_area_id', 'weekday', 'time_slot'],
+                'indexes': [models.Index(fields=['service_area', 'weekday'], name='bookings_de_service_923ee1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Slots offered before the TimeSlot table existed (one hour each)
+DEFAULT_SLOTS = (
+    "05:00 AM", "06:00 AM", "07:00 AM", "08:00 AM", "09:00 AM", "10:00 AM",
+    "11:00 AM", "12:00 PM", "01:00 PM", "02:00 PM", "03:00 PM", "04:00 PM",
+    "05:00 PM", "06:00 PM", "07:00 PM", "08:00 PM",
+)
+INPUT_FORMATS = ("%I:%M %p", "%I:%M%p", "%H:%M", "%H:%M:%S", "%I %p", "%I%p")
+
+
+def parse_slot(value):
+    """Start time of a free-text slot, or None if it cannot be read."""
+    text = (value or "").strip().upper()
+    for input_format in INPUT_FORMATS:
+        try:
+            return datetime.strptime(text, input_format)
+        except ValueError:
+            continue
+    return None
+
+
+def slot_row(TimeSlot, start, active):
+    return TimeSlot(
+        idx=start.hour * 60 + start.minute,
+        start=start.time(),
+        end=(start + timedelta(hours=1)).time(),
+        active=active,
+    )
+
+
+def seed_time_slots(apps, schema_editor):
+    TimeSlot = apps.get_model("bookings", "TimeSlot")
+    TimeSlot.objects.bulk_create(
+        [slot_row(TimeSlot, parse_slot(label), True) for label in DEFAULT_SLOTS],
+        ignore_conflicts=True,
+    )
+
+
+def backfill_booking_slots(apps, schema_editor):
+    """
+    Point every booking at the slot its free-text time_slot names. Times that
+    parse but were never offered get an inactive slot; anything unreadable
+    stops the migration so it can be fixed by hand first.
+    """
+    Booking = apps.get_model("bookings", "Booking")
+    TimeSlot = apps.get_model("bookings", "TimeSlot")
+
+    values = list(Booking.objects.order_by().values_list("time_slot", flat=True).distinct())
+    starts = {value: parse_slot(value) for value in values}
+    unreadable = sorted(repr(value) for value, start in starts.items() if start is None)
+    if unreadable:
+        raise RuntimeError(
+            f"Cannot map booking time slots {', '.join(unreadable)} to a time; "
+            f"correct those bookings and re-run the migration."
+        )
+
+    existing = set(TimeSlot.objects.values_list("idx", flat=True))
+    TimeSlot.objects.bulk_create([
+        slot_row(TimeSlot, start, False)
+        for start in {start for start in starts.values()}
+        if start.hour * 60 + start.minute not in existing
+    ])
+    for value, start in starts.items():
+        Booking.objects.filter(time_slot=value).update(slot_id=start.hour * 60 + start.minute)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_demand_forecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimeSlot',
+            fields=[
+                ('idx', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('start', models.TimeField(unique=True)),
+                ('end', models.TimeField()),
+                ('active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['idx'],
+            },
+        ),
+        migrations.RunPython(seed_time_slots, migrations.RunPython.noop),
+        # Forecasts are rebuilt nightly, so they are simply dropped here
+        migrations.RunPython(
+            lambda apps, schema_editor: apps.get_model("bookings", "DemandForecast").objects.all().delete(),
+            migrations.RunPython.noop,
+        ),
+        migrations.AlterModelOptions(
+            name='demandforecast',
+            options={'ordering': ['service_area_id', 'weekday', 'slot_id']},
+        ),
+        migrations.RemoveField(
+            model_name='demandforecast',
+            name='time_slot',
+        ),
+        migrations.AddField(
+            model_name='demandforecast',
+            name='slot',
+            field=models.ForeignKey(db_column='slot_idx', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bookings.timeslot'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='slot',
+            field=models.ForeignKey(db_column='slot_idx', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bookings', to='bookings.timeslot'),
+        ),
+        migrations.RunPython(backfill_booking_slots, migrations.RunPython.noop),
+    ]
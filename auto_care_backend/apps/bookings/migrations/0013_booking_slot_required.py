@@ -0,0 +1,27 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Kept apart from the 0012 backfill: PostgreSQL refuses to ALTER a table in
+# the transaction that just updated its rows under a deferred foreign key.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_time_slots'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='slot',
+            field=models.ForeignKey(db_column='slot_idx', on_delete=django.db.models.deletion.PROTECT, related_name='bookings', to='bookings.timeslot'),
+        ),
+        migrations.RemoveField(
+            model_name='booking',
+            name='time_slot',
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['date', 'slot'], name='bookings_bo_date_679122_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_booking_slot_required'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='status_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
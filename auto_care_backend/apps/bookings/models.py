@@ -1,7 +1,58 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from datetime import date as date_type
 
+class BookingQuerySet(models.QuerySet):
+    """
+    Date-bounded lookups. Keeping `date` in the WHERE clause lets PostgreSQL
+    prune partitions when bookings_booking is partitioned (see partitions.py).
+    """
+
+    def on_date(self, day):
+        return self.filter(date=day)
+
+    def between(self, date_from=None, date_to=None):
+        queryset = self
+        if date_from:
+            queryset = queryset.filter(date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(date__lte=date_to)
+        return queryset
+
+    def upcoming(self, today=None):
+        from django.utils import timezone
+        return self.filter(date__gte=today or timezone.localdate())
+
+
+class TimeSlot(models.Model):
+    """
+    A bookable time slot. `idx` is the start time in minutes since midnight
+    (see apps/bookings/slots.py); bookings store it in `slot_idx`.
+    """
+    idx = models.PositiveSmallIntegerField(primary_key=True)
+    start = models.TimeField(unique=True)
+    end = models.TimeField()
+    # Inactive slots are kept for existing bookings but no longer offered
+    active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['idx']
+
+    def __str__(self):
+        return self.label
+
+    @property
+    def label(self):
+        from .slots import slot_label
+        return slot_label(self.idx)
+
+    def save(self, *args, **kwargs):
+        from .slots import slot_idx
+        self.idx = slot_idx(self.start)
+        super().save(*args, **kwargs)
+
+
 class Booking(models.Model):
     VEHICLE_CHOICES = [
         ("car", "Car"),
@@ -19,8 +70,10 @@ class Booking(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     vehicle_type = models.CharField(max_length=10, choices=VEHICLE_CHOICES)
     date = models.DateField()
-    time_slot = models.CharField(max_length=50)
+    slot = models.ForeignKey(TimeSlot, on_delete=models.PROTECT, db_column='slot_idx', related_name='bookings')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    # Bumped on every status change, so each change has its own notification key
+    status_version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     notes = models.TextField(blank=True, null=True)
     
@@ -53,17 +106,49 @@ class Booking(models.Model):
         help_text="Reference to user's saved address (if used)"
     )
 
+    # Catalog service (optional: older clients only send vehicle_type)
+    service = models.ForeignKey(
+        'services.Service',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bookings'
+    )
+
+    objects = BookingQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'date']),
             models.Index(fields=['status', 'created_at']),
             models.Index(fields=['latitude', 'longitude']),  # 🆕 Location index
+            models.Index(fields=['date', 'status']),  # Date range + status: archive cutoff, forecast history, export
+            models.Index(fields=['date', 'slot']),  # Slot availability + duplicate checks
         ]
 
     def __str__(self):
         return f"{self.user} - {self.vehicle_type} on {self.date} at {self.time_slot}"
 
+    @property
+    def time_slot(self):
+        """Slot label ("09:00 AM"), formatted from slot_idx without a query."""
+        from .slots import slot_label
+        return slot_label(self.slot_id)
+
+    @time_slot.setter
+    def time_slot(self, value):
+        from .slots import slot_idx
+        self.slot_id = slot_idx(value)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Status and date as loaded, so post_save receivers can tell what changed
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_date = instance.__dict__.get('date')
+        return instance
+
     def can_cancel(self):
         """Check if booking can be cancelled"""
         from django.utils import timezone
@@ -90,31 +175,20 @@ class Booking(models.Model):
     # 🆕 NEW LOCATION-RELATED METHODS
     def is_in_service_area(self):
         """Check if booking location is within any active service area"""
-        from apps.locations.models import ServiceArea
+        from apps.locations.geometry import get_coverage_index
         
-        active_areas = ServiceArea.objects.filter(active=True)
-        return any(
-            area.contains(float(self.latitude), float(self.longitude)) 
-            for area in active_areas
-        )
+        if self.latitude is None or self.longitude is None:
+            return False
+        return get_coverage_index().is_covered(float(self.latitude), float(self.longitude))
     
     def distance_from_center(self):
         """Get distance from nearest service area center"""
-        from apps.locations.models import ServiceArea, haversine_distance
+        from apps.locations.geometry import get_coverage_index
         
-        active_areas = ServiceArea.objects.filter(active=True)
-        if not active_areas.exists():
+        if self.latitude is None or self.longitude is None:
             return None
-            
-        distances = []
-        for area in active_areas:
-            distance = haversine_distance(
-                float(area.center_lat), float(area.center_lng),
-                float(self.latitude), float(self.longitude)
-            )
-            distances.append(distance)
-            
-        return min(distances) if distances else None
+        nearest = get_coverage_index().nearest(float(self.latitude), float(self.longitude), limit=1)
+        return nearest[0][1] if nearest else None
     
     def get_location_summary(self):
         """Get a summary of the booking location"""
@@ -144,4 +218,158 @@ class Booking(models.Model):
                 f"{self.latitude}, {self.longitude}"
             )
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        previous = getattr(self, '_loaded_status', None)
+        if previous and previous != self.status:
+            self.status_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'status_version'}
+        
+        # post_save receivers (e.g. the notification outbox) write in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._loaded_status = self.status
+        self._loaded_date = self.date
+
+
+class BookingBulkJob(models.Model):
+    """
+    A large admin bulk status change, processed by Celery in chunks.
+    `processed` is the cursor into `booking_ids`, so a retried or restarted
+    task resumes where the last committed chunk ended.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    action = models.CharField(max_length=50)
+    from_status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    booking_ids = models.JSONField(default=list)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.action} ({self.processed}/{self.total})"
+
+    @property
+    def progress_percent(self):
+        if not self.total:
+            return 100
+        return int(self.processed * 100 / self.total)
+
+
+
+class ArchivedBooking(models.Model):
+    """
+    Index row for a completed/cancelled booking moved out of the live table
+    (see apps.bookings.archive). The full row lives in `payload` (table
+    storage) or in the compressed NDJSON `archive_file` (file storage).
+    `id` is the original Booking id.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    payload = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    archive_file = models.CharField(max_length=255, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['user', 'date']),
+        ]
+
+    def __str__(self):
+        return f"Archived booking {self.id} ({self.status} on {self.date})"
+
+
+class BookingArchiveRollup(models.Model):
+    """
+    Per-user totals for archived bookings so booking_statistics stays correct
+    after rows leave the live table.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="booking_archive_rollup",
+    )
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    # Distinct "lat,lng" strings of archived bookings
+    location_keys = models.JSONField(default=list)
+    # {address_id: {"label": str, "count": int}}
+    address_usage = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Archive rollup for {self.user_id}: {self.total} booking(s)"
+
+
+class DemandForecast(models.Model):
+    """
+    Expected bookings per day for one service area, weekday and time slot,
+    rebuilt nightly by `apps.bookings.forecast`. Capacity planning reads this
+    table instead of aggregating bookings_booking on the fly.
+    """
+    WEEKDAY_CHOICES = [
+        (0, "Monday"), (1, "Tuesday"), (2, "Wednesday"), (3, "Thursday"),
+        (4, "Friday"), (5, "Saturday"), (6, "Sunday"),
+    ]
+
+    # Null groups bookings outside every active service area
+    service_area = models.ForeignKey(
+        'locations.ServiceArea',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='demand_forecasts'
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    slot = models.ForeignKey(TimeSlot, on_delete=models.CASCADE, db_column='slot_idx', related_name='+')
+    expected = models.FloatField()
+    # 80% interval from the residuals of the fit
+    low = models.FloatField()
+    high = models.FloatField()
+    history_mean = models.FloatField()
+    history_max = models.PositiveIntegerField()
+    history_weeks = models.PositiveSmallIntegerField()
+    generated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['service_area_id', 'weekday', 'slot_id']
+        indexes = [
+            models.Index(fields=['service_area', 'weekday']),
+        ]
+
+    def __str__(self):
+        return f"{self.service_area_id or 'outside'} {self.get_weekday_display()} {self.time_slot}: {self.expected:.1f}"
+
+    @property
+    def time_slot(self):
+        from .slots import slot_label
+        return slot_label(self.slot_id)
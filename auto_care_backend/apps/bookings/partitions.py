@@ -0,0 +1,118 @@
+"""
+Optional monthly range partitioning of `bookings_booking` by `date`.
+
+Nearly every booking query is for recent or future dates (slot availability,
+upcoming bookings, duplicate checks). With partitions, those queries only
+touch one or two small partitions and their indexes. The conversion is a
+one-off (`manage.py booking_partitions --convert`). After that, the
+`ensure_booking_partitions` beat task keeps partitions created ahead of time.
+Bookings dated beyond that horizon land in the default partition and are
+moved into their month's partition when it is created.
+
+Constraints of a partitioned table: the primary key is (id, date), so other
+tables cannot declare a database FK to Booking (use a plain id column or
+`db_constraint=False`). Conversion refuses to run while such FKs exist.
+"""
+from datetime import date
+import logging
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from auto_care import partitioning
+from .models import Booking
+
+logger = logging.getLogger(__name__)
+
+BOOKING_TABLE = Booking._meta.db_table
+PARTITION_PREFIX = f"{BOOKING_TABLE}_p"
+_PARTITION_RE = re.compile(rf"^{PARTITION_PREFIX}(\d{{6}})$")
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def is_partitioned():
+    return partitioning.is_partitioned(BOOKING_TABLE)
+
+
+def list_monthly_partitions():
+    """Return {first_day_of_month: partition_name}."""
+    partitions = {}
+    for name in partitioning.list_partitions(BOOKING_TABLE):
+        match = _PARTITION_RE.match(name)
+        if match:
+            stamp = match.group(1)
+            partitions[date(int(stamp[:4]), int(stamp[4:]), 1)] = name
+    return partitions
+
+
+def ensure_monthly_partitions(first_month, last_month):
+    """Create any missing partitions for months first_month..last_month (inclusive)."""
+    existing = list_monthly_partitions()
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        if month not in existing:
+            name = f"{PARTITION_PREFIX}{month:%Y%m}"
+            partitioning.create_range_partition(BOOKING_TABLE, "date", name, month, add_months(month, 1))
+            created.append(name)
+        month = add_months(month, 1)
+
+    if created:
+        logger.info(f"Created booking partitions: {', '.join(created)}")
+    return created
+
+
+def ensure_future_partitions(months_ahead=None, today=None):
+    """Current month plus `months_ahead` months. No-op when not partitioned."""
+    if not is_partitioned():
+        return []
+    months_ahead = settings.BOOKING_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    this_month = month_start(today or timezone.localdate())
+    return ensure_monthly_partitions(this_month, add_months(this_month, months_ahead))
+
+
+def convert_to_partitioned(months_ahead=None):
+    """
+    One-off conversion of `bookings_booking` to monthly range partitions on
+    `date`. All rows are copied; runs in a single transaction under an
+    ACCESS EXCLUSIVE lock, so schedule it in a maintenance window.
+    """
+    if connection.vendor != "postgresql":
+        raise RuntimeError("Booking partitioning requires PostgreSQL.")
+    if is_partitioned():
+        return False
+
+    blockers = partitioning.referencing_constraints(BOOKING_TABLE)
+    if blockers:
+        names = ", ".join(f"{table}.{constraint}" for constraint, table in blockers)
+        raise RuntimeError(f"Foreign keys reference {BOOKING_TABLE}: {names}")
+
+    months_ahead = settings.BOOKING_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    legacy = f"{BOOKING_TABLE}_legacy"
+    this_month = month_start(timezone.localdate())
+
+    with transaction.atomic():
+        partitioning.recreate_as_partitioned(Booking, "date", legacy)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT MIN(date), MAX(date) FROM "{legacy}"')
+            first_day, last_day = cursor.fetchone()
+        first_month = month_start(first_day) if first_day else this_month
+        last_month = max(add_months(this_month, months_ahead), month_start(last_day) if last_day else this_month)
+        ensure_monthly_partitions(first_month, last_month)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'INSERT INTO "{BOOKING_TABLE}" SELECT * FROM "{legacy}"')
+            cursor.execute(f'DROP TABLE "{legacy}"')
+
+    logger.info(f"Converted {BOOKING_TABLE} to monthly range partitions")
+    return True
@@ -0,0 +1,39 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .availability import invalidate_availability
+from .models import Booking, TimeSlot
+from .slots import invalidate_slot_table, publish_slot_change
+
+# Sent whenever bookings move between statuses outside of Booking.save(),
+# e.g. admin bulk actions. It is sent inside the transaction that moved them,
+# so receivers can write related rows atomically; anything that must only
+# happen once the change is visible should use transaction.on_commit().
+# kwargs: booking_ids (list[int]), from_status (str), to_status (str)
+booking_status_changed = Signal()
+
+
+# -------------------
+# Receivers
+# -------------------
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def booking_saved(sender, instance, **kwargs):
+    """Drop cached slot availability for the booking's date (old and new, if moved) once committed."""
+    dates = {instance.date, getattr(instance, '_loaded_date', None)} - {None}
+    transaction.on_commit(lambda: invalidate_availability(*dates))
+
+
+@receiver(booking_status_changed)
+def bookings_bulk_changed(sender, booking_ids, **kwargs):
+    dates = list(Booking.objects.filter(id__in=booking_ids).values_list('date', flat=True).distinct())
+    transaction.on_commit(lambda: invalidate_availability(*dates))
+
+
+@receiver(post_save, sender=TimeSlot)
+@receiver(post_delete, sender=TimeSlot)
+def time_slot_changed(sender, **kwargs):
+    """Rebuild the slot table here and in other workers once committed."""
+    transaction.on_commit(invalidate_slot_table)
+    transaction.on_commit(publish_slot_change)
@@ -0,0 +1,123 @@
+"""
+Bookable time slots.
+
+Slots live in the `TimeSlot` table keyed by `idx`, the slot's start time in
+minutes since midnight (so idx order is time order, and "09:00 AM" is 540).
+Bookings reference a slot through the smallint `slot_idx` column, which
+keeps the (date, slot_idx) index compact and turns slot filters into
+integer comparisons.
+
+Clients still send and receive labels like "09:00 AM": `slot_idx()` parses
+a label (or a `time`) into its idx and `slot_label()` formats it back, both
+without touching the database. The active slot list is kept per process
+and rebuilt after TIME_SLOT_CACHE_SECONDS or when a TimeSlot changes: the
+saving process drops its table once the change commits, and bumps a
+generation counter in the shared cache that other processes compare against
+at most every TIME_SLOT_CHECK_SECONDS (see `apps.bookings.signals`).
+"""
+from datetime import datetime, time as time_type
+from threading import Lock
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "bookings:slots:generation"
+
+LABEL_FORMAT = "%I:%M %p"
+# Accepted spellings of a slot, tried in order
+INPUT_FORMATS = (LABEL_FORMAT, "%I:%M%p", "%H:%M", "%H:%M:%S", "%I %p", "%I%p")
+
+
+def slot_idx(value):
+    """Minutes since midnight for a slot label or `time`; ValueError if unparseable."""
+    if isinstance(value, time_type):
+        return value.hour * 60 + value.minute
+    text = str(value).strip().upper()
+    for input_format in INPUT_FORMATS:
+        try:
+            parsed = datetime.strptime(text, input_format)
+        except ValueError:
+            continue
+        return parsed.hour * 60 + parsed.minute
+    raise ValueError(f"Unrecognised time slot: {value!r}")
+
+
+def slot_start(idx):
+    return time_type(idx // 60, idx % 60)
+
+
+def slot_label(idx):
+    """Canonical label for a slot idx, e.g. 540 -> "09:00 AM"."""
+    if idx is None:
+        return None
+    return slot_start(idx).strftime(LABEL_FORMAT)
+
+
+class SlotTable:
+    """Immutable view of the active slots, in time order."""
+
+    def __init__(self, indexes, generation=None):
+        self.indexes = tuple(sorted(indexes))
+        self.generation = generation
+        self.labels = tuple(slot_label(idx) for idx in self.indexes)
+        self._active = frozenset(self.indexes)
+
+    def __contains__(self, idx):
+        return idx in self._active
+
+
+_table = None
+_table_built_at = 0.0
+_checked_at = 0.0
+_table_lock = Lock()
+
+
+def _shared_generation():
+    try:
+        return cache.get(GENERATION_KEY, 0)
+    except Exception as exc:
+        logger.warning(f"Slot table generation check failed, keeping local table: {exc}")
+        return _table.generation if _table is not None else 0
+
+
+def get_slot_table():
+    """Return the cached SlotTable of active time slots."""
+    global _table, _table_built_at, _checked_at
+    now = time.monotonic()
+    ttl = settings.TIME_SLOT_CACHE_SECONDS
+    if (
+        _table is not None
+        and now - _table_built_at < ttl
+        and now - _checked_at < settings.TIME_SLOT_CHECK_SECONDS
+    ):
+        return _table
+
+    generation = _shared_generation()
+    with _table_lock:
+        if _table is None or _table.generation != generation or now - _table_built_at >= ttl:
+            from .models import TimeSlot
+
+            _table = SlotTable(TimeSlot.objects.filter(active=True).values_list("idx", flat=True), generation)
+            _table_built_at = now
+        _checked_at = now
+    return _table
+
+
+def invalidate_slot_table():
+    """Drop this process's table; the next lookup rebuilds it."""
+    global _table
+    with _table_lock:
+        _table = None
+
+
+def publish_slot_change():
+    """Tell the other processes to rebuild their table (call after commit)."""
+    try:
+        if not cache.add(GENERATION_KEY, 1, None):
+            cache.incr(GENERATION_KEY)
+    except Exception as exc:
+        logger.warning(f"Could not publish time slot change, other workers keep their table: {exc}")
@@ -0,0 +1,57 @@
+from celery import shared_task
+import logging
+
+from auto_care.celery import app  # noqa: F401 - configures the app shared_task binds to
+from .models import BookingBulkJob
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, name="apps.bookings.tasks.run_booking_bulk_job", max_retries=5, default_retry_delay=30)
+def run_booking_bulk_job(self, job_id):
+    """Run (or resume) an admin bulk status change in chunks."""
+    from .bulk import run_bulk_job
+
+    try:
+        job = run_bulk_job(job_id)
+    except BookingBulkJob.DoesNotExist:
+        logger.error(f"Bulk job {job_id} not found")
+        return None
+    except Exception as exc:
+        logger.error(f"Bulk job {job_id} failed: {exc}")
+        if self.request.retries >= self.max_retries:
+            BookingBulkJob.objects.filter(pk=job_id).update(status="failed", error=str(exc))
+            raise
+        # The job cursor is committed per chunk, so a retry resumes from there
+        raise self.retry(exc=exc)
+
+    return {"job_id": job.pk, "processed": job.processed, "updated": job.updated}
+
+
+@shared_task(name="apps.bookings.tasks.ensure_booking_partitions")
+def ensure_booking_partitions():
+    """Periodic (beat) creation of upcoming monthly booking partitions."""
+    from .partitions import ensure_future_partitions
+
+    return ensure_future_partitions()
+
+
+@shared_task(name="apps.bookings.tasks.archive_old_bookings")
+def archive_old_bookings():
+    """Periodic (beat) archival of old completed/cancelled bookings."""
+    from .archive import archive_old_bookings as run_archival
+
+    stats = run_archival()
+    stats["cutoff"] = stats["cutoff"].isoformat()
+    return stats
+
+
+@shared_task(name="apps.bookings.tasks.forecast_booking_demand")
+def forecast_booking_demand():
+    """Periodic (beat) rebuild of the per area/weekday/slot demand forecast."""
+    from .forecast import forecast_demand
+
+    stats = forecast_demand()
+    stats["start"] = stats["start"].isoformat()
+    stats["end"] = stats["end"].isoformat()
+    return stats
@@ -1,3 +1,661 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+import csv
+import io
+import json
+import tempfile
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from apps.accounts.models import User
+from apps.bookings import archive, bulk, clustering, slots
+from apps.bookings.api.representations import render_bookings
+from apps.bookings.api.serializers import BookingSerializer
+from apps.bookings.api.views import booking_statistics
+from apps.bookings.forecast import expected_demand, forecast_demand
+from apps.bookings.clustering import ClusterError, booking_clusters, cell_degrees, parse_bbox, snap_bbox
+from apps.bookings.availability import compute_slot_availability, slot_availability
+from apps.bookings.models import (
+    ArchivedBooking, Booking, BookingArchiveRollup, BookingBulkJob, DemandForecast, TimeSlot,
+)
+from apps.bookings.signals import booking_status_changed
+from apps.bookings.slots import get_slot_table, invalidate_slot_table, publish_slot_change, slot_idx
+from apps.locations import geometry
+from apps.locations.models import Address, ServiceArea
+from auto_care import idempotency
+from auto_care.counts import CountResult
+from auto_care.querybudget import QueryBudgetExceeded, query_budget
+
+
+class BookingRepresentationParityTests(TestCase):
+    """The fast list representation must match BookingSerializer exactly."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(mobile_number="9876543210", name="Asha")
+        ServiceArea.objects.create(
+            name="Pune", center_lat=Decimal("18.520400"), center_lng=Decimal("73.856700"), radius_km=Decimal("30.00")
+        )
+        self.address = Address.objects.create(
+            user=self.user, label="Work", address_line="Hinjewadi Phase 1",
+            latitude=Decimal("18.591400"), longitude=Decimal("73.738900"),
+        )
+        tomorrow = date.today() + timedelta(days=1)
+        Booking.objects.create(
+            user=self.user, vehicle_type="car", date=tomorrow, time_slot="09:00 AM",
+            latitude=Decimal("18.520400"), longitude=Decimal("73.856700"),
+            service_address="FC Road", notes="Gate 2",
+        )
+        Booking.objects.create(
+            user=self.user, vehicle_type="bike", date=tomorrow, time_slot="10:00 AM",
+            latitude=Decimal("19.076000"), longitude=Decimal("72.877700"),
+            service_address="Andheri", address=self.address, status="confirmed",
+        )
+
+    def test_render_bookings_matches_serializer(self):
+        queryset = Booking.objects.filter(user=self.user).order_by("-created_at")
+
+        expected = BookingSerializer(queryset, many=True).data
+        actual = render_bookings(queryset)
+
+        self.assertEqual(len(actual), 2)
+        for fast, slow in zip(actual, expected):
+            self.assertEqual(list(fast.keys()), list(slow.keys()))
+            self.assertEqual(fast, dict(slow))
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class BookingQueryBudgetTests(TestCase):
+    """Booking endpoints stay within their query budgets as rows grow."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(mobile_number="9876543210", name="Asha")
+        self.address = Address.objects.create(
+            user=self.user, label="Work", address_line="Hinjewadi Phase 1",
+            latitude=Decimal("18.591400"), longitude=Decimal("73.738900"),
+        )
+        for day in range(1, 6):
+            Booking.objects.create(
+                user=self.user, vehicle_type="car", date=date.today() + timedelta(days=day), time_slot="09:00 AM",
+                latitude=Decimal("18.591400"), longitude=Decimal("73.738900"),
+                service_address="Hinjewadi", address=self.address,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_detail_and_create_within_budget(self):
+        self.assertEqual(self.client.get("/api/bookings/").data["count"], 5)
+        booking = Booking.objects.filter(user=self.user).first()
+        self.assertEqual(self.client.get(f"/api/bookings/{booking.pk}/").status_code, 200)
+
+        response = self.client.post("/api/bookings/", {
+            "vehicle_type": "bike", "date": str(date.today() + timedelta(days=1)), "time_slot": "10:00 AM",
+            "latitude": "18.591400", "longitude": "73.738900", "service_address": "Hinjewadi",
+            "address": self.address.pk,
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_statistics_counts_in_one_aggregate(self):
+        Booking.objects.filter(user=self.user).first().cancel()
+        request = APIRequestFactory().get("/api/bookings/statistics/")
+        force_authenticate(request, self.user)
+
+        stats = booking_statistics(request).data
+
+        self.assertEqual(stats["total_bookings"], 5)
+        self.assertEqual(stats["pending_bookings"], 4)
+        self.assertEqual(stats["cancelled_bookings"], 1)
+        self.assertEqual(stats["unique_locations"], 1)
+        self.assertEqual(stats["most_used_addresses"][0]["usage_count"], 5)
+
+    def test_archive_limit_is_clamped(self):
+        staff = User.objects.create_user(mobile_number="9000000001", name="Ops", is_staff=True)
+        self.client.force_authenticate(staff)
+
+        response = self.client.get("/api/bookings/archive/?limit=-5")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total"], 0)
+        self.assertFalse(response.data["total_is_estimate"])
+
+    def test_per_row_lookups_are_flagged(self):
+        @query_budget(10)
+        def labels():
+            return [booking.address.label for booking in Booking.objects.filter(user=self.user)]
+
+        with self.assertRaisesMessage(QueryBudgetExceeded, "likely N+1"):
+            labels()
+
+
+class BookingIdempotencyTests(TestCase):
+    """Idempotency-Key on booking creation: replay, conflicts and failures."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(mobile_number="9876543210", name="Asha")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.payload = {
+            "vehicle_type": "car", "date": str(date.today() + timedelta(days=1)), "time_slot": "09:00 AM",
+            "latitude": "18.591400", "longitude": "73.738900", "service_address": "Hinjewadi",
+        }
+
+    def post(self, payload, key="booking-1"):
+        return self.client.post("/api/bookings/", payload, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_first_response(self):
+        first = self.post(self.payload)
+        retry = self.post(self.payload)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.data["id"], first.data["id"])
+        self.assertEqual(Booking.objects.filter(user=self.user).count(), 1)
+
+    def test_key_reused_for_another_body_is_rejected(self):
+        self.post(self.payload)
+
+        response = self.post({**self.payload, "time_slot": "10:00 AM"})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Booking.objects.filter(user=self.user).count(), 1)
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_in_flight_duplicate_gets_409(self):
+        _, lock_key = idempotency._cache_keys(f"user:{self.user.pk}", "booking-1")
+        cache.add(lock_key, "fingerprint", 30)
+
+        response = self.post(self.payload)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_server_errors_are_not_stored(self):
+        with mock.patch.object(BookingSerializer, "save", side_effect=RuntimeError("database went away")):
+            failed = self.post(self.payload)
+        retry = self.post(self.payload)
+
+        self.assertEqual(failed.status_code, 500)
+        self.assertEqual(retry.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", retry)
+
+
+class DemandForecastTests(TestCase):
+    """The nightly forecast follows recent weeks per area, weekday and slot."""
+
+    def test_forecast_tracks_recent_demand(self):
+        user = User.objects.create_user(mobile_number="9876543210", name="Asha")
+        area = ServiceArea.objects.create(
+            name="Pune", center_lat=Decimal("18.520400"), center_lng=Decimal("73.856700"), radius_km=Decimal("30.00")
+        )
+        monday = date(2026, 10, 19)
+        bookings = []
+        for weeks_ago in range(1, 13):
+            for _ in range(5 if weeks_ago <= 4 else 3):
+                bookings.append(Booking(
+                    user=user, vehicle_type="car", date=monday - timedelta(weeks=weeks_ago), time_slot="09:00 AM",
+                    latitude=Decimal("18.520400"), longitude=Decimal("73.856700"), service_address="FC Road",
+                    status="completed",
+                ))
+        Booking.objects.bulk_create(bookings)
+
+        forecast_demand(weeks=12, today=monday)
+
+        forecast = DemandForecast.objects.get(service_area=area, weekday=0, slot_id=slot_idx("09:00 AM"))
+        self.assertEqual((forecast.history_max, forecast.history_weeks), (5, 12))
+        self.assertTrue(3 < forecast.expected < 5)
+        self.assertEqual(expected_demand(area.id, monday + timedelta(days=1))["09:00 AM"], 0)
+
+
+class TimeSlotTests(TestCase):
+    """Slots come from the TimeSlot table; bookings store the slot idx."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(mobile_number="9876543210", name="Asha")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.day = date.today() + timedelta(days=1)
+        self.addCleanup(invalidate_slot_table)
+
+    def test_labels_map_to_slot_idx(self):
+        booking = Booking.objects.create(
+            user=self.user, vehicle_type="car", date=self.day, time_slot="9:00 am",
+            latitude=Decimal("18.520400"), longitude=Decimal("73.856700"), service_address="FC Road",
+        )
+        booking.refresh_from_db()
+        self.assertEqual((booking.slot_id, booking.time_slot), (540, "09:00 AM"))
+
+        availability = compute_slot_availability(self.day)
+        self.assertEqual(availability["booked_slots"], ["09:00 AM"])
+        self.assertNotIn("09:00 AM", availability["available_slots"])
+        self.assertEqual(len(availability["available_slots"]), TimeSlot.objects.filter(active=True).count() - 1)
+
+    def test_moving_a_booking_frees_its_old_date(self):
+        cache.clear()
+        first_day, second_day = date.today() + timedelta(days=3), date.today() + timedelta(days=4)
+        booking = Booking.objects.create(
+            user=self.user, vehicle_type="car", date=first_day, time_slot="09:00 AM",
+            latitude=Decimal("18.520400"), longitude=Decimal("73.856700"), service_address="FC Road",
+        )
+        self.assertIn("09:00 AM", slot_availability(first_day)["booked_slots"])
+
+        booking = Booking.objects.get(pk=booking.pk)
+        booking.date = second_day
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+
+        self.assertNotIn("09:00 AM", slot_availability(first_day)["booked_slots"])
+        self.assertIn("09:00 AM", slot_availability(second_day)["booked_slots"])
+
+    def test_inactive_slots_are_not_bookable(self):
+        TimeSlot.objects.filter(idx=slot_idx("05:00 AM")).update(active=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            TimeSlot.objects.get(idx=slot_idx("06:00 AM")).save()
+
+        self.assertNotIn("05:00 AM", compute_slot_availability(self.day)["available_slots"])
+        response = self.client.post("/api/bookings/", {
+            "vehicle_type": "car", "date": str(self.day), "time_slot": "05:00 AM",
+            "latitude": "18.520400", "longitude": "73.856700", "service_address": "FC Road",
+        }, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("time_slot", response.data)
+
+    def test_committed_change_bumps_the_shared_generation(self):
+        before = cache.get(slots.GENERATION_KEY, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            TimeSlot.objects.get(idx=slot_idx("06:00 AM")).save()
+        self.assertEqual(cache.get(slots.GENERATION_KEY), before + 1)
+
+    @override_settings(TIME_SLOT_CHECK_SECONDS=0)
+    def test_other_processes_rebuild_on_a_new_generation(self):
+        nine = slot_idx("09:00 AM")
+        self.assertIn(nine, get_slot_table())
+
+        # Another worker deactivates the slot: no signal reaches this process
+        TimeSlot.objects.filter(idx=nine).update(active=False)
+        self.assertIn(nine, get_slot_table())
+
+        publish_slot_change()
+        self.assertNotIn(nine, get_slot_table())
+
+
+class BookingAdminCountTests(TestCase):
+    """The booking changelist marks a planner-estimated total with "~"."""
+
+    def setUp(self):
+        admin_user = User.objects.create_superuser(mobile_number="9000000002", password="pass", name="Admin")
+        self.client.force_login(admin_user)
+        Booking.objects.create(
+            user=admin_user, vehicle_type="car", date=date.today() + timedelta(days=1), time_slot="09:00 AM",
+            latitude=Decimal("18.520400"), longitude=Decimal("73.856700"), service_address="FC Road",
+        )
+
+    def test_estimated_total_is_marked(self):
+        with mock.patch("auto_care.counts.count_rows", return_value=CountResult(120000, "estimate")):
+            response = self.client.get("/admin/bookings/booking/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cl"].result_count, 120000)
+        self.assertContains(response, "~120000 bookings")
+
+    def test_exact_total_is_plain(self):
+        response = self.client.get("/admin/bookings/booking/")
+
+        self.assertContains(response, "1 booking")
+        self.assertNotContains(response, "~1 booking")
+
+
+class BookingBulkTransitionTests(TestCase):
+    """Admin bulk status changes: inline below the sync limit, chunked jobs above it."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(mobile_number="9000000003", password="pass", name="Admin")
+        self.client.force_login(self.admin)
+        self.ids = [
+            Booking.objects.create(
+                user=self.admin, vehicle_type="car", date=date.today() + timedelta(days=day), time_slot="09:00 AM",
+                latitude=Decimal("18.520400"), longitude=Decimal("73.856700"), service_address="FC Road",
+            ).pk
+            for day in range(1, 6)
+        ]
+        self.sent = []
+        receiver = lambda sender, booking_ids, **kwargs: self.sent.append(sorted(booking_ids))
+        booking_status_changed.connect(receiver, weak=False)
+        self.addCleanup(booking_status_changed.disconnect, receiver)
+
+    def mark_confirmed(self):
+        return self.client.post("/admin/bookings/booking/", {
+            "action": "mark_confirmed", "_selected_action": [str(pk) for pk in self.ids],
+        })
+
+    @override_settings(BOOKING_BULK_SYNC_LIMIT=5, BOOKING_BULK_CHUNK_SIZE=2)
+    def test_small_selection_is_applied_inline(self):
+        Booking.objects.filter(pk=self.ids[0]).update(status="cancelled")
+
+        with mock.patch("apps.bookings.tasks.run_booking_bulk_job.delay") as delay:
+            self.mark_confirmed()
+
+        delay.assert_not_called()
+        self.assertFalse(BookingBulkJob.objects.exists())
+        self.assertEqual(Booking.objects.filter(status="confirmed").count(), 4)
+        # One signal per chunk, for the bookings that actually moved
+        self.assertEqual(self.sent, [self.ids[1:3], self.ids[3:5]])
+        self.assertEqual(
+            dict(Booking.objects.values_list("id", "status_version")),
+            {pk: 0 if pk == self.ids[0] else 1 for pk in self.ids},
+        )
+
+    @override_settings(BOOKING_BULK_SYNC_LIMIT=4)
+    def test_large_selection_becomes_a_job_queued_on_commit(self):
+        with mock.patch("apps.bookings.tasks.run_booking_bulk_job.delay") as delay:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.mark_confirmed()
+            delay.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        job = BookingBulkJob.objects.get()
+        delay.assert_called_once_with(job.pk)
+        self.assertEqual((job.total, job.booking_ids, job.created_by), (5, self.ids, self.admin))
+        self.assertFalse(Booking.objects.filter(status="confirmed").exists())
+
+    def test_job_resumes_from_its_cursor_after_a_crash(self):
+        job = BookingBulkJob.objects.create(
+            action="mark_confirmed", from_status="pending", to_status="confirmed",
+            booking_ids=self.ids, total=len(self.ids),
+        )
+        real_chunk = bulk.transition_chunk
+        calls = []
+
+        def crash_on_second_chunk(*args):
+            calls.append(args[0])
+            if len(calls) == 2:
+                raise RuntimeError("worker lost")
+            return real_chunk(*args)
+
+        with mock.patch.object(bulk, "transition_chunk", side_effect=crash_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                bulk.run_bulk_job(job.pk, chunk_size=2)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.updated), ("running", 2, 2))
+
+        job = bulk.run_bulk_job(job.pk, chunk_size=2)
+
+        self.assertEqual((job.status, job.processed, job.updated), ("completed", 5, 5))
+        self.assertEqual(self.sent, [self.ids[0:2], self.ids[2:4], self.ids[4:5]])
+        self.assertEqual(set(Booking.objects.values_list("status", "status_version")), {("confirmed", 1)})
+
+
+class BookingExportTests(TestCase):
+    """Staff export: row shape in both formats, filters and service-area coverage."""
+
+    HEADER = [
+        "id", "user_id", "user_mobile", "user_name", "vehicle_type", "date", "time_slot", "status", "created_at",
+        "latitude", "longitude", "service_address", "address_id", "address_label", "notes",
+    ]
+
+    def setUp(self):
+        self.staff = User.objects.create_user(mobile_number="9000000004", name="Ops", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        self.day = date.today() + timedelta(days=3)
+        # The area outlives the test's rollback in this process's coverage index
+        self.addCleanup(geometry.invalidate_coverage_index)
+        # Vertices that are not exact binary floats, to exercise the bbox prefilter's rounding
+        self.area = ServiceArea.objects.create(name="Deccan", boundary={"type": "Polygon", "coordinates": [
+            [[73.1, 18.1], [73.3, 18.1], [73.3, 18.3], [73.1, 18.3], [73.1, 18.1]],
+        ]})
+
+    def book(self, lat, lng, day=None, **kwargs):
+        return Booking.objects.create(
+            user=self.staff, vehicle_type="car", date=day or self.day, time_slot="09:00 AM",
+            latitude=Decimal(lat), longitude=Decimal(lng), service_address="Pune", **kwargs,
+        )
+
+    def export(self, **params):
+        response = self.client.get("/api/bookings/export/", params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_and_ndjson_rows(self):
+        booking = self.book("18.200000", "73.200000", notes='Gate "B", 2nd floor')
+
+        rows = list(csv.reader(io.StringIO(self.export())))
+        self.assertEqual(rows[0], self.HEADER)
+        self.assertEqual(len(rows), 2)
+        row = dict(zip(self.HEADER, rows[1]))
+        self.assertEqual(
+            (row["id"], row["user_mobile"], row["time_slot"], row["latitude"], row["notes"]),
+            (str(booking.pk), "9000000004", "09:00 AM", "18.200000", 'Gate "B", 2nd floor'),
+        )
+
+        [line] = self.export(export_format="ndjson").splitlines()
+        document = json.loads(line)
+        self.assertEqual(list(document), self.HEADER)
+        self.assertEqual(
+            (document["id"], document["date"], document["time_slot"], document["status"]),
+            (booking.pk, str(self.day), "09:00 AM", "pending"),
+        )
+
+    def test_date_and_status_filters(self):
+        early = self.book("18.200000", "73.200000", day=self.day - timedelta(days=1))
+        self.book("18.200000", "73.200000")
+        late = self.book("18.200000", "73.200000", day=self.day + timedelta(days=1))
+        late.cancel()
+
+        def exported(**params):
+            return [json.loads(line)["id"] for line in self.export(export_format="ndjson", **params).splitlines()]
+
+        self.assertEqual(len(exported(date_from=str(self.day), date_to=str(self.day))), 1)
+        self.assertEqual(exported(date_to=str(self.day - timedelta(days=1))), [early.pk])
+        self.assertEqual(exported(status="cancelled"), [late.pk])
+        self.assertEqual(self.client.get("/api/bookings/export/", {"status": "lost"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/bookings/export/", {"date_from": "19-10-2026"}).status_code, 400)
+
+    def test_polygon_edges_survive_the_bbox_prefilter(self):
+        kept = [
+            self.book("18.100000", "73.200000"),  # bottom edge
+            self.book("18.300000", "73.300000"),  # corner
+            self.book("18.200000", "73.100000"),  # left edge
+            self.book("18.200000", "73.200000"),
+        ]
+        self.book("18.300001", "73.200000")
+        self.book("18.200000", "73.099999")
+
+        lines = self.export(export_format="ndjson", service_area=self.area.pk).splitlines()
+
+        self.assertEqual([json.loads(line)["id"] for line in lines], [booking.pk for booking in kept])
+
+
+class BookingArchiveTests(TestCase):
+    """Old final-state bookings move to the archive and stay in the user's statistics."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(mobile_number="9876543210", name="Asha")
+        self.address = Address.objects.create(
+            user=self.user, label="Work", address_line="Hinjewadi Phase 1",
+            latitude=Decimal("18.591400"), longitude=Decimal("73.738900"),
+        )
+        self.old = date.today() - timedelta(days=100)
+        self.completed = self.book(self.old, "completed", address=self.address)
+        self.cancelled = self.book(self.old, "cancelled", latitude=Decimal("18.520400"))
+        self.completed_again = self.book(self.old - timedelta(days=1), "completed", address=self.address)
+        self.pending_old = self.book(self.old, "pending", address=self.address)
+        self.recent = self.book(date.today() + timedelta(days=1), "completed", address=self.address)
+        self.archived_ids = sorted([self.completed.pk, self.cancelled.pk, self.completed_again.pk])
+
+    def book(self, day, status, latitude=Decimal("18.591400"), **kwargs):
+        return Booking.objects.create(
+            user=self.user, vehicle_type="car", date=day, time_slot="09:00 AM", status=status,
+            latitude=latitude, longitude=Decimal("73.738900"), service_address="Hinjewadi", **kwargs,
+        )
+
+    def assert_rehydrated(self):
+        bookings = archive.load_archived_bookings(ArchivedBooking.objects.order_by("id"))
+        self.assertEqual([booking["id"] for booking in bookings], self.archived_ids)
+        first = bookings[0]
+        self.assertEqual(
+            (first["status"], first["time_slot"], first["address_label"], first["user_id"]),
+            ("completed", "09:00 AM", "Work", self.user.pk),
+        )
+
+    def test_table_storage(self):
+        stats = archive.archive_old_bookings(months=1, batch_size=2, storage="table")
+
+        self.assertEqual((stats["archived"], stats["batches"], stats["complete"]), (3, 2, True))
+        self.assertEqual(
+            sorted(Booking.objects.values_list("id", flat=True)), [self.pending_old.pk, self.recent.pk]
+        )
+        self.assertFalse(ArchivedBooking.objects.filter(payload=None).exists())
+        self.assert_rehydrated()
+
+    def test_file_storage(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        self.addCleanup(archive.read_archive_file.cache_clear)
+
+        with override_settings(BOOKING_ARCHIVE_DIR=archive_dir.name):
+            archive.archive_old_bookings(months=1, storage="file")
+            self.assertEqual(set(ArchivedBooking.objects.values_list("payload", flat=True)), {None})
+            self.assertEqual(len(set(ArchivedBooking.objects.values_list("archive_file", flat=True))), 1)
+            self.assert_rehydrated()
+
+    def test_rollups_accumulate_and_are_not_counted_twice(self):
+        archive.archive_old_bookings(months=1)
+        # A second run (e.g. the command after the beat job) finds nothing left
+        self.assertEqual(archive.archive_old_bookings(months=1)["archived"], 0)
+
+        rollup = BookingArchiveRollup.objects.get(user=self.user)
+        self.assertEqual((rollup.total, rollup.completed, rollup.cancelled), (3, 2, 1))
+        self.assertEqual(len(rollup.location_keys), 2)
+        self.assertEqual(rollup.address_usage, {str(self.address.pk): {"label": "Work", "count": 2}})
+
+        self.book(self.old, "completed", latitude=Decimal("18.600000"), address=self.address)
+        archive.archive_old_bookings(months=1)
+
+        rollup.refresh_from_db()
+        self.assertEqual((rollup.total, rollup.completed, rollup.cancelled), (4, 3, 1))
+        self.assertEqual(len(rollup.location_keys), 3)
+        self.assertEqual(rollup.address_usage[str(self.address.pk)]["count"], 3)
+
+    def test_statistics_merge_live_and_archived(self):
+        request = APIRequestFactory().get("/api/bookings/statistics/")
+        force_authenticate(request, self.user)
+        before = booking_statistics(request).data
+
+        archive.archive_old_bookings(months=1)
+        request = APIRequestFactory().get("/api/bookings/statistics/")
+        force_authenticate(request, self.user)
+        after = booking_statistics(request).data
+
+        self.assertEqual(after, before)
+        self.assertEqual(
+            (after["total_bookings"], after["completed_bookings"], after["cancelled_bookings"]), (5, 3, 1)
+        )
+        self.assertEqual(after["unique_locations"], 2)
+        self.assertEqual(after["most_used_addresses"][0]["usage_count"], 4)
+
+
+@override_settings(BOOKING_MAP_CELL_PX=256)
+class BookingClusterGridTests(SimpleTestCase):
+    """Zoom to cell size, bbox parsing and snapping, and the cache key."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cell_halves_per_zoom_level(self):
+        # One 256 px cell is a whole map tile: 360 degrees at zoom 0
+        self.assertEqual(cell_degrees(0), 360)
+        self.assertEqual(cell_degrees(1), 180)
+        self.assertEqual(cell_degrees(10), 360 / 1024)
+        with self.settings(BOOKING_MAP_CELL_PX=64):
+            self.assertEqual(cell_degrees(10), 360 / 4096)
+
+    def test_bbox_validation(self):
+        self.assertEqual(parse_bbox("73.7,18.4,74,18.7"), (73.7, 18.4, 74.0, 18.7))
+        for value in (None, "", "73.7,18.4,74", "a,b,c,d"):
+            with self.assertRaisesMessage(ClusterError, "bbox must be"):
+                parse_bbox(value)
+        for value in ("74,18.4,73.7,18.7", "73.7,18.4,73.7,18.7", "-181,0,10,10", "0,-91,10,10"):
+            with self.assertRaisesMessage(ClusterError, "out of range or empty"):
+                parse_bbox(value)
+        with self.assertRaisesMessage(ClusterError, "zoom must be between 0 and 20"):
+            booking_clusters((73.7, 18.4, 74.0, 18.7), 21)
+
+    def test_snap_bbox_grows_to_cell_edges(self):
+        self.assertEqual(snap_bbox((73.7, 18.4, 74.1, 18.7), 0.5), (73.5, 18.0, 74.5, 19.0))
+        self.assertEqual(snap_bbox((-0.1, -0.1, 0.1, 0.1), 1), (-1, -1, 1, 1))
+
+    def test_bboxes_in_the_same_cells_share_a_cache_entry(self):
+        day = date(2030, 1, 1)
+        with mock.patch.object(clustering, "compute_clusters", return_value={"clusters": []}) as compute:
+            # Both snap to the same zoom-10 cells
+            booking_clusters((73.80, 18.50, 73.85, 18.55), 10, date_from=day)
+            booking_clusters((73.81, 18.51, 73.84, 18.54), 10, date_from=day)
+            self.assertEqual(compute.call_count, 1)
+
+            booking_clusters((73.80, 18.50, 73.85, 18.55), 11, date_from=day)
+            booking_clusters((73.80, 18.50, 73.85, 18.55), 10, statuses=("completed",), date_from=day)
+            booking_clusters((73.80, 18.50, 73.85, 18.55), 10, date_from=day, date_to=day)
+            self.assertEqual(compute.call_count, 4)
+
+        # Status order does not split the cache
+        day = date(2030, 1, 2)
+        with mock.patch.object(clustering, "compute_clusters", return_value={"clusters": []}) as compute:
+            booking_clusters((73.80, 18.50, 73.85, 18.55), 10, statuses=("confirmed", "pending"), date_from=day)
+            booking_clusters((73.80, 18.50, 73.85, 18.55), 10, statuses=("pending", "confirmed"), date_from=day)
+            self.assertEqual(compute.call_count, 1)
+
+
+@override_settings(BOOKING_MAP_CELL_PX=80, BOOKING_MAP_MAX_CLUSTERS=2)
+class BookingClusterTests(TestCase):
+    """Clusters and totals from the database, and the staff endpoint."""
+
+    url = "/api/bookings/map/clusters/"
+    bbox = "73.0,18.0,74.5,19.0"
+
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(mobile_number="9000000005", name="Ops", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        day = date.today() + timedelta(days=1)
+        # Three zoom-10 cells (~0.11 degrees wide): 3, 2 and 1 bookings
+        for lat, lng, count in (("18.520400", "73.856700", 3), ("18.591400", "73.738900", 2), ("18.900000", "74.200000", 1)):
+            for _ in range(count):
+                Booking.objects.create(
+                    user=self.staff, vehicle_type="car", date=day, time_slot="09:00 AM",
+                    latitude=Decimal(lat), longitude=Decimal(lng), service_address="Pune",
+                )
+        # Cancelled bookings are not on the map
+        Booking.objects.create(
+            user=self.staff, vehicle_type="car", date=day, time_slot="10:00 AM", status="cancelled",
+            latitude=Decimal("18.520400"), longitude=Decimal("73.856700"), service_address="Pune",
+        )
+
+    def test_total_counts_the_whole_bbox_when_truncated(self):
+        response = self.client.get(self.url, {"bbox": self.bbox, "zoom": 10})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([cluster[2] for cluster in response.data["clusters"]], [3, 2])
+        self.assertTrue(response.data["truncated"])
+        self.assertEqual(response.data["total"], 6)
+
+    @override_settings(BOOKING_MAP_MAX_CLUSTERS=3)
+    def test_full_page_is_not_truncated(self):
+        response = self.client.get(self.url, {"bbox": self.bbox, "zoom": 10})
+
+        self.assertFalse(response.data["truncated"])
+        self.assertEqual(response.data["total"], 6)
+        single = [cluster for cluster in response.data["clusters"] if cluster[2] == 1][0]
+        self.assertEqual(single[3], Booking.objects.get(latitude=Decimal("18.900000")).pk)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get(self.url, {"bbox": "1,2,3", "zoom": 10}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"bbox": self.bbox, "zoom": "x"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"bbox": self.bbox, "zoom": 25}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"bbox": self.bbox, "zoom": 10, "status": "lost"}).status_code, 400)
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    """Project-wide tooling: management commands and tests for the auto_care helpers."""
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.core'
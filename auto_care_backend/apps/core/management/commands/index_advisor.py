@@ -0,0 +1,223 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, migrations
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+
+from auto_care.indexadvisor import IndexAdvisor, candidate_index, load_corpus, model_for_table
+
+
+def _size(size_bytes):
+    for unit in ("B", "kB", "MB", "GB"):
+        if size_bytes < 1024 or unit == "GB":
+            return f"{size_bytes:.0f} {unit}" if unit == "B" else f"{size_bytes:.1f} {unit}"
+        size_bytes /= 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a captured query corpus with EXPLAIN (ANALYZE, BUFFERS) and report seq scans, "
+        "unused indexes and suggested indexes (PostgreSQL). WARNING: EXPLAIN ANALYZE executes "
+        "every statement, including captured INSERT/UPDATE/DELETE and SELECT ... FOR UPDATE. "
+        "Each runs in a rolled-back transaction, but it still takes row locks, fires triggers "
+        "and advances sequences while it runs. Do not run this against production; use a "
+        "restored copy or a staging database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("corpus", nargs="+", help="NDJSON corpus file(s), see QUERY_CORPUS_FILE.")
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--min-rows", type=int, default=1000,
+            help="Ignore seq scans on tables with fewer rows (small tables are cheaper to scan).",
+        )
+        parser.add_argument(
+            "--min-filtered", type=float, default=0.8,
+            help="Only suggest an index when a seq scan discards at least this share of the rows it reads.",
+        )
+        parser.add_argument("--top", type=int, default=20, help="Number of seq scans and suggestions to list.")
+        parser.add_argument(
+            "--no-hypothetical", action="store_true",
+            help="Skip hypopg cost estimates even if the extension is installed.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+        parser.add_argument(
+            "--emit-migration", metavar="APP_LABEL",
+            help="Write a migration adding the suggested (not already covered) indexes on this app's tables.",
+        )
+        parser.add_argument(
+            "--concurrently", action="store_true",
+            help="Use AddIndexConcurrently in the emitted migration (not for partitioned tables).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            statements = load_corpus(options["corpus"])
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Could not read corpus: {exc}")
+        if not statements:
+            raise CommandError("The corpus has no replayable statements.")
+
+        try:
+            advisor = IndexAdvisor(
+                connections[options["database"]],
+                min_rows=options["min_rows"],
+                min_filtered=options["min_filtered"],
+            )
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+        advisor.replay(statements)
+        advisor.finish(hypothetical=not options["no_hypothetical"])
+
+        candidates = advisor.candidates[:options["top"]]
+        if options["json"]:
+            self.stdout.write(json.dumps(self._report(advisor, candidates), indent=2))
+        else:
+            self._print_report(advisor, candidates, options["top"])
+
+        if options["emit_migration"]:
+            self._emit_migration(candidates, options["emit_migration"], options["concurrently"])
+
+    # -------------------
+    # Report
+    # -------------------
+    def _report(self, advisor, candidates):
+        return {
+            "statements": len(advisor.statements),
+            "executions": sum(statement.executions for statement in advisor.statements),
+            "failed": [
+                {"sql": statement.fingerprint, "error": statement.error}
+                for statement in advisor.statements if statement.error
+            ],
+            "seq_scans": [
+                {
+                    "table": scan.table,
+                    "filter": scan.filter,
+                    "time_ms": round(scan.time_ms, 3),
+                    "executions": scan.statement.executions,
+                    "rows_returned": scan.rows_returned,
+                    "rows_removed": scan.rows_removed,
+                    "buffers": scan.buffers,
+                    "sql": scan.statement.fingerprint,
+                }
+                for scan in sorted(advisor.seq_scans, key=lambda scan: -scan.time_ms * scan.statement.executions)
+            ],
+            "suggestions": [
+                {
+                    "index": candidate.describe(),
+                    "create_sql": candidate.create_sql(advisor.connection),
+                    "statements": len(candidate.statements),
+                    "executions": candidate.executions,
+                    "seq_scan_ms": round(candidate.seq_scan_ms, 3),
+                    "cost_before": candidate.cost_before,
+                    "cost_after": candidate.cost_after,
+                    "benefit_pct": round(candidate.benefit_pct, 1) if candidate.benefit_pct is not None else None,
+                    "covered_by": candidate.covered_by,
+                    "sites": sorted({site for statement in candidate.statements for site in statement.sites}),
+                }
+                for candidate in candidates
+            ],
+            "unused_indexes": [
+                {"index": index.name, "table": index.table, "size_bytes": index.size_bytes, "idx_scan": index.scans}
+                for index in advisor.unused_indexes
+            ],
+        }
+
+    def _print_report(self, advisor, candidates, top):
+        failed = [statement for statement in advisor.statements if statement.error]
+        executions = sum(statement.executions for statement in advisor.statements)
+        self.stdout.write(self.style.SUCCESS(
+            f"Replayed {len(advisor.statements) - len(failed)} of {len(advisor.statements)} distinct statements "
+            f"({executions} executions in the corpus)"
+        ))
+
+        scans = sorted(advisor.seq_scans, key=lambda scan: -scan.time_ms * scan.statement.executions)
+        self.stdout.write(f"\nSeq scans ({len(scans)}), by time over the corpus:")
+        self.stdout.write(f"  {'total ms':>10}  {'runs':>5}  {'filtered':>8}  {'rows read':>10}  table / filter")
+        for scan in scans[:top]:
+            self.stdout.write(
+                f"  {scan.time_ms * scan.statement.executions:>10.1f}  {scan.statement.executions:>5}  "
+                f"{scan.filtered_share * 100:>7.0f}%  {scan.rows_returned + scan.rows_removed:>10}  "
+                f"{scan.table}: {scan.filter or '-'}"
+            )
+
+        self.stdout.write("\nSuggested indexes:")
+        if not candidates:
+            self.stdout.write("  none")
+        for number, candidate in enumerate(candidates, 1):
+            self.stdout.write(f"  {number}. {candidate.describe()}")
+            self.stdout.write(
+                f"     serves {len(candidate.statements)} statement(s), {candidate.executions} execution(s); "
+                f"replaces {candidate.seq_scan_ms:.1f} ms of seq scans"
+            )
+            if candidate.covered_by:
+                self.stdout.write(self.style.WARNING(
+                    f"     already covered by {candidate.covered_by}: the planner chose a seq scan anyway "
+                    f"(stale statistics, or the filter is not selective enough)"
+                ))
+            elif candidate.benefit_pct is not None:
+                self.stdout.write(
+                    f"     estimated cost {candidate.cost_before:.0f} -> {candidate.cost_after:.0f} "
+                    f"({candidate.benefit_pct:.0f}% less, hypopg)"
+                )
+            for site in sorted({site for statement in candidate.statements for site in statement.sites})[:3]:
+                self.stdout.write(f"     from {site}")
+            self.stdout.write(f"     {candidate.create_sql(advisor.connection)};")
+
+        self.stdout.write("\nIndexes no replayed plan used (leads only, the corpus may not cover every path):")
+        self.stdout.write(f"  {'size':>10}  {'idx_scan':>9}  index (table)")
+        for index in advisor.unused_indexes:
+            self.stdout.write(f"  {_size(index.size_bytes):>10}  {index.scans:>9}  {index.name} ({index.table})")
+
+        if failed:
+            self.stdout.write(self.style.WARNING(f"\n{len(failed)} statement(s) could not be replayed:"))
+            for statement in failed:
+                self.stdout.write(f"  {statement.error}: {statement.fingerprint[:120]}")
+
+    # -------------------
+    # Migration
+    # -------------------
+    def _emit_migration(self, candidates, app_label, concurrently):
+        operations, meta_lines = [], []
+        for candidate in candidates:
+            model = model_for_table(candidate.table)
+            if candidate.covered_by or model is None or model._meta.app_label != app_label:
+                continue
+            index = candidate_index(candidate, model)
+            if index is None:
+                continue
+            if concurrently:
+                from django.contrib.postgres.operations import AddIndexConcurrently
+                operations.append(AddIndexConcurrently(model_name=model._meta.model_name, index=index))
+            else:
+                operations.append(migrations.AddIndex(model_name=model._meta.model_name, index=index))
+            meta_lines.append(f"{model.__name__}.Meta.indexes: {MigrationWriter.serialize(index)[0]}")
+
+        if not operations:
+            self.stdout.write(f"\nNo suggested indexes to emit for '{app_label}'.")
+            return
+
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        leaves = loader.graph.leaf_nodes(app_label)
+        number = max((MigrationAutodetector.parse_number(name) or 0 for _, name in leaves), default=0) + 1
+        migration = migrations.Migration(f"{number:04d}_index_advisor", app_label)
+        migration.dependencies = leaves
+        migration.operations = operations
+
+        writer = MigrationWriter(migration)
+        source = writer.as_string()
+        if concurrently:
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+            source = source.replace(
+                "class Migration(migrations.Migration):\n",
+                "class Migration(migrations.Migration):\n    atomic = False\n",
+                1,
+            )
+        with open(writer.path, "w") as handle:
+            handle.write(source)
+        self.stdout.write(self.style.SUCCESS(f"\nWrote {writer.path} ({len(operations)} index(es)) for review."))
+        self.stdout.write("Mirror them in the models so makemigrations stays clean:")
+        for line in meta_lines:
+            self.stdout.write(f"  {line}")
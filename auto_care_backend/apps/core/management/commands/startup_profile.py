@@ -0,0 +1,50 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auto_care.importtime import TARGETS, package_totals, run_importtime, top_modules
+
+
+class Command(BaseCommand):
+    help = "Report per-module import time for a cold worker start (python -X importtime)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target", choices=sorted(TARGETS), default="asgi",
+            help="What a fresh interpreter imports: setup, wsgi, asgi, urls (first request) or celery.",
+        )
+        parser.add_argument("--top", type=int, default=25, help="Number of modules to list.")
+        parser.add_argument(
+            "--sort", choices=["cumulative", "self"], default="cumulative",
+            help="Rank modules by cumulative (including children) or self time.",
+        )
+        parser.add_argument("--min-ms", type=float, default=0.0, help="Hide modules faster than this.")
+
+    def handle(self, *args, **options):
+        settings_module = os.environ.get("DJANGO_SETTINGS_MODULE", "auto_care.settings")
+        try:
+            records, wall_seconds = run_importtime(options["target"], settings_module)
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        total_self_ms = sum(record.self_us for record in records) / 1000
+        self.stdout.write(self.style.SUCCESS(
+            f"Target '{options['target']}': {wall_seconds * 1000:.0f} ms wall, "
+            f"{len(records)} modules, {total_self_ms:.0f} ms importing"
+        ))
+
+        key = "cumulative_us" if options["sort"] == "cumulative" else "self_us"
+        self.stdout.write(f"\nTop {options['top']} modules by {options['sort']} time:")
+        self.stdout.write(f"  {'cumulative ms':>13}  {'self ms':>8}  module")
+        for record in top_modules(records, options["top"], key):
+            if getattr(record, key) / 1000 < options["min_ms"]:
+                break
+            self.stdout.write(
+                f"  {record.cumulative_us / 1000:>13.1f}  {record.self_us / 1000:>8.1f}  {record.module}"
+            )
+
+        self.stdout.write(f"\nTop {options['top']} packages by self time:")
+        self.stdout.write(f"  {'self ms':>8}  {'share':>6}  {'modules':>7}  package")
+        for package, self_us, count in package_totals(records)[:options["top"]]:
+            share = self_us / 1000 / total_self_ms * 100 if total_self_ms else 0
+            self.stdout.write(f"  {self_us / 1000:>8.1f}  {share:>5.1f}%  {count:>7}  {package}")
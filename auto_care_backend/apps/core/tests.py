@@ -0,0 +1,433 @@
+from io import StringIO
+from threading import Barrier, Event, Lock, Thread
+from unittest import mock, skipUnless
+import os
+import tempfile
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.migrations.writer import MigrationWriter
+from django.db.models import Q
+from django.test import SimpleTestCase, override_settings
+from redis.crc import key_slot
+from rest_framework.test import APIRequestFactory
+
+from apps.bookings.models import Booking
+from apps.core.management.commands.index_advisor import Command as IndexAdvisorCommand
+from auto_care import singleflight
+from auto_care.indexadvisor import (
+    ColumnStats, CorpusStatement, IndexAdvisor, IndexCandidate, candidate_index, parse_filter,
+)
+from auto_care.testrunner import StrictQueryBudgetRunner
+from auto_care.throttling import SLIDING_WINDOW_LUA, InMemoryRateStore, OTPRequestThrottle, RedisRateStore
+
+
+# -------------------
+# Test runner (auto_care/testrunner.py)
+# -------------------
+class StrictQueryBudgetRunnerTests(SimpleTestCase):
+    """Query budgets raise under the test runner, whatever the environment default."""
+
+    def test_strict_mode_is_on(self):
+        self.assertTrue(settings.QUERY_BUDGET_STRICT)
+
+    def test_setting_is_restored_after_the_run(self):
+        runner = StrictQueryBudgetRunner()
+        with mock.patch("auto_care.testrunner.DiscoverRunner.setup_test_environment"), \
+                mock.patch("auto_care.testrunner.DiscoverRunner.teardown_test_environment"), \
+                self.settings(QUERY_BUDGET_STRICT=False):
+            runner.setup_test_environment()
+            self.assertTrue(settings.QUERY_BUDGET_STRICT)
+            runner.teardown_test_environment()
+            self.assertFalse(settings.QUERY_BUDGET_STRICT)
+
+
+# -------------------
+# Single-flight cache (auto_care/singleflight.py)
+# -------------------
+class CountingLoader:
+    """compute() stand-in that counts calls and can be held until released."""
+
+    def __init__(self, value="fresh", hold=False):
+        self.value = value
+        self.calls = 0
+        self.release = Event()
+        if not hold:
+            self.release.set()
+        self._lock = Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        self.release.wait(5)
+        return self.value
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class SingleFlightTests(SimpleTestCase):
+    """One computation per key across threads and processes, with stale-while-revalidate."""
+
+    def setUp(self):
+        self.key = f"test:{uuid.uuid4().hex}"
+        self.addCleanup(cache.delete, singleflight._lock_key(self.key))
+        self.addCleanup(singleflight.invalidate, self.key)
+
+    def store_stale(self, value):
+        cache.set(singleflight._cache_key(self.key), {"value": value, "fresh_until": time.time() - 1}, 60)
+
+    def another_process_holds_the_lock(self):
+        cache.add(singleflight._lock_key(self.key), 1, 30)
+
+    def test_concurrent_callers_share_one_computation(self):
+        loader = CountingLoader(hold=True)
+        barrier = Barrier(8)
+        results = []
+
+        def call():
+            barrier.wait()
+            results.append(singleflight.cached_single_flight(self.key, loader))
+
+        threads = [Thread(target=call) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        wait_for(lambda: loader.calls == 1)
+        time.sleep(0.05)
+        loader.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(results, ["fresh"] * 8)
+        # Cached afterwards: no further computation
+        self.assertEqual(singleflight.cached_single_flight(self.key, loader), "fresh")
+        self.assertEqual(loader.calls, 1)
+
+    def test_loser_of_the_cross_process_lock_waits_for_the_result(self):
+        loader = CountingLoader()
+        self.another_process_holds_the_lock()
+
+        def other_process_finishes():
+            time.sleep(0.1)
+            singleflight._store(self.key, "theirs", 60, 0)
+
+        Thread(target=other_process_finishes).start()
+
+        self.assertEqual(singleflight.cached_single_flight(self.key, loader), "theirs")
+        self.assertEqual(loader.calls, 0)
+
+    @override_settings(SINGLE_FLIGHT_WAIT_SECONDS=0.1)
+    def test_loser_computes_itself_when_the_lock_holder_never_answers(self):
+        loader = CountingLoader()
+        self.another_process_holds_the_lock()
+
+        self.assertEqual(singleflight.cached_single_flight(self.key, loader), "fresh")
+        self.assertEqual(loader.calls, 1)
+
+    def test_stale_value_is_served_while_one_refresh_replaces_it(self):
+        loader = CountingLoader(hold=True)
+        self.store_stale("old")
+
+        for _ in range(5):
+            self.assertEqual(singleflight.cached_single_flight(self.key, loader), "old")
+        wait_for(lambda: loader.calls == 1)
+        loader.release.set()
+
+        wait_for(lambda: cache.get(singleflight._cache_key(self.key))["value"] == "fresh")
+        self.assertEqual(singleflight.cached_single_flight(self.key, loader), "fresh")
+        self.assertEqual(loader.calls, 1)
+
+    def test_stale_value_is_served_while_another_process_refreshes(self):
+        loader = CountingLoader()
+        self.store_stale("old")
+        self.another_process_holds_the_lock()
+
+        self.assertEqual(singleflight.cached_single_flight(self.key, loader), "old")
+        # The background refresh waits on the other process instead of computing
+        singleflight._store(self.key, "theirs", 60, 0)
+        wait_for(lambda: self.key not in singleflight._inflight)
+
+        self.assertEqual(singleflight.cached_single_flight(self.key, loader), "theirs")
+        self.assertEqual(loader.calls, 0)
+
+
+# -------------------
+# Throttling (auto_care/throttling.py)
+# -------------------
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class InMemoryRateStoreTests(SimpleTestCase):
+    """Sliding window and token bucket limits, and idle-key eviction."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = InMemoryRateStore(clock=self.clock)
+
+    def test_sliding_window(self):
+        self.assertEqual(self.store.sliding_window("ip:1", 2, 60), (True, 0.0))
+        self.clock.now += 1
+        self.assertEqual(self.store.sliding_window("ip:1", 2, 60), (True, 0.0))
+        self.clock.now += 1
+        self.assertEqual(self.store.sliding_window("ip:1", 2, 60), (False, 58.0))
+        self.assertTrue(self.store.sliding_window("ip:2", 2, 60)[0])
+
+        # The first hit leaves the trailing window, the second has not
+        self.clock.now += 58.5
+        self.assertTrue(self.store.sliding_window("ip:1", 2, 60)[0])
+        self.assertFalse(self.store.sliding_window("ip:1", 2, 60)[0])
+
+    def test_token_bucket(self):
+        self.assertTrue(self.store.token_bucket("ip:1", 2, 60)[0])
+        self.assertTrue(self.store.token_bucket("ip:1", 2, 60)[0])
+        self.assertEqual(self.store.token_bucket("ip:1", 2, 60), (False, 30.0))
+
+        # One token refills every 30 seconds
+        self.clock.now += 30
+        self.assertTrue(self.store.token_bucket("ip:1", 2, 60)[0])
+        self.assertFalse(self.store.token_bucket("ip:1", 2, 60)[0])
+
+    def test_idle_keys_are_evicted(self):
+        for ident in range(100):
+            self.store.sliding_window(f"ip:{ident}", 5, 60)
+            self.store.token_bucket(f"ip:{ident}", 5, 60)
+        self.assertEqual(len(self.store), 200)
+
+        self.clock.now += InMemoryRateStore.PRUNE_INTERVAL + 60
+        self.store.sliding_window("ip:new", 5, 60)
+        self.assertEqual(len(self.store), 1)
+
+
+class ThrottleFailOpenTests(SimpleTestCase):
+    def test_store_outage_allows_requests(self):
+        request = APIRequestFactory().post("/api/accounts/send-otp/")
+        throttle = OTPRequestThrottle()
+
+        with mock.patch("auto_care.throttling.get_rate_store", side_effect=ConnectionError("redis down")):
+            self.assertTrue(throttle.allow_request(request, view=None))
+        self.assertIsNone(throttle.wait())
+
+    def test_denied_request_reports_retry_after(self):
+        request = APIRequestFactory().post("/api/accounts/send-otp/")
+        throttle = OTPRequestThrottle()
+        store = mock.Mock(token_bucket=mock.Mock(return_value=(False, 12.2)))
+
+        with mock.patch("auto_care.throttling.get_rate_store", return_value=store):
+            self.assertFalse(throttle.allow_request(request, view=None))
+        self.assertEqual(throttle.wait(), 13)
+
+
+def redis_available(url):
+    try:
+        import redis
+
+        return redis.Redis.from_url(url, socket_connect_timeout=0.5).ping()
+    except Exception:
+        return False
+
+
+class RedisRateStoreKeyTests(SimpleTestCase):
+    """Scripts declare every key they touch, all in one cluster slot (no server needed)."""
+
+    def test_sliding_window_passes_the_sequence_key(self):
+        store = RedisRateStore("redis://localhost:6379/0", "throttle:")
+        store._sliding_window = mock.Mock(return_value=[1, 0])
+
+        store.sliding_window("sliding_window:otp:ip:1", 5, 60)
+
+        keys = store._sliding_window.call_args.kwargs["keys"]
+        self.assertEqual(keys, ["{throttle:sliding_window:otp:ip:1}", "{throttle:sliding_window:otp:ip:1}:seq"])
+        self.assertEqual(key_slot(keys[0].encode()), key_slot(keys[1].encode()))
+        self.assertNotIn("':seq'", SLIDING_WINDOW_LUA)
+
+
+@skipUnless(redis_available(settings.THROTTLE_REDIS_URL), "Redis is not reachable at THROTTLE_REDIS_URL")
+class RedisRateStoreTests(SimpleTestCase):
+    """The Lua scripts, against a real Redis."""
+
+    def setUp(self):
+        self.store = RedisRateStore(settings.THROTTLE_REDIS_URL, f"throttle-test:{uuid.uuid4().hex}:")
+        self.addCleanup(self.store.clear)
+
+    def test_sliding_window(self):
+        self.assertTrue(self.store.sliding_window("ip:1", 2, 60)[0])
+        self.assertTrue(self.store.sliding_window("ip:1", 2, 60)[0])
+        allowed, retry_after = self.store.sliding_window("ip:1", 2, 60)
+        self.assertFalse(allowed)
+        self.assertTrue(59 <= retry_after <= 60)
+        self.assertTrue(self.store.sliding_window("ip:2", 2, 60)[0])
+
+    def test_token_bucket(self):
+        self.assertTrue(self.store.token_bucket("ip:1", 2, 60)[0])
+        self.assertTrue(self.store.token_bucket("ip:1", 2, 60)[0])
+        allowed, retry_after = self.store.token_bucket("ip:1", 2, 60)
+        self.assertFalse(allowed)
+        self.assertTrue(29 <= retry_after <= 30)
+
+
+# -------------------
+# Index advisor (synthetic EXPLAIN plans; no PostgreSQL needed)
+# -------------------
+class IndexAdvisorFilterTests(SimpleTestCase):
+    def conditions(self, expression):
+        return [(condition.column, condition.kind, condition.values) for condition in parse_filter(expression)]
+
+    def test_parse_filter(self):
+        self.assertEqual(
+            self.conditions("((user_id = $1) AND (date >= '2026-10-01'::date) AND ((status)::text = 'pending'::text))"),
+            [("user_id", "eq", None), ("date", "range", None), ("status", "eq", ("pending",))],
+        )
+        self.assertEqual(
+            self.conditions("((status)::text = ANY ('{pending,confirmed}'::text[]))"),
+            [("status", "eq", ("pending", "confirmed"))],
+        )
+        self.assertEqual(self.conditions("((notes)::text = 'x AND y'::text)"), [("notes", "eq", ("x AND y",))])
+        self.assertEqual(
+            self.conditions("((latitude IS NULL) AND (longitude IS NOT NULL))"), [("latitude", "eq", ())]
+        )
+        self.assertEqual(self.conditions("(created_at < now())"), [("created_at", "range", None)])
+
+    def test_unusable_conditions_are_skipped(self):
+        self.assertEqual(self.conditions("((notes = 'a'::text) OR (user_id = 3))"), [])
+        self.assertEqual(self.conditions("(bookings_booking.user_id = u.id)"), [])
+        self.assertEqual(self.conditions(None), [])
+
+
+class FixtureIndexAdvisor(IndexAdvisor):
+    """IndexAdvisor fed canned plans and statistics instead of a database."""
+
+    def __init__(self, plans, **kwargs):
+        super().__init__(mock.Mock(vendor="postgresql"), **kwargs)
+        self.plans = plans
+        self._parents = {"bookings_booking_2026_10": "bookings_booking"}
+        self._table_rows = {"bookings_booking": 200_000}
+        self._column_stats = {"bookings_booking": {
+            "status": ColumnStats(4, {"completed": 0.7, "cancelled": 0.1, "pending": 0.1, "confirmed": 0.1}),
+            "user_id": ColumnStats(20_000, {}),
+            "vehicle_type": ColumnStats(3, {"car": 0.6, "bike": 0.3, "suv": 0.1}),
+        }}
+
+    def explain(self, statement):
+        statement.plan = self.plans[statement.sql]
+        return statement.plan
+
+
+def seq_scan(relation, filter, returned=10, removed=99_990, time_ms=40.0):
+    return {
+        "Node Type": "Seq Scan", "Relation Name": relation, "Filter": filter,
+        "Actual Rows": returned, "Rows Removed by Filter": removed, "Actual Loops": 1, "Actual Total Time": time_ms,
+    }
+
+
+def replay(plans, **kwargs):
+    advisor = FixtureIndexAdvisor(plans, **kwargs)
+    statements = []
+    for sql in plans:
+        statement = CorpusStatement(sql, sql, [])
+        statement.executions = 3
+        statements.append(statement)
+    advisor.replay(statements)
+    return advisor
+
+
+class IndexAdvisorSuggestionTests(SimpleTestCase):
+    def test_equality_range_and_partial_predicate(self):
+        advisor = replay({"q1": {"Node Type": "Append", "Plans": [seq_scan(
+            "bookings_booking_2026_10",
+            "((user_id = $1) AND (date >= '2026-10-01'::date) AND ((status)::text = ANY ('{pending,confirmed}'::text[])))",
+        )]}})
+
+        [candidate] = advisor.candidates
+        # Reported under the partitioned parent; status covers 20% of rows, so it is a predicate
+        self.assertEqual(candidate.table, "bookings_booking")
+        self.assertEqual(candidate.columns, (("user_id", False), ("date", False)))
+        self.assertEqual(candidate.predicate, (("status", ("confirmed", "pending")),))
+        self.assertEqual(candidate.seq_scan_ms, 120.0)
+
+    def test_sort_keys_follow_the_equality_prefix(self):
+        advisor = replay({"q1": {
+            "Node Type": "Sort", "Sort Key": ["bookings_booking.date DESC", "bookings_booking.id"],
+            "Plans": [seq_scan("bookings_booking", "(user_id = 42)")],
+        }})
+
+        [candidate] = advisor.candidates
+        self.assertEqual(candidate.columns, (("user_id", False), ("date", True), ("id", False)))
+        self.assertEqual(candidate.predicate, ())
+
+    def test_common_values_stay_key_columns_and_duplicates_merge(self):
+        filter = "(((vehicle_type)::text = 'car'::text) AND (user_id = $1))"
+        advisor = replay({
+            "q1": {"Node Type": "Limit", "Plans": [seq_scan("bookings_booking", filter)]},
+            "q2": seq_scan("bookings_booking", filter),
+        })
+
+        [candidate] = advisor.candidates
+        # 'car' is 60% of the rows: too common for a partial index
+        self.assertEqual(candidate.columns, (("user_id", False), ("vehicle_type", False)))
+        self.assertEqual(len(candidate.statements), 2)
+
+    def test_selective_enough_scans_are_left_alone(self):
+        advisor = replay({
+            "few_removed": seq_scan("bookings_booking", "(user_id = 42)", returned=50_000, removed=50_000),
+            "small_table": seq_scan("bookings_booking", "(user_id = 42)"),
+        }, min_rows=500_000)
+
+        self.assertEqual(len(advisor.seq_scans), 2)
+        self.assertEqual(advisor.candidates, [])
+
+
+class IndexAdvisorMigrationTests(SimpleTestCase):
+    def setUp(self):
+        self.candidate = IndexCandidate(
+            "bookings_booking", [("user_id", False), ("date", True)], [("status", ("confirmed", "pending"))]
+        )
+
+    def test_candidate_index_uses_field_names(self):
+        index = candidate_index(self.candidate, Booking)
+
+        self.assertEqual(index.fields, ["user", "-date"])
+        self.assertEqual(index.condition, Q(status__in=["confirmed", "pending"]))
+        self.assertTrue(index.name.startswith("bookings_bo_user_id_"))
+        self.assertIsNone(candidate_index(IndexCandidate("bookings_booking", [("missing", False)], []), Booking))
+
+    def test_emit_migration(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        directory = temp_dir.name
+        command = IndexAdvisorCommand(stdout=StringIO())
+
+        with mock.patch.object(MigrationWriter, "basedir", new_callable=mock.PropertyMock, return_value=directory):
+            command._emit_migration([self.candidate], "bookings", concurrently=True)
+
+        [name] = os.listdir(directory)
+        self.assertRegex(name, r"^\d{4}_index_advisor\.py$")
+        with open(os.path.join(directory, name)) as handle:
+            source = handle.read()
+        compile(source, name, "exec")
+        self.assertIn("atomic = False", source)
+        self.assertIn("AddIndexConcurrently(", source)
+        self.assertIn("fields=['user', '-date']", source)
+        self.assertIn("condition=models.Q(('status__in', ['confirmed', 'pending']))", source)
+        self.assertIn("Booking.Meta.indexes", command.stdout.getvalue())
+
+    def test_covered_and_foreign_candidates_are_not_emitted(self):
+        self.candidate.covered_by = "bookings_booking_user_id_idx"
+        command = IndexAdvisorCommand(stdout=StringIO())
+
+        command._emit_migration([self.candidate], "bookings", concurrently=False)
+        command._emit_migration([IndexCandidate("bookings_booking", [("user_id", False)], [])], "payments", False)
+
+        self.assertEqual(command.stdout.getvalue().count("No suggested indexes to emit"), 2)
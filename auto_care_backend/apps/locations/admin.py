@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from auto_care.counts import EstimatedCountPaginator
 from .models import Address, ServiceArea
 
 @admin.register(Address)
@@ -11,15 +12,22 @@ class AddressAdmin(admin.ModelAdmin):
         'is_default', 'created_at'
     ]
     
+    # No per-user filter: RelatedOnlyFieldListFilter loads every distinct user.
+    # Filter by user through the search box instead.
     list_filter = [
         'is_default', 'created_at',
-        ('user', admin.RelatedOnlyFieldListFilter),
     ]
     
     search_fields = ['label', 'address_line', 'user__mobile_number', 'user__name']
     
     readonly_fields = ['created_at']
     
+    # Changelist performance: join users, no full-table COUNT(*)
+    list_select_related = ['user']
+    autocomplete_fields = ['user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
     fieldsets = (
         ('Address Information', {
             'fields': ('user', 'label', 'address_line', 'is_default')
@@ -54,7 +62,7 @@ class ServiceAreaAdmin(admin.ModelAdmin):
     """Basic service area admin"""
     
     list_display = [
-        'name', 'center_coordinates', 'radius_km', 'active'
+        'name', 'area_type', 'center_coordinates', 'radius_km', 'active'
     ]
     
     list_filter = ['active']
@@ -66,4 +74,8 @@ class ServiceAreaAdmin(admin.ModelAdmin):
             '{:.4f}, {:.4f} <a href="{}" target="_blank">🗺️</a>',
             obj.center_lat, obj.center_lng, google_maps_url
         )
-    center_coordinates.short_description = 'Center Location'
\ No newline at end of file
+    center_coordinates.short_description = 'Center Location'
+    
+    def area_type(self, obj):
+        return 'Polygon' if obj.boundary else 'Circle'
+    area_type.short_description = 'Type'
\ No newline at end of file
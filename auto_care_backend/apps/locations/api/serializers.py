@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from apps.locations.models import Address, ServiceArea
+from apps.locations.geometry import GeometryError, get_coverage_index, parse_geojson_polygons
 from django.conf import settings
 
 class AddressSerializer(serializers.ModelSerializer):
@@ -15,16 +16,21 @@ class AddressSerializer(serializers.ModelSerializer):
         if lat is None or lng is None:
             raise serializers.ValidationError({"detail": "latitude and longitude are required."})
         # Optionally: verify inside at least one active service area
-        from apps.locations.models import ServiceArea
-        active_areas = ServiceArea.objects.filter(active=True)
-        if active_areas.exists():
-            inside_any = any(area.contains(float(lat), float(lng)) for area in active_areas)
-            if not inside_any:
-                raise serializers.ValidationError({"detail": "Address is outside service area."})
+        coverage = get_coverage_index()
+        if coverage and not coverage.is_covered(lat, lng):
+            raise serializers.ValidationError({"detail": "Address is outside service area."})
         return data
 
 class ServiceAreaSerializer(serializers.ModelSerializer):
     class Meta:
         model = ServiceArea
-        fields = ['id', 'name', 'center_lat', 'center_lng', 'radius_km', 'active']
+        fields = ['id', 'name', 'center_lat', 'center_lng', 'radius_km', 'boundary', 'active']
         read_only_fields = ['id']
+
+    def validate_boundary(self, value):
+        if value:
+            try:
+                parse_geojson_polygons(value)
+            except GeometryError as e:
+                raise serializers.ValidationError(str(e))
+        return value
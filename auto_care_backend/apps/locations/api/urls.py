@@ -2,16 +2,22 @@ from django.urls import path
 from .views import (
     AddressListCreateView, 
     AddressRetrieveUpdateDeleteView,
+    SetDefaultAddressView,
     ServiceAreaListCreateView, 
-    ServiceAreaDetailView
+    ServiceAreaDetailView,
+    service_area_snapshot,
 )
 
 urlpatterns = [
     # Address endpoints
     path("addresses/", AddressListCreateView.as_view(), name="address-list-create"),
     path("addresses/<int:pk>/", AddressRetrieveUpdateDeleteView.as_view(), name="address-detail"),
+    path("addresses/<int:pk>/set-default/", SetDefaultAddressView.as_view(), name="set-default-address"),
     
     # Service area endpoints (admin only)
     path("service-areas/", ServiceAreaListCreateView.as_view(), name="service-area-list"),
     path("service-areas/<int:pk>/", ServiceAreaDetailView.as_view(), name="service-area-detail"),
+
+    # Public coverage snapshot for client-side pre-checks
+    path("service-areas/snapshot/", service_area_snapshot, name="service-area-snapshot"),
 ]
\ No newline at end of file
@@ -1,8 +1,19 @@
 from rest_framework import generics, permissions, status
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from apps.locations.models import Address, ServiceArea
+from auto_care.conditional import etag_matches
+from auto_care.idempotency import idempotent
+from auto_care.querybudget import query_budget
+from apps.locations.services import save_address, set_default_address
+from apps.locations.snapshot import get_coverage_snapshot
 from .serializers import AddressSerializer, ServiceAreaSerializer
+from django.conf import settings
+import logging
 
+logger = logging.getLogger(__name__)
+
+@query_budget(6)
 class AddressListCreateView(generics.ListCreateAPIView):
     serializer_class = AddressSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -10,13 +21,15 @@ class AddressListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         return Address.objects.filter(user=self.request.user).order_by("-is_default", "-created_at")
 
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        # If new address is set as default, unset previous defaults
-        is_default = serializer.validated_data.get('is_default', False)
-        if is_default:
-            Address.objects.filter(user=self.request.user, is_default=True).update(is_default=False)
-        serializer.save(user=self.request.user)
+        # Default switching is handled atomically by the address service
+        save_address(serializer, self.request.user, user=self.request.user)
 
+@query_budget(6)
 class AddressRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = AddressSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -26,18 +39,53 @@ class AddressRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         return Address.objects.filter(user=self.request.user)
 
     def perform_update(self, serializer):
-        is_default = serializer.validated_data.get('is_default', False)
-        if is_default:
-            Address.objects.filter(user=self.request.user, is_default=True).update(is_default=False)
-        serializer.save()
+        save_address(serializer, self.request.user)
+
+@query_budget(6)
+class SetDefaultAddressView(generics.GenericAPIView):
+    """Set an address as the user's default (shared by accounts and locations URLs)"""
+    serializer_class = AddressSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        address = set_default_address(request.user, pk)
+        if address is None:
+            return Response(
+                {"error": "Address not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        logger.info(f"Address {pk} set as default by user {request.user.mobile_number}")
+        return Response(self.get_serializer(address).data)
 
 # Admin endpoints for service areas
+@query_budget(3)
 class ServiceAreaListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAdminUser]
     serializer_class = ServiceAreaSerializer
     queryset = ServiceArea.objects.all()
 
+@query_budget(3)
 class ServiceAreaDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAdminUser]
     serializer_class = ServiceAreaSerializer
     queryset = ServiceArea.objects.all()
+
+# Public coverage snapshot for client-side pre-checks
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+@query_budget(1)
+def service_area_snapshot(request):
+    """Compact active service areas with ETag/304; `?polygons=false` sends circles only"""
+    snapshot = get_coverage_snapshot()
+    polygons = request.query_params.get('polygons', 'true').lower() not in ('0', 'false', 'no')
+    etag = snapshot.etag(polygons)
+    
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(snapshot.payload(polygons))
+    
+    response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={settings.SERVICE_AREA_SNAPSHOT_MAX_AGE}'
+    return response
@@ -0,0 +1,280 @@
+"""
+Point-in-service-area engine (pure Python, no GEOS).
+
+Active service areas are compiled once into `CompiledArea` objects holding a
+bounding box plus either a circle or GeoJSON polygons. Coverage checks reject
+on the bbox first and only then run haversine (circles) or ray casting
+(polygons). The compiled index is cached per process and rebuilt after
+`SERVICE_AREA_CACHE_SECONDS` or when a ServiceArea changes: the saving
+process drops its index at once, and a committed change bumps a generation
+counter in the shared cache that other processes compare against at most
+every SERVICE_AREA_CHECK_SECONDS (see `apps.locations.signals`).
+"""
+from threading import Lock
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "locations:coverage:generation"
+
+KM_PER_DEGREE_LAT = 111.32
+EARTH_RADIUS_KM = 6371.0
+# Cross-product tolerance (degrees squared) for "point lies on an edge"
+ON_EDGE_EPSILON = 1e-12
+
+
+# Utility: haversine distance in km
+def haversine_distance(lat1, lon1, lat2, lon2):
+    # convert to radians
+    rlat1, rlon1, rlat2, rlon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    dlat = rlat2 - rlat1
+    dlon = rlon2 - rlon1
+    a = math.sin(dlat/2)**2 + math.cos(rlat1) * math.cos(rlat2) * math.sin(dlon/2)**2
+    c = 2 * math.asin(math.sqrt(a))
+    return EARTH_RADIUS_KM * c
+
+
+class GeometryError(ValueError):
+    """Raised for GeoJSON that is not a usable (Multi)Polygon."""
+
+
+# -------------------
+# GeoJSON parsing
+# -------------------
+def _parse_ring(ring):
+    points = []
+    for position in ring:
+        if not isinstance(position, (list, tuple)) or len(position) < 2:
+            raise GeometryError("Each position must be [longitude, latitude].")
+        lng, lat = float(position[0]), float(position[1])
+        if not (-180 <= lng <= 180) or not (-90 <= lat <= 90):
+            raise GeometryError(f"Position out of range: {position}")
+        points.append((lng, lat))
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()  # GeoJSON rings repeat the first point
+    if len(points) < 3:
+        raise GeometryError("A polygon ring needs at least 3 distinct positions.")
+    for (lng1, _), (lng2, _) in zip(points, points[1:] + points[:1]):
+        if abs(lng2 - lng1) > 180:
+            raise GeometryError("Rings must not cross the antimeridian; split the area into a MultiPolygon at ±180.")
+    return tuple(points)
+
+
+def parse_geojson_polygons(geometry):
+    """
+    Return a tuple of polygons for a GeoJSON Polygon/MultiPolygon (or a
+    Feature wrapping one). Each polygon is (outer_ring, *hole_rings) and each
+    ring a tuple of (lng, lat) points.
+    """
+    if not isinstance(geometry, dict):
+        raise GeometryError("GeoJSON geometry must be an object.")
+    if geometry.get("type") == "Feature":
+        geometry = geometry.get("geometry") or {}
+
+    geometry_type = geometry.get("type")
+    coordinates = geometry.get("coordinates")
+    if geometry_type == "Polygon":
+        polygons = [coordinates]
+    elif geometry_type == "MultiPolygon":
+        polygons = coordinates
+    else:
+        raise GeometryError("Only Polygon and MultiPolygon geometries are supported.")
+
+    if not polygons:
+        raise GeometryError("Geometry has no coordinates.")
+    parsed = []
+    for rings in polygons:
+        if not rings:
+            raise GeometryError("Polygon has no rings.")
+        parsed.append(tuple(_parse_ring(ring) for ring in rings))
+    return tuple(parsed)
+
+
+def polygons_bbox(polygons):
+    """(min_lat, min_lng, max_lat, max_lng) of the outer rings."""
+    lngs = [lng for polygon in polygons for lng, _ in polygon[0]]
+    lats = [lat for polygon in polygons for _, lat in polygon[0]]
+    return min(lats), min(lngs), max(lats), max(lngs)
+
+
+def circle_bbox(center_lat, center_lng, radius_km):
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    lng_delta = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(center_lat)), 1e-6))
+    return center_lat - lat_delta, center_lng - lng_delta, center_lat + lat_delta, center_lng + lng_delta
+
+
+# -------------------
+# Point-in-polygon
+# -------------------
+def point_in_ring(lng, lat, ring):
+    """Even-odd ray casting; `ring` is a sequence of (lng, lat) points."""
+    inside = False
+    x1, y1 = ring[-1]
+    for x2, y2 in ring:
+        if (y1 > lat) != (y2 > lat):
+            x_cross = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+            if lng < x_cross:
+                inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+
+def point_on_ring(lng, lat, ring):
+    """True if the point lies on one of the ring's edges (or vertices)."""
+    x1, y1 = ring[-1]
+    for x2, y2 in ring:
+        if min(x1, x2) <= lng <= max(x1, x2) and min(y1, y2) <= lat <= max(y1, y2):
+            if abs((x2 - x1) * (lat - y1) - (y2 - y1) * (lng - x1)) <= ON_EDGE_EPSILON:
+                return True
+        x1, y1 = x2, y2
+    return False
+
+
+def point_in_polygons(lng, lat, polygons):
+    """Boundaries are covered: outer edges, and hole edges too."""
+    for outer, *holes in polygons:
+        if not (point_on_ring(lng, lat, outer) or point_in_ring(lng, lat, outer)):
+            continue
+        if not any(point_in_ring(lng, lat, hole) and not point_on_ring(lng, lat, hole) for hole in holes):
+            return True
+    return False
+
+
+# -------------------
+# Compiled areas
+# -------------------
+class CompiledArea:
+    """Immutable, query-free view of one ServiceArea for coverage checks."""
+
+    __slots__ = ("id", "name", "center_lat", "center_lng", "radius_km", "polygons", "bbox")
+
+    def __init__(self, id, name, center_lat, center_lng, radius_km, polygons=None):
+        self.id = id
+        self.name = name
+        self.center_lat = center_lat
+        self.center_lng = center_lng
+        self.radius_km = radius_km
+        self.polygons = polygons
+        if polygons:
+            self.bbox = polygons_bbox(polygons)
+        else:
+            self.bbox = circle_bbox(center_lat, center_lng, radius_km)
+
+    @classmethod
+    def from_service_area(cls, area):
+        polygons = parse_geojson_polygons(area.boundary) if area.boundary else None
+        return cls(
+            area.id, area.name,
+            float(area.center_lat), float(area.center_lng), float(area.radius_km),
+            polygons,
+        )
+
+    @property
+    def is_polygon(self):
+        return bool(self.polygons)
+
+    def contains(self, lat, lng):
+        min_lat, min_lng, max_lat, max_lng = self.bbox
+        if not min_lat <= lat <= max_lat:
+            return False
+        # A circle's bbox can extend past ±180; polygons never cross it
+        if not any(min_lng <= candidate <= max_lng for candidate in (lng, lng + 360, lng - 360)):
+            return False
+        if self.polygons:
+            return point_in_polygons(lng, lat, self.polygons)
+        return haversine_distance(self.center_lat, self.center_lng, lat, lng) <= self.radius_km
+
+    def distance_from_center(self, lat, lng):
+        return haversine_distance(self.center_lat, self.center_lng, lat, lng)
+
+
+class CoverageIndex:
+    """All active areas, compiled. Cheap to query, rebuilt on change."""
+
+    def __init__(self, areas, generation=None):
+        self.areas = tuple(areas)
+        self.generation = generation
+
+    def __bool__(self):
+        return bool(self.areas)
+
+    def covering(self, lat, lng):
+        lat, lng = float(lat), float(lng)
+        return [area for area in self.areas if area.contains(lat, lng)]
+
+    def is_covered(self, lat, lng):
+        lat, lng = float(lat), float(lng)
+        return any(area.contains(lat, lng) for area in self.areas)
+
+    def nearest(self, lat, lng, limit=None):
+        """[(area, distance_km)] sorted by distance from each area's center."""
+        lat, lng = float(lat), float(lng)
+        distances = sorted(
+            ((area, area.distance_from_center(lat, lng)) for area in self.areas),
+            key=lambda item: item[1],
+        )
+        return distances[:limit] if limit else distances
+
+
+_index = None
+_index_built_at = 0.0
+_checked_at = 0.0
+_index_lock = Lock()
+
+
+def _shared_generation():
+    try:
+        return cache.get(GENERATION_KEY, 0)
+    except Exception as exc:
+        logger.warning(f"Coverage generation check failed, keeping local index: {exc}")
+        return _index.generation if _index is not None else 0
+
+
+def get_coverage_index():
+    """Return the cached CoverageIndex for active service areas."""
+    global _index, _index_built_at, _checked_at
+    now = time.monotonic()
+    ttl = settings.SERVICE_AREA_CACHE_SECONDS
+    if (
+        _index is not None
+        and now - _index_built_at < ttl
+        and now - _checked_at < settings.SERVICE_AREA_CHECK_SECONDS
+    ):
+        return _index
+
+    generation = _shared_generation()
+    with _index_lock:
+        if _index is None or _index.generation != generation or now - _index_built_at >= ttl:
+            from apps.locations.models import ServiceArea
+
+            compiled = []
+            for area in ServiceArea.objects.filter(active=True).order_by("id"):
+                try:
+                    compiled.append(CompiledArea.from_service_area(area))
+                except GeometryError as exc:
+                    logger.error(f"Service area {area.id} skipped, unusable boundary: {exc}")
+            _index = CoverageIndex(compiled, generation)
+            _index_built_at = now
+        _checked_at = now
+    return _index
+
+
+def invalidate_coverage_index():
+    """Drop this process's index; the next lookup rebuilds it."""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def publish_coverage_change():
+    """Tell the other processes to rebuild their index (call after commit)."""
+    try:
+        if not cache.add(GENERATION_KEY, 1, None):
+            cache.incr(GENERATION_KEY)
+    except Exception as exc:
+        logger.warning(f"Could not publish service area change, other workers keep their index: {exc}")
@@ -0,0 +1,59 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.locations.geometry import GeometryError, parse_geojson_polygons
+from apps.locations.models import ServiceArea
+
+
+class Command(BaseCommand):
+    help = "Import polygon service areas from a GeoJSON Feature/FeatureCollection file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="GeoJSON file (Polygon/MultiPolygon features).")
+        parser.add_argument("--name-property", default="name", help="Feature property used as the area name.")
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Update existing areas with the same name instead of creating duplicates.",
+        )
+        parser.add_argument("--inactive", action="store_true", help="Import areas as inactive.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"]) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Could not read GeoJSON: {exc}")
+
+        if data.get("type") == "FeatureCollection":
+            features = data.get("features") or []
+        elif data.get("type") == "Feature":
+            features = [data]
+        else:
+            raise CommandError("Expected a GeoJSON Feature or FeatureCollection.")
+
+        created = updated = 0
+        with transaction.atomic():
+            for position, feature in enumerate(features, start=1):
+                geometry = feature.get("geometry")
+                name = (feature.get("properties") or {}).get(options["name_property"]) or f"Area {position}"
+                try:
+                    parse_geojson_polygons(geometry)
+                except GeometryError as exc:
+                    raise CommandError(f"Feature {position} ({name}): {exc}")
+
+                area = None
+                if options["replace"]:
+                    area = ServiceArea.objects.filter(name=name).first()
+                if area is None:
+                    area = ServiceArea(name=name)
+                    created += 1
+                else:
+                    updated += 1
+                area.boundary = geometry
+                area.active = not options["inactive"]
+                area.save()  # derives center/radius from the boundary
+
+        self.stdout.write(self.style.SUCCESS(f"Imported service areas: {created} created, {updated} updated"))
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+def dedupe_default_addresses(apps, schema_editor):
+    """Keep only the most recent default address per user."""
+    Address = apps.get_model("locations", "Address")
+    seen_users = set()
+    defaults = Address.objects.filter(is_default=True).order_by("user_id", "-created_at", "-id")
+    stale_ids = []
+    for address_id, user_id in defaults.values_list("id", "user_id"):
+        if user_id in seen_users:
+            stale_ids.append(address_id)
+        else:
+            seen_users.add(user_id)
+    if stale_ids:
+        Address.objects.filter(id__in=stale_ids).update(is_default=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("locations", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_default_addresses, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="address",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_default", True)),
+                fields=("user",),
+                name="unique_default_address_per_user",
+            ),
+        ),
+    ]
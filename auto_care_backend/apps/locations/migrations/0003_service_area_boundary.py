@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0002_address_unique_default_per_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicearea',
+            name='boundary',
+            field=models.JSONField(blank=True, help_text='Optional GeoJSON Polygon/MultiPolygon (lng, lat). Overrides the circle.', null=True),
+        ),
+    ]
@@ -1,28 +1,61 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from decimal import Decimal
 import math
+from apps.locations.geometry import (
+    CompiledArea, haversine_distance, parse_geojson_polygons, polygons_bbox,
+)
 
 USER_MODEL = settings.AUTH_USER_MODEL
 
 class ServiceArea(models.Model):
     """
-    Define a service area (center coordinates + radius in km).
+    Define a service area: either a circle (center coordinates + radius in km)
+    or a GeoJSON Polygon/MultiPolygon `boundary`.
     Admin can create one or more service areas. When creating address we
     will validate whether it falls inside any active ServiceArea.
+    For polygon areas the center/radius are derived from the boundary (the
+    enclosing circle), so distance messages and circle-only clients still work.
     """
     name = models.CharField(max_length=120)
     center_lat = models.DecimalField(max_digits=9, decimal_places=6)
     center_lng = models.DecimalField(max_digits=9, decimal_places=6)
     radius_km = models.DecimalField(max_digits=5, decimal_places=2, default=30.0)  # default 30 km
+    boundary = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Optional GeoJSON Polygon/MultiPolygon (lng, lat). Overrides the circle."
+    )
     active = models.BooleanField(default=True)
 
     def __str__(self):
+        if self.boundary:
+            return f"{self.name} (polygon)"
         return f"{self.name} ({self.radius_km} km)"
 
     def contains(self, lat: float, lng: float) -> bool:
         """Return True if (lat,lng) in this service area"""
-        return haversine_distance(float(self.center_lat), float(self.center_lng), float(lat), float(lng)) <= float(self.radius_km)
+        return CompiledArea.from_service_area(self).contains(float(lat), float(lng))
+
+    def save(self, *args, **kwargs):
+        if self.boundary:
+            self.set_enclosing_circle()
+        super().save(*args, **kwargs)
+
+    def set_enclosing_circle(self):
+        """Derive center/radius from the boundary's bbox (raises GeometryError)."""
+        polygons = parse_geojson_polygons(self.boundary)
+        min_lat, min_lng, max_lat, max_lng = polygons_bbox(polygons)
+        center_lat = (min_lat + max_lat) / 2
+        center_lng = (min_lng + max_lng) / 2
+        radius = max(
+            haversine_distance(center_lat, center_lng, lat, lng)
+            for polygon in polygons for lng, lat in polygon[0]
+        )
+        self.center_lat = round(Decimal(center_lat), 6)
+        self.center_lng = round(Decimal(center_lng), 6)
+        self.radius_km = min(Decimal(math.ceil(radius * 100)) / 100, Decimal("999.99"))
 
 
 class Address(models.Model):
@@ -39,18 +72,14 @@ class Address(models.Model):
 
     class Meta:
         ordering = ("-is_default", "-created_at")
+        constraints = [
+            # At most one default address per user (see apps.locations.services)
+            models.UniqueConstraint(
+                fields=["user"],
+                condition=models.Q(is_default=True),
+                name="unique_default_address_per_user",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.label} - {self.address_line[:40]}"
-
-
-# Utility: haversine distance in km
-def haversine_distance(lat1, lon1, lat2, lon2):
-    # convert to radians
-    rlat1, rlon1, rlat2, rlon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    dlat = rlat2 - rlat1
-    dlon = rlon2 - rlon1
-    a = math.sin(dlat/2)**2 + math.cos(rlat1) * math.cos(rlat2) * math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    R = 6371.0  # Earth radius in km
-    return R * c
@@ -0,0 +1,70 @@
+"""
+Address service.
+
+The single place for address writes that touch the per-user default flag.
+Both `/api/accounts/addresses/` and `/api/locations/addresses/` go through
+here. The `unique_default_address_per_user` partial unique index guarantees
+at most one default per user, and the switch is done with conditional
+UPDATEs in one transaction instead of read-modify-save.
+"""
+from django.db import IntegrityError, transaction
+import logging
+
+from apps.locations.models import Address
+
+logger = logging.getLogger(__name__)
+
+# A concurrent switch for the same user can win the unique index race;
+# retrying re-reads the committed default and clears it.
+DEFAULT_SWITCH_ATTEMPTS = 3
+
+
+def _clear_other_defaults(user, keep_pk=None):
+    """Unset the current default (only rows that actually are default)."""
+    current_defaults = Address.objects.filter(user=user, is_default=True)
+    if keep_pk is not None:
+        current_defaults = current_defaults.exclude(pk=keep_pk)
+    return current_defaults.update(is_default=False)
+
+
+def set_default_address(user, address_pk):
+    """
+    Make `address_pk` the user's only default address.
+    Returns the updated Address, or None if it doesn't belong to the user.
+    """
+    for attempt in range(1, DEFAULT_SWITCH_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                _clear_other_defaults(user, keep_pk=address_pk)
+                updated = Address.objects.filter(pk=address_pk, user=user).update(is_default=True)
+                if not updated:
+                    # Unknown address - keep the existing default untouched
+                    transaction.set_rollback(True)
+                    return None
+        except IntegrityError:
+            if attempt == DEFAULT_SWITCH_ATTEMPTS:
+                raise
+            logger.warning(f"Default address switch raced for user {user.id}, retrying ({attempt})")
+            continue
+
+        return Address.objects.get(pk=address_pk)
+
+
+def save_address(serializer, owner, **save_kwargs):
+    """
+    Save an AddressSerializer (create or update). When the address is marked
+    default, the previous default is cleared in the same transaction.
+    """
+    is_default = serializer.validated_data.get('is_default', False)
+    keep_pk = serializer.instance.pk if serializer.instance else None
+
+    for attempt in range(1, DEFAULT_SWITCH_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                if is_default:
+                    _clear_other_defaults(owner, keep_pk=keep_pk)
+                return serializer.save(**save_kwargs)
+        except IntegrityError:
+            if not is_default or attempt == DEFAULT_SWITCH_ATTEMPTS:
+                raise
+            logger.warning(f"Default address save raced for user {owner.id}, retrying ({attempt})")
@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.locations.geometry import invalidate_coverage_index, publish_coverage_change
+from apps.locations.models import ServiceArea
+
+
+@receiver(post_save, sender=ServiceArea)
+@receiver(post_delete, sender=ServiceArea)
+def service_area_changed(sender, **kwargs):
+    """Rebuild the coverage index here now, and in other workers once committed."""
+    invalidate_coverage_index()
+    transaction.on_commit(publish_coverage_change)
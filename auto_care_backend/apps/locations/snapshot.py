@@ -0,0 +1,160 @@
+"""
+Compact, versioned snapshot of active service areas for client-side
+coverage pre-checks.
+
+The map picker checks coverage on every pin move; with this snapshot it can
+do that locally and only call the authoritative server check on submit.
+Built from the compiled coverage index (`apps.locations.geometry`), so it
+costs no extra query and is rebuilt whenever the index is.
+
+Each area carries its circle `[lat, lng, radius_km]` and bbox. Polygon areas
+also carry their rings simplified (Douglas-Peucker, within
+SERVICE_AREA_SNAPSHOT_TOLERANCE_M) and encoded as Google polylines
+(precision 5, lat/lng order). Simplification can move an edge by up to
+the tolerance, which is fine for a pre-check but is why submit re-checks.
+
+The version is a hash of the content, so every process serves the same
+ETag for the same areas.
+"""
+from threading import Lock
+import hashlib
+import json
+import math
+
+from django.conf import settings
+
+from apps.locations.geometry import KM_PER_DEGREE_LAT, get_coverage_index
+
+POLYLINE_PRECISION = 5
+
+
+# -------------------
+# Simplification and encoding
+# -------------------
+def _segment_distance(point, start, end, lng_scale):
+    """Distance in degrees of latitude from `point` to segment start-end."""
+    px, py = point[0] * lng_scale, point[1]
+    ax, ay = start[0] * lng_scale, start[1]
+    bx, by = end[0] * lng_scale, end[1]
+    dx, dy = bx - ax, by - ay
+    if dx == 0 and dy == 0:
+        return math.hypot(px - ax, py - ay)
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def simplify_ring(ring, tolerance_km):
+    """
+    Douglas-Peucker on a closed ring of (lng, lat) points. Returns the
+    original ring if simplifying would leave fewer than 3 points.
+    """
+    if len(ring) <= 3 or tolerance_km <= 0:
+        return ring
+    tolerance = tolerance_km / KM_PER_DEGREE_LAT
+    mid_lat = sum(lat for _, lat in ring) / len(ring)
+    lng_scale = math.cos(math.radians(mid_lat))
+
+    points = list(ring) + [ring[0]]
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        farthest, max_distance = None, tolerance
+        for index in range(first + 1, last):
+            distance = _segment_distance(points[index], points[first], points[last], lng_scale)
+            if distance > max_distance:
+                farthest, max_distance = index, distance
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+
+    simplified = tuple(point for point, kept in zip(points[:-1], keep[:-1]) if kept)
+    return simplified if len(simplified) >= 3 else ring
+
+
+def _encode_value(value):
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def encode_polyline(ring):
+    """Google encoded polyline for a ring of (lng, lat) points."""
+    factor = 10 ** POLYLINE_PRECISION
+    encoded = []
+    previous_lat = previous_lng = 0
+    for lng, lat in ring:
+        lat_e5, lng_e5 = round(lat * factor), round(lng * factor)
+        encoded.append(_encode_value(lat_e5 - previous_lat))
+        encoded.append(_encode_value(lng_e5 - previous_lng))
+        previous_lat, previous_lng = lat_e5, lng_e5
+    return "".join(encoded)
+
+
+# -------------------
+# Snapshot
+# -------------------
+def _rounded(values):
+    return [round(value, POLYLINE_PRECISION) for value in values]
+
+
+class CoverageSnapshot:
+    """Immutable, JSON-ready snapshot of the active service areas."""
+
+    def __init__(self, areas, tolerance_km):
+        self.areas = []
+        for area in areas:
+            entry = {
+                "id": area.id,
+                "name": area.name,
+                "circle": _rounded([area.center_lat, area.center_lng]) + [round(area.radius_km, 2)],
+                "bbox": _rounded(area.bbox),
+            }
+            if area.is_polygon:
+                entry["polygons"] = [
+                    [encode_polyline(simplify_ring(ring, tolerance_km)) for ring in polygon]
+                    for polygon in area.polygons
+                ]
+            self.areas.append(entry)
+        self.version = hashlib.sha256(
+            json.dumps(self.areas, sort_keys=True, separators=(",", ":")).encode()
+        ).hexdigest()[:16]
+
+    def payload(self, polygons=True):
+        """Response body; without polygons every area falls back to its (enclosing) circle."""
+        areas = self.areas if polygons else [
+            {key: value for key, value in area.items() if key != "polygons"} for area in self.areas
+        ]
+        return {
+            "version": self.version,
+            "polyline_precision": POLYLINE_PRECISION,
+            "areas": areas,
+        }
+
+    def etag(self, polygons=True):
+        return f'"{self.version}"' if polygons else f'"{self.version}-circles"'
+
+
+_snapshot = None
+_snapshot_index = None
+_snapshot_lock = Lock()
+
+
+def get_coverage_snapshot():
+    """Return the snapshot for the current coverage index, building it once per index."""
+    global _snapshot, _snapshot_index
+    index = get_coverage_index()
+    if _snapshot is not None and _snapshot_index is index:
+        return _snapshot
+
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot_index is not index:
+            _snapshot = CoverageSnapshot(index.areas, settings.SERVICE_AREA_SNAPSHOT_TOLERANCE_M / 1000)
+            _snapshot_index = index
+    return _snapshot
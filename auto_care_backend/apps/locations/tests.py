@@ -0,0 +1,201 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.bookings.models import Booking
+from apps.locations import geometry
+from apps.locations.geometry import CompiledArea, GeometryError, parse_geojson_polygons
+from apps.locations.models import Address, ServiceArea
+from apps.locations.snapshot import encode_polyline, simplify_ring
+
+
+class AddressDefaultTests(TestCase):
+    """Creating a default address clears the previous one on both URL trees."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(mobile_number="9876543210", name="Asha")
+        ServiceArea.objects.create(
+            name="Pune", center_lat=Decimal("18.520400"), center_lng=Decimal("73.856700"), radius_km=Decimal("30.00")
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_new_default_replaces_previous(self):
+        previous = Address.objects.create(
+            user=self.user, label="Home", address_line="FC Road",
+            latitude=Decimal("18.520400"), longitude=Decimal("73.856700"), is_default=True,
+        )
+
+        for url in ("/api/accounts/addresses/", "/api/locations/addresses/"):
+            response = self.client.post(url, {
+                "label": "Work", "address_line": "Hinjewadi Phase 1",
+                "latitude": "18.591400", "longitude": "73.738900", "is_default": True,
+            }, format="json")
+            self.assertEqual(response.status_code, 201, url)
+
+            previous.refresh_from_db()
+            self.assertFalse(previous.is_default)
+            defaults = Address.objects.filter(user=self.user, is_default=True)
+            self.assertEqual(list(defaults.values_list("id", flat=True)), [response.data["id"]])
+            previous = defaults.get()
+
+
+def square(min_lng, min_lat, max_lng, max_lat):
+    return [[min_lng, min_lat], [max_lng, min_lat], [max_lng, max_lat], [min_lng, max_lat], [min_lng, min_lat]]
+
+
+def polygon_area(*rings):
+    polygons = parse_geojson_polygons({"type": "Polygon", "coordinates": list(rings)})
+    return CompiledArea(1, "test", 0.0, 0.0, 0.0, polygons)
+
+
+class CoverageGeometryTests(SimpleTestCase):
+    """Point-in-area checks on boundaries, holes and the antimeridian."""
+
+    def test_edges_and_vertices_are_covered(self):
+        area = polygon_area(square(73.0, 18.0, 74.0, 19.0))
+
+        for lat, lng in ((18.5, 73.0), (18.5, 74.0), (18.0, 73.5), (19.0, 73.5), (19.0, 74.0), (18.5, 73.5)):
+            self.assertTrue(area.contains(lat, lng), (lat, lng))
+        for lat, lng in ((18.5, 74.000001), (19.000001, 73.5), (17.5, 73.5)):
+            self.assertFalse(area.contains(lat, lng), (lat, lng))
+
+    def test_holes_are_excluded_but_their_edges_are_not(self):
+        area = polygon_area(square(73.0, 18.0, 74.0, 19.0), square(73.4, 18.4, 73.6, 18.6))
+
+        self.assertFalse(area.contains(18.5, 73.5))
+        self.assertTrue(area.contains(18.5, 73.4))
+        self.assertTrue(area.contains(18.2, 73.2))
+
+    def test_antimeridian_needs_split_polygons(self):
+        with self.assertRaises(GeometryError):
+            parse_geojson_polygons({"type": "Polygon", "coordinates": [
+                [[179.0, -17.0], [-179.0, -17.0], [-179.0, -16.0], [179.0, -16.0], [179.0, -17.0]],
+            ]})
+
+        polygons = parse_geojson_polygons({"type": "MultiPolygon", "coordinates": [
+            [square(179.0, -17.0, 180.0, -16.0)],
+            [square(-180.0, -17.0, -179.0, -16.0)],
+        ]})
+        area = CompiledArea(1, "Fiji", -16.5, 180.0, 0.0, polygons)
+
+        for lng in (180.0, -180.0, 179.5, -179.5):
+            self.assertTrue(area.contains(-16.5, lng), lng)
+        self.assertFalse(area.contains(-16.5, 0.0))
+
+    def test_circle_bbox_wraps_the_antimeridian(self):
+        area = CompiledArea(1, "Taveuni", -16.8, 179.95, 20.0)
+
+        self.assertTrue(area.contains(-16.8, -179.95))
+        self.assertFalse(area.contains(-16.8, -179.0))
+
+
+@override_settings(SERVICE_AREA_CHECK_SECONDS=0)
+class CoverageIndexTests(TestCase):
+    """Service area changes reach every process's coverage index."""
+
+    def setUp(self):
+        geometry.invalidate_coverage_index()
+        self.area = ServiceArea.objects.create(
+            name="Pune", center_lat=Decimal("18.520400"), center_lng=Decimal("73.856700"), radius_km=Decimal("30.00")
+        )
+
+    def test_committed_change_bumps_the_shared_generation(self):
+        before = cache.get(geometry.GENERATION_KEY, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.area.save()
+        self.assertEqual(cache.get(geometry.GENERATION_KEY), before + 1)
+
+    def test_other_processes_rebuild_on_a_new_generation(self):
+        self.assertTrue(geometry.get_coverage_index().is_covered(18.52, 73.85))
+
+        # Another worker deactivates the area: no signal reaches this process
+        ServiceArea.objects.filter(pk=self.area.pk).update(active=False)
+        self.assertTrue(geometry.get_coverage_index().is_covered(18.52, 73.85))
+
+        geometry.publish_coverage_change()
+        self.assertFalse(geometry.get_coverage_index().is_covered(18.52, 73.85))
+
+    def test_bookings_without_coordinates_are_not_covered(self):
+        user = User.objects.create_user(mobile_number="9876543210", name="Asha")
+        booking = Booking(
+            user=user, vehicle_type="car", date=date.today() + timedelta(days=1), service_address="FC Road",
+        )
+
+        self.assertFalse(booking.is_in_service_area())
+        self.assertIsNone(booking.distance_from_center())
+        self.assertFalse(booking.get_location_summary()["in_service_area"])
+
+
+class SnapshotEncodingTests(SimpleTestCase):
+    """Ring simplification and Google polyline encoding for the coverage snapshot."""
+
+    def test_encode_polyline_matches_the_reference_vector(self):
+        # Google's documented example, given here as (lng, lat) points
+        ring = [(-120.2, 38.5), (-120.95, 40.7), (-126.453, 43.252)]
+        self.assertEqual(encode_polyline(ring), "_p~iF~ps|U_ulLnnqC_mqNvxq`@")
+
+    def test_simplify_drops_points_within_tolerance(self):
+        # ~1 km square with a collinear midpoint and a ~10 m bump on the south edge
+        ring = ((73.85, 18.52), (73.855, 18.5201), (73.86, 18.52), (73.865, 18.52), (73.865, 18.53), (73.85, 18.53))
+        self.assertEqual(simplify_ring(ring, 0.05), ((73.85, 18.52), (73.865, 18.52), (73.865, 18.53), (73.85, 18.53)))
+
+        # A bump larger than the tolerance is kept
+        self.assertIn((73.855, 18.5201), simplify_ring(ring, 0.005))
+
+    def test_simplify_leaves_small_rings_alone(self):
+        triangle = ((0.0, 0.0), (1.0, 0.0), (0.0, 1.0))
+        self.assertEqual(simplify_ring(triangle, 1000), triangle)
+        # Collapsing a sliver below 3 points returns the original ring
+        sliver = ((0.0, 0.0), (1.0, 0.0), (2.0, 0.00001), (1.0, 0.00002))
+        self.assertEqual(simplify_ring(sliver, 10), sliver)
+        self.assertEqual(simplify_ring(sliver, 0), sliver)
+
+
+@override_settings(SERVICE_AREA_CHECK_SECONDS=0)
+class ServiceAreaSnapshotViewTests(TestCase):
+    """GET /api/locations/service-areas/snapshot/ with ETag revalidation."""
+
+    url = "/api/locations/service-areas/snapshot/"
+
+    def setUp(self):
+        geometry.invalidate_coverage_index()
+        self.addCleanup(geometry.invalidate_coverage_index)
+        ServiceArea.objects.create(
+            name="Hinjewadi", center_lat=Decimal("18.590000"), center_lng=Decimal("73.740000"),
+            radius_km=Decimal("5.00"), boundary={"type": "Polygon", "coordinates": [square(73.70, 18.55, 73.78, 18.62)]},
+        )
+        self.client = APIClient()
+
+    def test_polygon_areas_carry_encoded_rings(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], f'"{response.data["version"]}"')
+        area = response.data["areas"][0]
+        self.assertEqual(area["bbox"], [18.55, 73.7, 18.62, 73.78])
+        self.assertEqual(area["polygons"], [[encode_polyline(square(73.70, 18.55, 73.78, 18.62)[:-1])]])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, 304, header)
+            self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_circles_only_variant_has_its_own_etag(self):
+        full = self.client.get(self.url)
+        circles = self.client.get(self.url, {"polygons": "false"})
+
+        self.assertEqual(circles["ETag"], f'"{full.data["version"]}-circles"')
+        self.assertNotIn("polygons", circles.data["areas"][0])
+        self.assertEqual(self.client.get(self.url, {"polygons": "false"}, HTTP_IF_NONE_MATCH=full["ETag"]).status_code, 200)
+        self.assertEqual(
+            self.client.get(self.url, {"polygons": "false"}, HTTP_IF_NONE_MATCH=circles["ETag"]).status_code, 304
+        )
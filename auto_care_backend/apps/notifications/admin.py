@@ -1,3 +1,33 @@
 from django.contrib import admin
+from django.utils import timezone
+from auto_care.counts import EstimatedCountPaginator
+from .models import OutboxMessage
 
-# Register your models here.
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """Read-only view of the notification outbox"""
+    
+    list_display = [
+        'id', 'event_type', 'aggregate_type', 'aggregate_id', 'status', 'attempts', 'created_at', 'sent_at'
+    ]
+    list_filter = ['status', 'event_type']
+    search_fields = ['dedupe_key', 'aggregate_id']
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = [
+        'event_type', 'aggregate_type', 'aggregate_id', 'user_id', 'payload', 'dedupe_key',
+        'status', 'delivered_channels', 'attempts', 'last_error', 'available_at', 'created_at', 'sent_at',
+    ]
+    actions = ['retry_now']
+    
+    @admin.action(description='Retry selected messages now')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', available_at=timezone.now())
+        self.message_user(request, f'{updated} message(s) queued for delivery.')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,70 @@
+"""
+Notification delivery channels.
+
+A channel is any class with a `name` and `send(message)`; it may define
+`handles(message)` to opt out of some events. Channels are configured by
+dotted path in NOTIFICATION_CHANNELS. `send()` should raise on failure so
+the relay retries, and pass `message.idempotency_key` to providers that
+support it, since a crash between delivery and commit can redeliver.
+"""
+from threading import Lock
+import logging
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BaseChannel:
+    name = None
+
+    def handles(self, message):
+        return True
+
+    def send(self, message):
+        raise NotImplementedError
+
+
+class LogChannel(BaseChannel):
+    """Writes notifications to the log (development default)."""
+    name = "log"
+
+    def send(self, message):
+        logger.info(
+            f"[notification] {message.event_type} {message.aggregate_type}={message.aggregate_id} "
+            f"user={message.user_id} key={message.idempotency_key} payload={message.payload}"
+        )
+
+
+class FakeChannel(BaseChannel):
+    """Records deliveries in memory so tests can assert on them."""
+    name = "fake"
+    sent = []
+    _lock = Lock()
+
+    def send(self, message):
+        with self._lock:
+            self.sent.append({
+                "id": message.pk,
+                "event_type": message.event_type,
+                "aggregate_id": message.aggregate_id,
+                "user_id": message.user_id,
+                "payload": message.payload,
+                "idempotency_key": message.idempotency_key,
+            })
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls.sent.clear()
+
+
+def get_channels():
+    channels = []
+    for path in settings.NOTIFICATION_CHANNELS:
+        channel = import_string(path)()
+        if not channel.name:
+            raise ValueError(f"Notification channel {path} has no name")
+        channels.append(channel)
+    return channels
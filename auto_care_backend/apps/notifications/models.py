@@ -1,3 +1,51 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 
-# Create your models here.
+
+class OutboxMessage(models.Model):
+    """
+    A notification event written in the same transaction as the change that
+    caused it (transactional outbox). The relay (apps.notifications.relay)
+    delivers it to every configured channel after commit.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        # Claimed by a relay worker; available_at is when its lease runs out
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    event_type = models.CharField(max_length=50)
+    # Plain ids rather than FKs: bookings may be archived or partitioned
+    aggregate_type = models.CharField(max_length=50)
+    aggregate_id = models.BigIntegerField()
+    user_id = models.BigIntegerField(null=True, blank=True)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    # Same event enqueued twice (e.g. a retried request) collapses into one row
+    dedupe_key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    # Channels that already accepted this message; never delivered to twice
+    delivered_channels = models.JSONField(default=list, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'available_at', 'id']),
+            models.Index(fields=['aggregate_type', 'aggregate_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} for {self.aggregate_type} {self.aggregate_id} ({self.status})"
+
+    @property
+    def idempotency_key(self):
+        """Stable key channels can pass to providers to drop duplicate sends."""
+        return self.dedupe_key or f"outbox:{self.pk}"
@@ -0,0 +1,64 @@
+"""
+Transactional outbox writes.
+
+`enqueue()` must be called inside the transaction that makes the change the
+notification is about, so the message exists if and only if the change
+committed. Delivery happens later in `apps.notifications.relay`; a relay run
+is requested on commit to keep end-to-end latency low, and the beat schedule
+picks up anything that was missed.
+"""
+import logging
+
+from django.db import IntegrityError, transaction
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def _request_relay():
+    from .tasks import relay_outbox
+
+    try:
+        relay_outbox.delay()
+    except Exception as exc:
+        # The periodic relay still drains the outbox
+        logger.warning(f"Could not queue outbox relay: {exc}")
+
+
+def _schedule_relay():
+    transaction.on_commit(_request_relay)
+
+
+def build_message(event_type, aggregate_type, aggregate_id, payload=None, user_id=None, dedupe_key=None):
+    return OutboxMessage(
+        event_type=event_type,
+        aggregate_type=aggregate_type,
+        aggregate_id=aggregate_id,
+        user_id=user_id,
+        payload=payload or {},
+        dedupe_key=dedupe_key,
+    )
+
+
+def enqueue(event_type, aggregate_type, aggregate_id, payload=None, user_id=None, dedupe_key=None):
+    """Write one outbox message. Returns None when `dedupe_key` was already enqueued."""
+    message = build_message(event_type, aggregate_type, aggregate_id, payload, user_id, dedupe_key)
+    try:
+        # Savepoint, so a duplicate does not break the caller's transaction
+        with transaction.atomic():
+            message.save()
+    except IntegrityError:
+        logger.info(f"Outbox message {dedupe_key} already enqueued")
+        return None
+    _schedule_relay()
+    return message
+
+
+def enqueue_many(messages):
+    """Bulk variant for build_message() results; duplicates by dedupe_key are skipped."""
+    if not messages:
+        return 0
+    created = OutboxMessage.objects.bulk_create(messages, ignore_conflicts=True)
+    _schedule_relay()
+    return len(created)
@@ -0,0 +1,121 @@
+"""
+Outbox relay: drains pending OutboxMessage rows and fans them out to the
+configured channels.
+
+Each batch is claimed with `SELECT ... FOR UPDATE SKIP LOCKED`, so several
+relay workers can run at once without picking the same rows. The claim marks
+the rows `sending` with a lease (NOTIFICATION_CLAIM_LEASE_SECONDS) and
+commits; channels are called afterwards, outside any transaction, so a slow
+provider never holds row locks. A worker that dies mid-batch leaves its rows
+`sending`, and they are claimed again once the lease runs out.
+
+A message is marked sent only when every channel that handles it has
+accepted it; channels that already succeeded are recorded in
+`delivered_channels` and skipped on retry. Failures back off exponentially
+and give up after NOTIFICATION_MAX_ATTEMPTS.
+"""
+from datetime import timedelta
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .channels import get_channels
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def _deliver(message, channels):
+    """Send to each pending channel. Returns the error text, or '' when all succeeded."""
+    errors = []
+    for channel in channels:
+        if channel.name in message.delivered_channels or not channel.handles(message):
+            continue
+        try:
+            channel.send(message)
+        except Exception as exc:
+            errors.append(f"{channel.name}: {exc}")
+            continue
+        message.delivered_channels.append(channel.name)
+    return "; ".join(errors)
+
+
+def _backoff(attempts):
+    return timedelta(seconds=min(settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 3600))
+
+
+def claim_batch(batch_size):
+    """Lease up to `batch_size` due messages to this worker and commit the claim."""
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status__in=["pending", "sending"], available_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        for message in messages:
+            message.status = "sending"
+            message.attempts += 1
+            message.available_at = now + timedelta(seconds=settings.NOTIFICATION_CLAIM_LEASE_SECONDS)
+        OutboxMessage.objects.bulk_update(messages, ["status", "attempts", "available_at"])
+    return messages
+
+
+def relay_batch(batch_size=None, channels=None):
+    """Deliver up to `batch_size` due messages. Returns {'sent', 'retried', 'failed'}."""
+    batch_size = batch_size or settings.NOTIFICATION_RELAY_BATCH_SIZE
+    channels = get_channels() if channels is None else channels
+    stats = {"sent": 0, "retried": 0, "failed": 0}
+
+    messages = claim_batch(batch_size)
+    for message in messages:
+        error = _deliver(message, channels)
+        if not error:
+            message.status = "sent"
+            message.sent_at = timezone.now()
+            message.last_error = ""
+            stats["sent"] += 1
+        elif message.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            message.status = "failed"
+            message.last_error = error
+            stats["failed"] += 1
+            logger.error(f"Outbox message {message.pk} failed permanently: {error}")
+        else:
+            message.status = "pending"
+            message.last_error = error
+            message.available_at = timezone.now() + _backoff(message.attempts)
+            stats["retried"] += 1
+            logger.warning(f"Outbox message {message.pk} will be retried: {error}")
+
+        # Saved one by one so a crash later in the batch keeps what was delivered
+        message.save(update_fields=["status", "delivered_channels", "last_error", "available_at", "sent_at"])
+
+    stats["claimed"] = len(messages)
+    return stats
+
+
+def relay_outbox(batch_size=None, max_batches=None):
+    """Drain due messages batch by batch (each claim is its own short transaction)."""
+    batch_size = batch_size or settings.NOTIFICATION_RELAY_BATCH_SIZE
+    max_batches = max_batches or settings.NOTIFICATION_RELAY_MAX_BATCHES
+    channels = get_channels()
+    totals = {"sent": 0, "retried": 0, "failed": 0, "batches": 0}
+
+    while totals["batches"] < max_batches:
+        stats = relay_batch(batch_size, channels)
+        if not stats["claimed"]:
+            break
+        totals["batches"] += 1
+        for key in ("sent", "retried", "failed"):
+            totals[key] += stats[key]
+        if stats["claimed"] < batch_size:
+            break
+
+    if totals["batches"]:
+        logger.info(
+            f"Outbox relay: {totals['sent']} sent, {totals['retried']} retried, "
+            f"{totals['failed']} failed in {totals['batches']} batch(es)"
+        )
+    return totals
@@ -0,0 +1,56 @@
+"""
+Booking changes -> outbox messages, written inside the booking's transaction
+(Booking.save() and the bulk transition both run receivers in it).
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.bookings.models import Booking
+from apps.bookings.signals import booking_status_changed
+from apps.notifications.outbox import build_message, enqueue, enqueue_many
+
+
+def _booking_payload(booking):
+    return {
+        "date": booking.date,
+        "time_slot": booking.time_slot,
+        "status": booking.status,
+        "vehicle_type": booking.vehicle_type,
+    }
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, created, **kwargs):
+    if created:
+        enqueue(
+            "booking.created", "booking", instance.pk,
+            payload=_booking_payload(instance),
+            user_id=instance.user_id,
+            dedupe_key=f"booking:{instance.pk}:created",
+        )
+        return
+
+    previous = getattr(instance, "_loaded_status", None)
+    if previous and previous != instance.status:
+        enqueue(
+            "booking.status_changed", "booking", instance.pk,
+            payload={**_booking_payload(instance), "from_status": previous},
+            user_id=instance.user_id,
+            dedupe_key=f"booking:{instance.pk}:{previous}->{instance.status}:{instance.status_version}",
+        )
+
+
+@receiver(booking_status_changed)
+def bookings_bulk_changed(sender, booking_ids, from_status, to_status, **kwargs):
+    bookings = Booking.objects.filter(id__in=booking_ids).only(
+        "id", "user_id", "date", "slot", "status", "status_version", "vehicle_type"
+    )
+    enqueue_many([
+        build_message(
+            "booking.status_changed", "booking", booking.pk,
+            payload={**_booking_payload(booking), "from_status": from_status},
+            user_id=booking.user_id,
+            dedupe_key=f"booking:{booking.pk}:{from_status}->{to_status}:{booking.status_version}",
+        )
+        for booking in bookings
+    ])
@@ -0,0 +1,14 @@
+from celery import shared_task
+import logging
+
+from auto_care.celery import app  # noqa: F401 - configures the app shared_task binds to
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="apps.notifications.tasks.relay_outbox")
+def relay_outbox():
+    """Deliver pending outbox messages (queued on commit and run periodically by beat)."""
+    from .relay import relay_outbox as run_relay
+
+    return run_relay()
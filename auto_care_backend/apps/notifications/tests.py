@@ -1,3 +1,87 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.bookings.bulk import transition_bookings
+from apps.bookings.models import Booking
+from apps.notifications.channels import BaseChannel, FakeChannel
+from apps.notifications.models import OutboxMessage
+from apps.notifications.relay import relay_batch, relay_outbox
+
+
+@override_settings(NOTIFICATION_CHANNELS=["apps.notifications.channels.FakeChannel"])
+class BookingOutboxTests(TestCase):
+    """Booking changes are written to the outbox and delivered exactly once."""
+
+    def setUp(self):
+        FakeChannel.reset()
+        self.user = User.objects.create_user(mobile_number="9876543210", name="Asha")
+        self.booking = Booking.objects.create(
+            user=self.user, vehicle_type="car", date=date.today() + timedelta(days=2), time_slot="09:00 AM",
+            latitude=Decimal("18.520400"), longitude=Decimal("73.856700"), service_address="FC Road",
+        )
+
+    def test_booking_changes_are_enqueued_once(self):
+        booking = Booking.objects.get(pk=self.booking.pk)
+        booking.notes = "Gate 2"
+        booking.save()
+        booking.status = "confirmed"
+        booking.save()
+        transition_bookings([booking.pk], "confirmed", "completed")
+        transition_bookings([booking.pk], "confirmed", "completed")
+
+        self.assertEqual(
+            list(OutboxMessage.objects.values_list("event_type", flat=True)),
+            ["booking.created", "booking.status_changed", "booking.status_changed"],
+        )
+
+    def test_repeated_transitions_are_each_enqueued(self):
+        booking = Booking.objects.get(pk=self.booking.pk)
+        for status in ("confirmed", "pending", "confirmed"):
+            booking.status = status
+            booking.save(update_fields=["status"])
+        transition_bookings([booking.pk], "confirmed", "pending")
+        transition_bookings([booking.pk], "pending", "confirmed")
+
+        changes = OutboxMessage.objects.filter(event_type="booking.status_changed")
+        self.assertEqual(changes.count(), 5)
+        self.assertEqual(Booking.objects.get(pk=booking.pk).status_version, 5)
+
+    def test_relay_delivers_each_message_once(self):
+        self.booking.cancel()
+
+        self.assertEqual(relay_outbox()["sent"], 2)
+        self.assertEqual(relay_outbox()["sent"], 0)
+        self.assertEqual(
+            [item["event_type"] for item in FakeChannel.sent],
+            ["booking.created", "booking.status_changed"],
+        )
+        self.assertFalse(OutboxMessage.objects.exclude(status="sent").exists())
+
+    def test_channels_are_called_after_the_claim_commits(self):
+        seen = []
+
+        class RecordingChannel(BaseChannel):
+            name = "recording"
+
+            def send(self, message):
+                seen.append(OutboxMessage.objects.get(pk=message.pk).status)
+
+        self.assertEqual(relay_batch(channels=[RecordingChannel()])["sent"], 1)
+        self.assertEqual(seen, ["sending"])
+
+    def test_expired_claims_are_retaken(self):
+        message = OutboxMessage.objects.get()
+        message.status = "sending"
+        message.available_at = timezone.now() + timedelta(minutes=5)
+        message.save()
+
+        # Still leased to a live worker
+        self.assertEqual(relay_outbox()["sent"], 0)
+
+        OutboxMessage.objects.filter(pk=message.pk).update(available_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(relay_outbox()["sent"], 1)
+        self.assertEqual(len(FakeChannel.sent), 1)
@@ -1,3 +1,37 @@
 from django.contrib import admin
+from auto_care.counts import EstimatedCountPaginator
+from .ingestion import requeue_events
+from .models import Payment, PaymentWebhookEvent
 
-# Register your models here.
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ['id', 'provider', 'provider_payment_id', 'booking_id', 'amount', 'currency', 'status', 'updated_at']
+    list_filter = ['status', 'provider']
+    search_fields = ['provider_payment_id', 'booking_id']
+    readonly_fields = ['last_event_at', 'last_event_id', 'created_at', 'updated_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(PaymentWebhookEvent)
+class PaymentWebhookEventAdmin(admin.ModelAdmin):
+    """Read-only ingestion log with a replay action"""
+    
+    list_display = ['id', 'provider', 'event_type', 'event_id', 'booking_id', 'status', 'attempts', 'occurred_at', 'received_at']
+    list_filter = ['status', 'provider', 'event_type']
+    search_fields = ['event_id', 'booking_id']
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['replay_events']
+    
+    @admin.action(description='Replay selected events')
+    def replay_events(self, request, queryset):
+        requeued = requeue_events(queryset)
+        self.message_user(request, f'{requeued} event(s) queued for replay.')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import PaymentWebhookView
+
+urlpatterns = [
+    path('webhooks/<slug:provider>/', PaymentWebhookView.as_view(), name='payment-webhook'),
+]
@@ -0,0 +1,37 @@
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+import logging
+
+from auto_care.querybudget import query_budget
+from ..webhooks import (
+    PAYMENT_SIGNATURE_HEADER, WebhookError, record_event, request_consumer_run, verify_signature,
+)
+
+logger = logging.getLogger(__name__)
+
+# -------------------
+# Payment provider webhook
+# -------------------
+class PaymentWebhookView(APIView):
+    """
+    Verify, log and ack. No auth/throttling: providers authenticate with the
+    signature and send bursts at settlement time.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = []
+    
+    @query_budget(2)
+    def post(self, request, provider):
+        body = request.body
+        try:
+            verify_signature(provider, body, request.headers.get(PAYMENT_SIGNATURE_HEADER))
+            event_id = record_event(provider, body)
+        except WebhookError as exc:
+            logger.warning(f"Rejected {provider} webhook: {exc}")
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        request_consumer_run()
+        return Response({"received": True, "event_id": event_id})
@@ -0,0 +1,156 @@
+"""
+Batched consumer for the payment webhook ingestion log.
+
+Events are claimed with `SELECT ... FOR UPDATE SKIP LOCKED` (so several
+consumers can run at once) and applied in (booking, occurred_at) order.
+Application is idempotent and ordered per payment:
+
+* the Payment row is locked while an event is applied;
+* an event already applied to the payment is skipped;
+* an event older than the newest one applied is skipped as stale, so
+  out-of-order delivery cannot move a payment back to an earlier state.
+
+A successful payment confirms its pending booking through Booking.save(),
+so the usual notification outbox entry is written too. Every event runs in
+its own savepoint; a failing event is retried with exponential backoff (from
+PAYMENT_EVENT_RETRY_BASE_SECONDS) up to PAYMENT_EVENT_MAX_ATTEMPTS and then
+left as "failed" for `manage.py replay_payment_events`.
+"""
+from datetime import timedelta
+import json
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.bookings.models import Booking
+from .models import Payment, PaymentWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_STATUS_BY_EVENT = {
+    "payment.succeeded": "succeeded",
+    "payment.failed": "failed",
+    "payment.refunded": "refunded",
+}
+
+
+def _confirm_booking(booking_id):
+    booking = Booking.objects.select_for_update().filter(pk=booking_id).first()
+    if booking is None:
+        logger.warning(f"Payment succeeded for missing/archived booking {booking_id}")
+        return
+    if booking.status == "pending":
+        booking.status = "confirmed"
+        booking.save()
+
+
+def apply_event(event):
+    """Apply one event. Returns (status, note) for the ingestion log row."""
+    new_status = PAYMENT_STATUS_BY_EVENT.get(event.event_type)
+    if new_status is None:
+        return "skipped", f"Unsupported event type {event.event_type}"
+
+    data = json.loads(event.raw_body).get("data") or {}
+    payment_id = data.get("payment_id")
+    if not payment_id or event.booking_id is None:
+        raise ValueError("Event has no payment_id/booking_id")
+
+    payment, _ = Payment.objects.select_for_update().get_or_create(
+        provider=event.provider,
+        provider_payment_id=payment_id,
+        defaults={"booking_id": event.booking_id},
+    )
+    if payment.last_event_id == event.event_id:
+        return "skipped", "Already applied"
+    if payment.last_event_at and event.occurred_at < payment.last_event_at:
+        return "skipped", f"Stale: newer event {payment.last_event_id} already applied"
+
+    payment.status = new_status
+    payment.last_event_at = event.occurred_at
+    payment.last_event_id = event.event_id
+    if data.get("amount") is not None:
+        payment.amount = data["amount"]
+    if data.get("currency"):
+        payment.currency = data["currency"]
+    payment.save()
+
+    if new_status == "succeeded":
+        _confirm_booking(payment.booking_id)
+    return "applied", ""
+
+
+def _backoff(attempts):
+    return timedelta(seconds=min(settings.PAYMENT_EVENT_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 3600))
+
+
+def process_batch(batch_size=None):
+    """Claim and apply up to `batch_size` received events. Returns counts by outcome."""
+    batch_size = batch_size or settings.PAYMENT_CONSUMER_BATCH_SIZE
+    stats = {"claimed": 0, "applied": 0, "skipped": 0, "failed": 0, "retried": 0}
+    now = timezone.now()
+
+    with transaction.atomic():
+        events = list(
+            PaymentWebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status="received", available_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        stats["claimed"] = len(events)
+        events.sort(key=lambda event: (event.booking_id or 0, event.occurred_at, event.id))
+
+        for event in events:
+            event.attempts += 1
+            try:
+                with transaction.atomic():
+                    event.status, event.error = apply_event(event)
+            except Exception as exc:
+                event.error = str(exc)
+                if event.attempts >= settings.PAYMENT_EVENT_MAX_ATTEMPTS:
+                    event.status = "failed"
+                    logger.error(f"Payment event {event.provider}/{event.event_id} failed: {exc}")
+                else:
+                    event.available_at = now + _backoff(event.attempts)
+                    stats["retried"] += 1
+                    logger.warning(f"Payment event {event.provider}/{event.event_id} will be retried: {exc}")
+                    continue
+            event.processed_at = timezone.now()
+            stats[event.status] += 1
+
+        PaymentWebhookEvent.objects.bulk_update(
+            events, ["status", "error", "attempts", "available_at", "processed_at"]
+        )
+
+    return stats
+
+
+def process_payment_events(batch_size=None, max_batches=None):
+    """Drain the ingestion log batch by batch (each batch is its own transaction)."""
+    batch_size = batch_size or settings.PAYMENT_CONSUMER_BATCH_SIZE
+    max_batches = max_batches or settings.PAYMENT_CONSUMER_MAX_BATCHES
+    totals = {"applied": 0, "skipped": 0, "failed": 0, "retried": 0, "batches": 0}
+
+    while totals["batches"] < max_batches:
+        stats = process_batch(batch_size)
+        if not stats["claimed"]:
+            break
+        totals["batches"] += 1
+        for key in ("applied", "skipped", "failed", "retried"):
+            totals[key] += stats[key]
+        if stats["claimed"] < batch_size:
+            break
+
+    if totals["batches"]:
+        logger.info(
+            f"Payment events: {totals['applied']} applied, {totals['skipped']} skipped, "
+            f"{totals['failed']} failed, {totals['retried']} to retry in {totals['batches']} batch(es)"
+        )
+    return totals
+
+
+def requeue_events(queryset):
+    """Reset events to "received" so the consumer applies them again (replay)."""
+    return queryset.update(
+        status="received", attempts=0, error="", available_at=timezone.now(), processed_at=None
+    )
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.payments.ingestion import process_payment_events, requeue_events
+from apps.payments.models import PaymentWebhookEvent
+
+
+def _parse_datetime(value):
+    try:
+        return timezone.make_aware(datetime.fromisoformat(value))
+    except ValueError:
+        raise CommandError(f"Invalid datetime: {value} (use ISO format, e.g. 2025-01-31T18:00)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay logged payment webhook events. Application is idempotent, so "
+        "already-applied or superseded events are skipped again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--status", action="append", choices=["received", "applied", "skipped", "failed"],
+            help="Only events in this status (repeatable). Default: failed.",
+        )
+        parser.add_argument("--provider")
+        parser.add_argument("--event-id", action="append", dest="event_ids")
+        parser.add_argument("--booking", type=int)
+        parser.add_argument("--since", help="Received at or after (ISO datetime).")
+        parser.add_argument("--until", help="Received before (ISO datetime).")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the matching events.")
+        parser.add_argument("--now", action="store_true", help="Apply immediately instead of leaving it to Celery.")
+
+    def handle(self, *args, **options):
+        events = PaymentWebhookEvent.objects.filter(status__in=options["status"] or ["failed"])
+        if options["provider"]:
+            events = events.filter(provider=options["provider"])
+        if options["event_ids"]:
+            events = events.filter(event_id__in=options["event_ids"])
+        if options["booking"]:
+            events = events.filter(booking_id=options["booking"])
+        if options["since"]:
+            events = events.filter(received_at__gte=_parse_datetime(options["since"]))
+        if options["until"]:
+            events = events.filter(received_at__lt=_parse_datetime(options["until"]))
+
+        if options["dry_run"]:
+            self.stdout.write(f"Matching events: {events.count()}")
+            return
+
+        requeued = requeue_events(events)
+        self.stdout.write(f"Re-queued {requeued} event(s)")
+
+        if options["now"]:
+            stats = process_payment_events()
+            self.stdout.write(self.style.SUCCESS(
+                f"Applied {stats['applied']}, skipped {stats['skipped']}, failed {stats['failed']}"
+            ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='paymentwebhookevent',
+            name='payments_pa_status_c06087_idx',
+        ),
+        migrations.AddField(
+            model_name='paymentwebhookevent',
+            name='available_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='paymentwebhookevent',
+            index=models.Index(fields=['status', 'available_at', 'id'], name='payments_pa_status_539172_idx'),
+        ),
+    ]
@@ -1,3 +1,77 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class PaymentWebhookEvent(models.Model):
+    """
+    Durable ingestion log: one row per verified provider webhook, stored raw
+    and acknowledged immediately. `apps.payments.ingestion` applies the rows
+    to Payment/Booking state later, in batches.
+    """
+    STATUS_CHOICES = [
+        ("received", "Received"),
+        ("applied", "Applied"),
+        ("skipped", "Skipped"),
+        ("failed", "Failed"),
+    ]
+
+    provider = models.CharField(max_length=30)
+    event_id = models.CharField(max_length=100)
+    event_type = models.CharField(max_length=50)
+    # Plain id (not an FK): bookings may be archived or partitioned
+    booking_id = models.BigIntegerField(null=True, blank=True)
+    occurred_at = models.DateTimeField()
+    raw_body = models.TextField()
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="received")
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    # A failed attempt pushes this forward (exponential backoff)
+    available_at = models.DateTimeField(default=timezone.now)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            # Provider retries of the same event are dropped on insert
+            models.UniqueConstraint(fields=['provider', 'event_id'], name='unique_payment_webhook_event'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'available_at', 'id']),
+            models.Index(fields=['booking_id', 'occurred_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.event_type} {self.event_id} ({self.status})"
+
+
+class Payment(models.Model):
+    """Current state of one provider payment for a booking."""
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("succeeded", "Succeeded"),
+        ("failed", "Failed"),
+        ("refunded", "Refunded"),
+    ]
+
+    provider = models.CharField(max_length=30)
+    provider_payment_id = models.CharField(max_length=100)
+    booking_id = models.BigIntegerField(db_index=True)
+    amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    currency = models.CharField(max_length=3, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    # Newest provider event applied so far; older events are skipped as stale
+    last_event_at = models.DateTimeField(null=True, blank=True)
+    last_event_id = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'provider_payment_id'], name='unique_provider_payment'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} payment {self.provider_payment_id} for booking {self.booking_id} ({self.status})"
@@ -0,0 +1,14 @@
+from celery import shared_task
+import logging
+
+from auto_care.celery import app  # noqa: F401 - configures the app shared_task binds to
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="apps.payments.tasks.process_payment_events")
+def process_payment_events():
+    """Apply received payment webhook events (queued by the webhook view and run by beat)."""
+    from .ingestion import process_payment_events as run_consumer
+
+    return run_consumer()
@@ -1,3 +1,127 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+import json
+import time
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.bookings.models import Booking
+from apps.payments import ingestion
+from apps.payments.ingestion import process_batch
+from apps.payments.models import Payment, PaymentWebhookEvent
+from apps.payments.webhooks import WebhookError, record_event, sign_payload, verify_signature
+
+SECRETS = {"razorpay": "whsec_test"}
+
+
+def event_body(event_id, event_type, created, booking_id, payment_id="pay_1"):
+    return json.dumps({
+        "id": event_id, "type": event_type, "created": created,
+        "data": {"payment_id": payment_id, "booking_id": booking_id, "amount": "499.00", "currency": "INR"},
+    }).encode()
+
+
+@override_settings(PAYMENT_WEBHOOK_SECRETS=SECRETS, PAYMENT_WEBHOOK_TOLERANCE_SECONDS=300)
+class WebhookSignatureTests(SimpleTestCase):
+    """Signature, provider and timestamp tolerance checks."""
+
+    body = b'{"id": "evt_1"}'
+
+    def test_valid_signature(self):
+        verify_signature("razorpay", self.body, sign_payload("whsec_test", self.body))
+
+    def test_rejected_signatures(self):
+        now = int(time.time())
+        cases = {
+            "Unknown payment provider": ("stripe", sign_payload("whsec_test", self.body)),
+            "Missing signature": ("razorpay", None),
+            "Malformed signature": ("razorpay", "v1=abc"),
+            "Invalid signature": ("razorpay", sign_payload("whsec_other", self.body)),
+            "outside tolerance": ("razorpay", sign_payload("whsec_test", self.body, now - 301)),
+        }
+        for message, (provider, header) in cases.items():
+            with self.assertRaisesMessage(WebhookError, message):
+                verify_signature(provider, self.body, header)
+
+        # Tampered body under a valid header
+        with self.assertRaisesMessage(WebhookError, "Invalid signature"):
+            verify_signature("razorpay", b'{"id": "evt_2"}', sign_payload("whsec_test", self.body))
+
+    def test_clock_skew_within_tolerance_is_accepted(self):
+        verify_signature("razorpay", self.body, sign_payload("whsec_test", self.body, int(time.time()) + 299))
+
+
+@override_settings(PAYMENT_WEBHOOK_SECRETS=SECRETS)
+class PaymentIngestionTests(TestCase):
+    """Webhook events are logged once and applied in order, per payment."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(mobile_number="9876543210", name="Asha")
+        self.booking = Booking.objects.create(
+            user=self.user, vehicle_type="car", date=date.today() + timedelta(days=2), time_slot="09:00 AM",
+            latitude=Decimal("18.520400"), longitude=Decimal("73.856700"), service_address="FC Road",
+        )
+        self.created = int(time.time()) - 60
+
+    def test_duplicate_delivery_is_logged_once(self):
+        body = event_body("evt_1", "payment.succeeded", self.created, self.booking.pk)
+        client = APIClient()
+
+        with mock.patch("apps.payments.api.views.request_consumer_run"):
+            for _ in range(2):
+                response = client.post(
+                    "/api/payments/webhooks/razorpay/", body, content_type="application/json",
+                    HTTP_X_WEBHOOK_SIGNATURE=sign_payload("whsec_test", body),
+                )
+                self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(PaymentWebhookEvent.objects.count(), 1)
+        self.assertEqual(process_batch()["applied"], 1)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, "confirmed")
+
+    def test_events_apply_in_occurrence_order(self):
+        # Delivered out of order: the later event reaches the log first
+        record_event("razorpay", event_body("evt_2", "payment.succeeded", self.created + 5, self.booking.pk))
+        record_event("razorpay", event_body("evt_1", "payment.failed", self.created, self.booking.pk))
+
+        self.assertEqual(process_batch()["applied"], 2)
+        self.assertEqual(Payment.objects.get().status, "succeeded")
+
+    def test_stale_event_is_skipped(self):
+        record_event("razorpay", event_body("evt_2", "payment.refunded", self.created + 5, self.booking.pk))
+        process_batch()
+
+        record_event("razorpay", event_body("evt_1", "payment.succeeded", self.created, self.booking.pk))
+        self.assertEqual(process_batch()["skipped"], 1)
+
+        stale = PaymentWebhookEvent.objects.get(event_id="evt_1")
+        self.assertEqual(stale.status, "skipped")
+        self.assertIn("Stale", stale.error)
+        self.assertEqual(Payment.objects.get().status, "refunded")
+
+    @override_settings(PAYMENT_EVENT_RETRY_BASE_SECONDS=10, PAYMENT_EVENT_MAX_ATTEMPTS=3)
+    def test_failing_event_backs_off(self):
+        record_event("razorpay", event_body("evt_1", "payment.succeeded", self.created, self.booking.pk))
+
+        with mock.patch.object(ingestion, "apply_event", side_effect=RuntimeError("db hiccup")):
+            self.assertEqual(process_batch()["retried"], 1)
+            # Not reclaimed until its backoff has passed
+            self.assertEqual(process_batch()["claimed"], 0)
+
+            event = PaymentWebhookEvent.objects.get()
+            self.assertEqual((event.status, event.attempts), ("received", 1))
+            self.assertGreater(event.available_at, timezone.now() + timedelta(seconds=5))
+
+            PaymentWebhookEvent.objects.update(available_at=timezone.now())
+            self.assertEqual(process_batch()["retried"], 1)
+            self.assertGreater(
+                PaymentWebhookEvent.objects.get().available_at, timezone.now() + timedelta(seconds=15)
+            )
+
+        PaymentWebhookEvent.objects.update(available_at=timezone.now())
+        self.assertEqual(process_batch()["applied"], 1)
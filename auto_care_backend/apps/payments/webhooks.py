@@ -0,0 +1,117 @@
+"""
+Payment webhook receiving side: signature check, parsing and the append to
+the ingestion log. Kept to one INSERT so providers are acked in a few
+milliseconds; all booking/payment work happens in `apps.payments.ingestion`.
+
+Signature header (`PAYMENT_SIGNATURE_HEADER`): "t=<unix seconds>,v1=<hex>",
+where v1 = HMAC-SHA256(provider secret, "<t>.<raw body>"). Signatures older
+than PAYMENT_WEBHOOK_TOLERANCE_SECONDS are rejected to stop replays.
+
+Expected body:
+    {"id": "evt_1", "type": "payment.succeeded", "created": 1735689600,
+     "data": {"payment_id": "pay_1", "booking_id": 42, "amount": "499.00", "currency": "INR"}}
+"""
+from datetime import datetime, timezone as dt_timezone
+import hashlib
+import hmac
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import PaymentWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_SIGNATURE_HEADER = "X-Webhook-Signature"
+SUPPORTED_EVENT_TYPES = ("payment.succeeded", "payment.failed", "payment.refunded")
+
+
+class WebhookError(ValueError):
+    """Signature or payload problem; the provider gets a 400."""
+
+
+def sign_payload(secret, body, timestamp=None):
+    """Build a signature header value (used by tests and the replay tool)."""
+    timestamp = int(timestamp if timestamp is not None else time.time())
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_signature(provider, body, header):
+    secret = settings.PAYMENT_WEBHOOK_SECRETS.get(provider)
+    if not secret:
+        raise WebhookError(f"Unknown payment provider: {provider}")
+    if not header:
+        raise WebhookError("Missing signature")
+
+    parts = dict(part.split("=", 1) for part in header.split(",") if "=" in part)
+    try:
+        timestamp = int(parts["t"])
+        signature = parts["v1"]
+    except (KeyError, ValueError):
+        raise WebhookError("Malformed signature")
+
+    if abs(time.time() - timestamp) > settings.PAYMENT_WEBHOOK_TOLERANCE_SECONDS:
+        raise WebhookError("Signature timestamp outside tolerance")
+    expected = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, signature):
+        raise WebhookError("Invalid signature")
+
+
+def parse_event(body):
+    """Return (event_id, event_type, booking_id, occurred_at) from a raw body."""
+    try:
+        event = json.loads(body)
+        event_id = str(event["id"])
+        event_type = event["type"]
+        data = event.get("data") or {}
+        occurred_at = datetime.fromtimestamp(int(event["created"]), tz=dt_timezone.utc)
+    except (ValueError, KeyError, TypeError):
+        raise WebhookError("Malformed event body")
+
+    booking_id = data.get("booking_id")
+    try:
+        booking_id = int(booking_id) if booking_id is not None else None
+    except (TypeError, ValueError):
+        raise WebhookError("booking_id must be an integer")
+    return event_id, event_type, booking_id, occurred_at
+
+
+def record_event(provider, body):
+    """
+    Append a verified event to the ingestion log. A provider retry of an
+    event already logged conflicts on (provider, event_id) and leaves the
+    existing row, including its processing status, untouched.
+    """
+    event_id, event_type, booking_id, occurred_at = parse_event(body)
+    PaymentWebhookEvent.objects.bulk_create(
+        [PaymentWebhookEvent(
+            provider=provider,
+            event_id=event_id,
+            event_type=event_type,
+            booking_id=booking_id,
+            occurred_at=occurred_at,
+            raw_body=body.decode("utf-8"),
+        )],
+        ignore_conflicts=True,
+    )
+    return event_id
+
+
+def request_consumer_run():
+    """
+    Queue one consumer run per PAYMENT_CONSUMER_KICK_SECONDS window, delayed
+    to the end of the window so it picks up everything that arrived in it.
+    """
+    from .tasks import process_payment_events
+
+    try:
+        if not cache.add("payments:consumer:kick", 1, settings.PAYMENT_CONSUMER_KICK_SECONDS):
+            return
+        process_payment_events.apply_async(countdown=settings.PAYMENT_CONSUMER_KICK_SECONDS)
+    except Exception as exc:
+        # The periodic consumer run still picks the events up
+        logger.warning(f"Could not queue payment consumer: {exc}")
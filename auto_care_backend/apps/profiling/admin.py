@@ -0,0 +1,77 @@
+from django.contrib import admin
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html_join
+from auto_care.counts import EstimatedCountPaginator
+from .models import RequestProfile
+from .profiler import speedscope_to_collapsed
+from .store import read_profile_file
+
+# Download formats per profile mode: {mode: {format: (suffix, content_type)}}
+DOWNLOAD_FORMATS = {
+    "sampling": {
+        "speedscope": ("speedscope.json", "application/json"),
+        "collapsed": ("collapsed.txt", "text/plain"),
+    },
+    "cprofile": {
+        "pstats": ("prof", "application/octet-stream"),
+    },
+}
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Read-only list of stored profiles with download links"""
+    
+    list_display = ['id', 'method', 'path', 'status_code', 'duration_ms', 'mode', 'trigger', 'sample_count', 'created_at', 'downloads']
+    list_filter = ['mode', 'trigger', 'method']
+    search_fields = ['path']
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ['downloads']
+    
+    @admin.display(description='Download')
+    def downloads(self, obj):
+        return format_html_join(
+            ' | ', '<a href="{}">{}</a>',
+            (
+                (reverse('admin:profiling_requestprofile_download', args=[obj.pk, fmt]), fmt)
+                for fmt in DOWNLOAD_FORMATS[obj.mode]
+            ),
+        )
+    
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/<slug:fmt>/',
+                self.admin_site.admin_view(self.download_view),
+                name='profiling_requestprofile_download',
+            ),
+        ] + super().get_urls()
+    
+    def download_view(self, request, pk, fmt):
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        if not self.has_view_permission(request, profile):
+            raise Http404
+        if fmt not in DOWNLOAD_FORMATS[profile.mode]:
+            raise Http404
+        
+        try:
+            data = read_profile_file(profile)
+        except FileNotFoundError:
+            raise Http404('Profile file has been removed')
+        if fmt == 'collapsed':
+            data = speedscope_to_collapsed(data)
+        
+        suffix, content_type = DOWNLOAD_FORMATS[profile.mode][fmt]
+        response = HttpResponse(data, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.pk}.{suffix}"'
+        return response
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.models import User
+from apps.profiling.middleware import issue_token
+from apps.profiling.profiler import PROFILERS
+
+
+class Command(BaseCommand):
+    help = "Issue a signed X-Profile-Token that profiles a staff member's requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("mobile_number", help="Mobile number of an active staff user.")
+        parser.add_argument("--mode", choices=sorted(PROFILERS), default=settings.PROFILING_MODE)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(mobile_number=options["mobile_number"], is_staff=True, is_active=True).first()
+        if user is None:
+            raise CommandError(f"No active staff user with mobile number {options['mobile_number']}")
+
+        token = issue_token(user, options["mode"])
+        minutes = settings.PROFILING_TOKEN_MAX_AGE // 60
+        self.stdout.write(f"X-Profile-Token: {token}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Valid for {minutes} minute(s); profiles ({options['mode']}) appear under Request profiles in the admin."
+        ))
@@ -0,0 +1,98 @@
+"""
+On-demand request profiling.
+
+A request is profiled when it carries a valid staff token in the
+`X-Profile-Token` header (see `manage.py profile_token`), or when it is
+picked by the 1-in-PROFILING_SAMPLE_RATE random sample. Everything else
+passes straight through: the only per-request cost is a header lookup
+(plus one random draw when sampling is on). Token-triggered responses carry
+`X-Profile-Id`, the RequestProfile to open in the admin.
+"""
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+
+from .profiler import PROFILERS
+from .store import save_profile
+
+logger = logging.getLogger(__name__)
+
+TOKEN_META_KEY = "HTTP_X_PROFILE_TOKEN"
+PROFILE_ID_HEADER = "X-Profile-Id"
+TOKEN_SALT = "apps.profiling.token"
+
+
+def issue_token(user, mode=None):
+    return signing.dumps({"user": user.pk, "mode": mode or settings.PROFILING_MODE}, salt=TOKEN_SALT)
+
+
+def verify_token(token):
+    """Return (user_id, mode) for a valid, unexpired token of an active staff user, else None."""
+    from apps.accounts.models import User
+
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    if payload.get("mode") not in PROFILERS:
+        return None
+    if not User.objects.filter(pk=payload.get("user"), is_staff=True, is_active=True).exists():
+        return None
+    return payload["user"], payload["mode"]
+
+
+class RequestProfilerMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+
+    def __call__(self, request):
+        token = request.META.get(TOKEN_META_KEY)
+        if token is not None:
+            verified = verify_token(token)
+            if verified is None:
+                logger.warning(f"Ignoring invalid profile token on {request.path}")
+                return self.get_response(request)
+            requested_by_id, mode = verified
+            return self.profile(request, mode, "token", requested_by_id)
+
+        if self.sample_rate and random.randrange(self.sample_rate) == 0:
+            return self.profile(request, settings.PROFILING_MODE, "sample")
+
+        return self.get_response(request)
+
+    def profile(self, request, mode, trigger, requested_by_id=None):
+        profiler = PROFILERS[mode](settings.PROFILING_INTERVAL_MS)
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        try:
+            profile = save_profile(
+                profiler,
+                method=request.method,
+                path=request.path,
+                status_code=response.status_code,
+                duration_ms=duration_ms,
+                trigger=trigger,
+                requested_by_id=requested_by_id,
+            )
+        except Exception as exc:
+            # Profiling must never fail the request it observed
+            logger.error(f"Could not save profile for {request.path}: {exc}")
+            return response
+
+        logger.info(f"Profiled {request.method} {request.path} in {duration_ms:.0f} ms (profile {profile.pk})")
+        if trigger == "token":
+            response[PROFILE_ID_HEADER] = str(profile.pk)
+        return response
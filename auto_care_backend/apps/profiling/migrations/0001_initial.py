@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=500)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('duration_ms', models.FloatField()),
+                ('mode', models.CharField(choices=[('sampling', 'Sampling'), ('cprofile', 'cProfile')], max_length=10)),
+                ('trigger', models.CharField(choices=[('token', 'Staff token'), ('sample', 'Random sample')], max_length=10)),
+                ('requested_by_id', models.BigIntegerField(blank=True, null=True)),
+                ('sample_count', models.PositiveIntegerField(default=0)),
+                ('file_name', models.CharField(max_length=100)),
+                ('size_bytes', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['path', 'created_at'], name='profiling_r_path_2e7aba_idx')],
+            },
+        ),
+    ]
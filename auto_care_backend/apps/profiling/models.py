@@ -0,0 +1,39 @@
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """
+    One profiled request. The profile itself is a file in PROFILING_DIR
+    (`apps.profiling.store`); only the newest PROFILING_MAX_PROFILES are kept.
+    """
+    MODE_CHOICES = [
+        ("sampling", "Sampling"),
+        ("cprofile", "cProfile"),
+    ]
+    TRIGGER_CHOICES = [
+        ("token", "Staff token"),
+        ("sample", "Random sample"),
+    ]
+
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    duration_ms = models.FloatField()
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES)
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    # Plain id: the staff member who requested the profile, if any
+    requested_by_id = models.BigIntegerField(null=True, blank=True)
+    # Stack samples (sampling) or function calls (cprofile)
+    sample_count = models.PositiveIntegerField(default=0)
+    file_name = models.CharField(max_length=100)
+    size_bytes = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['path', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
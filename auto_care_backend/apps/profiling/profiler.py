@@ -0,0 +1,137 @@
+"""
+In-process profilers run around a single request.
+
+- SamplingProfiler: a background thread snapshots the request thread's stack
+  every PROFILING_INTERVAL_MS (sys._current_frames). Low overhead, real
+  call stacks; saved in speedscope's JSON format, with collapsed stacks
+  (flamegraph.pl / speedscope import) derived on download.
+- CProfileProfiler: deterministic cProfile of the request thread; saved as a
+  pstats `.prof` dump for snakeviz / `python -m pstats`.
+"""
+from collections import Counter
+from threading import Event, Thread, get_ident
+import cProfile
+import json
+import marshal
+import os
+import sys
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+def _short_filename(filename):
+    """Strip the longest sys.path prefix, e.g. 'apps/bookings/api/serializers.py'."""
+    best = ""
+    for entry in sys.path:
+        if entry and filename.startswith(entry) and len(entry) > len(best):
+            best = entry
+    return filename[len(best):].lstrip(os.sep) if best else filename
+
+
+class SamplingProfiler:
+    mode = "sampling"
+    extension = "speedscope.json"
+
+    def __init__(self, interval_ms):
+        self.interval_ms = interval_ms
+        self.stacks = Counter()
+        self.sample_count = 0
+        self._target = None
+        self._stopped = Event()
+        self._thread = None
+
+    def start(self):
+        self._target = get_ident()
+        self._thread = Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        interval = self.interval_ms / 1000
+        while not self._stopped.wait(interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                # Root first, as flame graphs expect
+                self.stacks[tuple(reversed(stack))] += 1
+                self.sample_count += 1
+
+    def render(self, name):
+        frames = []
+        frame_index = {}
+        samples = []
+        weights = []
+        for stack, count in self.stacks.most_common():
+            indexes = []
+            for qualname, filename, line in stack:
+                key = (qualname, filename, line)
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frames.append({"name": qualname, "file": _short_filename(filename), "line": line})
+                indexes.append(frame_index[key])
+            samples.append(indexes)
+            weights.append(count * self.interval_ms)
+
+        document = {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "auto_care",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+        return json.dumps(document).encode()
+
+
+class CProfileProfiler:
+    mode = "cprofile"
+    extension = "prof"
+
+    def __init__(self, interval_ms=None):
+        self._profile = cProfile.Profile()
+        self.sample_count = 0
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def render(self, name):
+        self._profile.create_stats()
+        self.sample_count = sum(entry[1] for entry in self._profile.stats.values())
+        # Same format as Profile.dump_stats()
+        return marshal.dumps(self._profile.stats)
+
+
+PROFILERS = {
+    SamplingProfiler.mode: SamplingProfiler,
+    CProfileProfiler.mode: CProfileProfiler,
+}
+
+
+def speedscope_to_collapsed(data):
+    """Convert a stored speedscope document to collapsed stacks ('a;b;c <ms>' per line)."""
+    document = json.loads(data)
+    frames = document["shared"]["frames"]
+    names = [f"{frame['name']} ({frame['file']}:{frame['line']})" for frame in frames]
+    lines = []
+    for profile in document["profiles"]:
+        for sample, weight in zip(profile["samples"], profile["weights"]):
+            lines.append(f"{';'.join(names[index] for index in sample)} {weight:g}")
+    return ("\n".join(lines) + "\n").encode()
+
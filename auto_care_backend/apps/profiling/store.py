@@ -0,0 +1,66 @@
+"""
+Bounded local store for request profiles: one file per profile in
+PROFILING_DIR plus a RequestProfile row. Saving a profile prunes everything
+beyond the newest PROFILING_MAX_PROFILES.
+"""
+from pathlib import Path
+import logging
+import secrets
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+
+def profile_path(file_name):
+    return Path(settings.PROFILING_DIR) / file_name
+
+
+def write_profile_file(data, extension):
+    profile_dir = Path(settings.PROFILING_DIR)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    name = f"{timezone.now():%Y%m%d-%H%M%S}-{secrets.token_hex(4)}.{extension}"
+    tmp_path = profile_dir / f"{name}.tmp"
+    tmp_path.write_bytes(data)
+    tmp_path.rename(profile_dir / name)
+    return name
+
+
+def read_profile_file(profile):
+    return profile_path(profile.file_name).read_bytes()
+
+
+def save_profile(profiler, *, method, path, status_code, duration_ms, trigger, requested_by_id=None):
+    data = profiler.render(f"{method} {path}")
+    file_name = write_profile_file(data, profiler.extension)
+    profile = RequestProfile.objects.create(
+        method=method,
+        path=path[:500],
+        status_code=status_code,
+        duration_ms=duration_ms,
+        mode=profiler.mode,
+        trigger=trigger,
+        requested_by_id=requested_by_id,
+        sample_count=profiler.sample_count,
+        file_name=file_name,
+        size_bytes=len(data),
+    )
+    prune_profiles(settings.PROFILING_MAX_PROFILES)
+    return profile
+
+
+def prune_profiles(keep):
+    stale = list(RequestProfile.objects.order_by("-id").values_list("id", "file_name")[keep:])
+    if not stale:
+        return 0
+
+    for _, file_name in stale:
+        try:
+            profile_path(file_name).unlink(missing_ok=True)
+        except OSError as exc:
+            logger.warning(f"Could not remove profile file {file_name}: {exc}")
+    RequestProfile.objects.filter(id__in=[profile_id for profile_id, _ in stale]).delete()
+    return len(stale)
@@ -0,0 +1,47 @@
+import json
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import User
+from apps.profiling.middleware import PROFILE_ID_HEADER, issue_token
+from apps.profiling.models import RequestProfile
+from apps.profiling.profiler import speedscope_to_collapsed
+from apps.profiling.store import read_profile_file
+
+
+class RequestProfilerTests(TestCase):
+    """Only token or sampled requests are profiled, into a bounded store."""
+
+    def setUp(self):
+        self.profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profile_dir.cleanup)
+        overrides = override_settings(PROFILING_DIR=self.profile_dir.name, PROFILING_MAX_PROFILES=2)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.staff = User.objects.create_user(mobile_number="9876543210", name="Ops", is_staff=True)
+
+    def test_staff_token_profiles_request(self):
+        response = self.client.get("/api/services/catalog/", HTTP_X_PROFILE_TOKEN=issue_token(self.staff))
+
+        profile = RequestProfile.objects.get(pk=response[PROFILE_ID_HEADER])
+        self.assertEqual((profile.trigger, profile.mode, profile.requested_by_id), ("token", "sampling", self.staff.pk))
+        document = json.loads(read_profile_file(profile))
+        self.assertEqual(document["profiles"][0]["type"], "sampled")
+        speedscope_to_collapsed(read_profile_file(profile))
+
+    def test_untriggered_and_invalid_token_requests_are_not_profiled(self):
+        customer = User.objects.create_user(mobile_number="9876500000", name="Asha")
+        self.client.get("/api/services/catalog/")
+        response = self.client.get("/api/services/catalog/", HTTP_X_PROFILE_TOKEN=issue_token(customer))
+
+        self.assertNotIn(PROFILE_ID_HEADER, response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_MODE="cprofile")
+    def test_sampled_profiles_are_pruned(self):
+        for _ in range(3):
+            self.client.get("/api/services/catalog/")
+
+        self.assertEqual(RequestProfile.objects.count(), 2)
+        self.assertEqual(set(RequestProfile.objects.values_list("trigger", "mode")), {("sample", "cprofile")})
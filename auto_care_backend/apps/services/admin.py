@@ -1,3 +1,13 @@
 from django.contrib import admin
+from .models import Service
 
-# Register your models here.
+@admin.register(Service)
+class ServiceAdmin(admin.ModelAdmin):
+    """Service catalog; saving refreshes every worker's catalog snapshot"""
+    
+    list_display = ['name', 'code', 'vehicle_type', 'duration_minutes', 'price', 'active', 'sort_order']
+    list_filter = ['vehicle_type', 'active']
+    list_editable = ['price', 'active', 'sort_order']
+    search_fields = ['name', 'code']
+    prepopulated_fields = {'code': ['name']}
+    readonly_fields = ['updated_at']
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import service_catalog
+
+urlpatterns = [
+    path('catalog/', service_catalog, name='service-catalog'),
+]
@@ -0,0 +1,49 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from apps.bookings.models import Booking
+from ..catalog import get_catalog
+from auto_care.conditional import etag_matches
+from auto_care.querybudget import query_budget
+import logging
+
+logger = logging.getLogger(__name__)
+
+VEHICLE_TYPES = [choice for choice, _ in Booking.VEHICLE_CHOICES]
+
+# -------------------
+# Service catalog (public, cached)
+# -------------------
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@query_budget(1)
+def service_catalog(request):
+    """Active services from the in-process snapshot, with ETag/304 revalidation"""
+    catalog = get_catalog()
+    vehicle_type = request.query_params.get('vehicle_type')
+    
+    if vehicle_type:
+        if vehicle_type not in VEHICLE_TYPES:
+            return Response(
+                {'error': f'vehicle_type must be one of: {", ".join(VEHICLE_TYPES)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        etag = f'"{catalog.version}-{vehicle_type}"'
+        services = catalog.for_vehicle(vehicle_type)
+    else:
+        etag = catalog.etag
+        services = list(catalog.services)
+    
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response({
+            'version': catalog.version,
+            'count': len(services),
+            'services': services
+        })
+    
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+    return response
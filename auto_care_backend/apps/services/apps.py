@@ -1,5 +1,9 @@
 from django.apps import AppConfig
 
+
 class ServicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.services'
+
+    def ready(self):
+        from apps.services import signals  # noqa: F401
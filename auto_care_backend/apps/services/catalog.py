@@ -0,0 +1,103 @@
+"""
+In-process snapshot of the active service catalog.
+
+The catalog is read on every app launch and every booking but changes
+rarely, so each process keeps an immutable `CatalogSnapshot` built in one
+query. Its version is a hash of the content, so every process computes the
+same ETag for the same catalog and clients revalidate with a cheap 304.
+
+Changes (see `apps.services.signals`) drop the local snapshot and bump a
+generation counter in the shared cache; other processes compare against it
+at most every SERVICE_CATALOG_CHECK_SECONDS and rebuild when it moved.
+"""
+from threading import Lock
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "services:catalog:generation"
+
+_FIELDS = ("id", "code", "name", "description", "vehicle_type", "duration_minutes", "price", "sort_order")
+
+
+class CatalogSnapshot:
+    """Immutable view of active services, indexed for validation lookups."""
+
+    def __init__(self, services, generation=None):
+        self.services = tuple(services)
+        self.generation = generation
+        self.by_id = {service["id"]: service for service in self.services}
+        self.vehicle_types = frozenset(service["vehicle_type"] for service in self.services)
+        self.version = hashlib.sha256(
+            json.dumps(self.services, sort_keys=True).encode()
+        ).hexdigest()[:16]
+
+    @classmethod
+    def from_queryset(cls, queryset, generation=None):
+        services = []
+        for row in queryset.values(*_FIELDS):
+            row["price"] = str(row["price"])
+            services.append(row)
+        return cls(services, generation)
+
+    @property
+    def etag(self):
+        return f'"{self.version}"'
+
+    def get(self, service_id):
+        return self.by_id.get(service_id)
+
+    def for_vehicle(self, vehicle_type):
+        return [service for service in self.services if service["vehicle_type"] == vehicle_type]
+
+    def offers_vehicle(self, vehicle_type):
+        """An empty catalog does not restrict vehicle types."""
+        return not self.services or vehicle_type in self.vehicle_types
+
+
+_snapshot = None
+_checked_at = 0.0
+_snapshot_lock = Lock()
+
+
+def _shared_generation():
+    try:
+        return cache.get(GENERATION_KEY, 0)
+    except Exception as exc:
+        logger.warning(f"Catalog generation check failed, keeping local snapshot: {exc}")
+        return _snapshot.generation if _snapshot is not None else 0
+
+
+def get_catalog():
+    """Return the current CatalogSnapshot, rebuilding it if it changed."""
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    if _snapshot is not None and now - _checked_at < settings.SERVICE_CATALOG_CHECK_SECONDS:
+        return _snapshot
+
+    generation = _shared_generation()
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.generation != generation:
+            from apps.services.models import Service
+
+            _snapshot = CatalogSnapshot.from_queryset(Service.objects.filter(active=True), generation)
+        _checked_at = now
+    return _snapshot
+
+
+def invalidate_catalog():
+    """Drop this process's snapshot and tell the other processes to rebuild."""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+    try:
+        if not cache.add(GENERATION_KEY, 1, None):
+            cache.incr(GENERATION_KEY)
+    except Exception as exc:
+        logger.warning(f"Could not publish catalog change, other workers keep their snapshot: {exc}")
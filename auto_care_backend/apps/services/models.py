@@ -1,3 +1,29 @@
 from django.db import models
 
-# Create your models here.
+from apps.bookings.models import Booking
+
+
+class Service(models.Model):
+    """
+    One bookable service for one vehicle type (e.g. "Foam wash" for cars).
+    Read through the in-process snapshot in `apps.services.catalog`, never
+    queried per request.
+    """
+    code = models.SlugField(max_length=50)
+    name = models.CharField(max_length=100)
+    description = models.TextField(blank=True)
+    vehicle_type = models.CharField(max_length=10, choices=Booking.VEHICLE_CHOICES)
+    duration_minutes = models.PositiveIntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    active = models.BooleanField(default=True)
+    sort_order = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['vehicle_type', 'sort_order', 'name']
+        constraints = [
+            models.UniqueConstraint(fields=['code', 'vehicle_type'], name='unique_service_code_per_vehicle'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_vehicle_type_display()})"
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.services.catalog import invalidate_catalog
+from apps.services.models import Service
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def service_changed(sender, **kwargs):
+    """Rebuild catalog snapshots once the change is committed."""
+    transaction.on_commit(invalidate_catalog)
@@ -1,3 +1,156 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from apps.bookings.api.serializers import BookingSerializer
+from apps.services import catalog
+from apps.services.catalog import CatalogSnapshot
+from apps.services.models import Service
+
+
+def service_row(service_id, vehicle_type="car", price="499.00", **fields):
+    return {
+        "id": service_id, "code": f"wash-{service_id}", "name": f"Wash {service_id}", "description": "",
+        "vehicle_type": vehicle_type, "duration_minutes": 30, "price": price, "sort_order": 0, **fields,
+    }
+
+
+class CatalogSnapshotTests(SimpleTestCase):
+    """Lookups and the content-hash version."""
+
+    def test_lookups(self):
+        snapshot = CatalogSnapshot([service_row(1), service_row(2, "bike")])
+
+        self.assertEqual(snapshot.get(2)["vehicle_type"], "bike")
+        self.assertIsNone(snapshot.get(3))
+        self.assertEqual([service["id"] for service in snapshot.for_vehicle("car")], [1])
+        self.assertTrue(snapshot.offers_vehicle("bike"))
+        self.assertFalse(snapshot.offers_vehicle("suv"))
+
+    def test_empty_catalog_does_not_restrict_vehicle_types(self):
+        self.assertTrue(CatalogSnapshot([]).offers_vehicle("suv"))
+
+    def test_version_depends_only_on_content(self):
+        snapshot = CatalogSnapshot([service_row(1)], generation=1)
+
+        # Same content in another process (other generation): same version and ETag
+        self.assertEqual(CatalogSnapshot([service_row(1)], generation=7).etag, snapshot.etag)
+        self.assertEqual(snapshot.etag, f'"{snapshot.version}"')
+        self.assertNotEqual(CatalogSnapshot([service_row(1, price="549.00")]).version, snapshot.version)
+
+
+@override_settings(SERVICE_CATALOG_CHECK_SECONDS=0)
+class CatalogCacheTests(TestCase):
+    """The snapshot is rebuilt when the shared generation moves, and served with ETag/304."""
+
+    def setUp(self):
+        catalog.invalidate_catalog()
+        self.addCleanup(catalog.invalidate_catalog)
+        self.wash = Service.objects.create(
+            code="foam-wash", name="Foam wash", vehicle_type="car", duration_minutes=45, price=Decimal("499.00"),
+        )
+        Service.objects.create(
+            code="bike-wash", name="Bike wash", vehicle_type="bike", duration_minutes=20, price=Decimal("199.00"),
+        )
+        self.client = APIClient()
+
+    def test_committed_save_and_delete_bump_the_shared_generation(self):
+        before = cache.get(catalog.GENERATION_KEY, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wash.save()
+        self.assertEqual(cache.get(catalog.GENERATION_KEY), before + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wash.delete()
+        self.assertEqual(cache.get(catalog.GENERATION_KEY), before + 2)
+        self.assertIsNone(catalog.get_catalog().get(self.wash.pk))
+
+    def test_other_processes_rebuild_on_a_new_generation(self):
+        snapshot = catalog.get_catalog()
+        self.assertIsNotNone(snapshot.get(self.wash.pk))
+
+        # Another worker deactivates the service: no signal reaches this process
+        Service.objects.filter(pk=self.wash.pk).update(active=False)
+        self.assertIs(catalog.get_catalog(), snapshot)
+
+        cache.incr(catalog.GENERATION_KEY)
+        self.assertIsNone(catalog.get_catalog().get(self.wash.pk))
+
+    def test_matching_etag_returns_304(self):
+        response = self.client.get("/api/services/catalog/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(response["ETag"], f'"{response.data["version"]}"')
+
+        for header in (f'"stale", {response["ETag"]}', f'W/{response["ETag"]}', "*"):
+            cached = self.client.get("/api/services/catalog/", HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(cached.status_code, 304, header)
+            self.assertEqual(cached["ETag"], response["ETag"])
+
+    def test_vehicle_filter_has_its_own_etag(self):
+        full = self.client.get("/api/services/catalog/")
+        bikes = self.client.get("/api/services/catalog/", {"vehicle_type": "bike"})
+
+        self.assertEqual(bikes["ETag"], f'"{full.data["version"]}-bike"')
+        self.assertEqual([service["code"] for service in bikes.data["services"]], ["bike-wash"])
+        self.assertEqual(
+            self.client.get("/api/services/catalog/", {"vehicle_type": "bike"}, HTTP_IF_NONE_MATCH=full["ETag"]).status_code,
+            200,
+        )
+        self.assertEqual(self.client.get("/api/services/catalog/", {"vehicle_type": "truck"}).status_code, 400)
+
+    def test_change_moves_the_etag(self):
+        etag = self.client.get("/api/services/catalog/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wash.price = Decimal("549.00")
+            self.wash.save()
+
+        response = self.client.get("/api/services/catalog/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+@override_settings(SERVICE_CATALOG_CHECK_SECONDS=0)
+class CatalogServiceValidationTests(TestCase):
+    """Booking serializer checks the service and vehicle type against the snapshot."""
+
+    def setUp(self):
+        catalog.invalidate_catalog()
+        self.addCleanup(catalog.invalidate_catalog)
+
+    def validate(self, **data):
+        BookingSerializer().validate_catalog_service(data)
+
+    def add_service(self, code, vehicle_type="car", active=True):
+        service = Service.objects.create(
+            code=code, name=code, vehicle_type=vehicle_type, duration_minutes=30, price=Decimal("499.00"), active=active,
+        )
+        catalog.invalidate_catalog()
+        return service
+
+    def assertRejected(self, field, message, **data):
+        with self.assertRaises(serializers.ValidationError) as ctx:
+            self.validate(**data)
+        self.assertIn(message, str(ctx.exception.detail[field]))
+
+    def test_empty_catalog_does_not_restrict(self):
+        self.validate(vehicle_type="suv")
+        self.validate(vehicle_type="car", service_id=None)
+
+    def test_unknown_and_inactive_services_are_rejected(self):
+        wash = self.add_service("foam-wash")
+        retired = self.add_service("wax", active=False)
+
+        self.validate(vehicle_type="car", service_id=wash.pk)
+        self.assertRejected("service", "Unknown or inactive", vehicle_type="car", service_id=retired.pk)
+        self.assertRejected("service", "Unknown or inactive", vehicle_type="car", service_id=wash.pk + 100)
+
+    def test_vehicle_type_must_be_offered_and_match_the_service(self):
+        wash = self.add_service("foam-wash")
+        self.add_service("bike-wash", vehicle_type="bike")
+
+        self.assertRejected("vehicle_type", "No services", vehicle_type="suv")
+        self.assertRejected("service", "not available for this vehicle type", vehicle_type="bike", service_id=wash.pk)
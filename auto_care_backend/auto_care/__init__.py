@@ -1,2 +1,11 @@
-from .celery import app as celery_app
+# The Celery app is loaded on first use rather than with Django: web workers
+# only need it when they queue a task (each tasks module imports
+# auto_care.celery), and `celery -A auto_care` finds auto_care.celery itself.
 __all__ = ('celery_app',)
+
+
+def __getattr__(name):
+    if name == 'celery_app':
+        from .celery import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,21 +1,40 @@
+import logging
 import os
-import django
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
+
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'auto_care.settings')
-django.setup()
 
+# Sets up Django; must run before anything that imports models
 django_asgi_app = get_asgi_application()
 
-import apps.bookings.routing as booking_routing  # you will create this
+logger = logging.getLogger(__name__)
+
+_websocket_app = None
+
+
+def _load_websocket_app():
+    """
+    Build the Channels websocket stack on the first websocket connection, so
+    HTTP-only workers never import channels.auth or the websocket routes.
+    """
+    global _websocket_app
+    if _websocket_app is None:
+        from channels.auth import AuthMiddlewareStack
+        from channels.routing import URLRouter
+
+        try:
+            import apps.bookings.routing as booking_routing
+            websocket_urlpatterns = booking_routing.websocket_urlpatterns
+        except ImportError as exc:
+            logger.warning(f"No websocket routes available: {exc}")
+            websocket_urlpatterns = []
+
+        _websocket_app = AuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+    return _websocket_app
+
 
-application = ProtocolTypeRouter({
-    "http": django_asgi_app,
-    "websocket": AuthMiddlewareStack(
-        URLRouter(
-            booking_routing.websocket_urlpatterns
-        )
-    ),
-})
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        return await _load_websocket_app()(scope, receive, send)
+    return await django_asgi_app(scope, receive, send)
@@ -0,0 +1,16 @@
+"""
+If-None-Match handling for views that compute their own ETags.
+
+Views with a cheap content version (catalog, coverage snapshot) answer
+revalidation themselves instead of going through ConditionalGetMiddleware,
+which would need the full response body first. If-None-Match uses weak
+comparison (RFC 9110 13.1.2), so `W/"v1"` matches `"v1"`, and `*` matches
+any current representation.
+"""
+from django.utils.http import parse_etags
+
+
+def etag_matches(request, etag):
+    """True if the request's If-None-Match lists `etag` or is `*`."""
+    tags = parse_etags(request.headers.get("If-None-Match", ""))
+    return tags == ["*"] or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
@@ -0,0 +1,144 @@
+"""
+Row-count helpers for large tables.
+
+`COUNT(*)` over millions of rows is a sequential scan in PostgreSQL. For big
+result sets we use planner statistics instead: `pg_class.reltuples` for an
+unfiltered table, or the row estimate from `EXPLAIN` for a filtered queryset.
+Small results (below `ESTIMATED_COUNT_THRESHOLD`) are always counted exactly.
+
+Views pick a strategy and get a `CountResult` that says how the number was
+obtained, so responses can flag estimates:
+
+* `count_rows()` - exact for small sets, planner estimate for large ones;
+* `cached_count()` - totals shown on every request, computed at most once
+  per COUNT_CACHE_SECONDS across workers (may lag recent writes).
+"""
+import json
+import logging
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from auto_care.singleflight import cached_single_flight
+
+logger = logging.getLogger(__name__)
+
+
+def table_estimate(model, using="default"):
+    """Planner estimate of the total rows in `model`'s table, or None."""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 until the table has been analyzed
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def plan_estimate(queryset):
+    """Row estimate from `EXPLAIN` for a (filtered) queryset, or None."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except Exception:  # EmptyResultSet and friends - let COUNT handle it
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimated_count(queryset, threshold=None):
+    """
+    Return `(count, is_estimate)` for `queryset`.
+
+    Uses the table statistics for unfiltered querysets, the query plan for
+    filtered ones, and falls back to an exact `COUNT(*)` when the estimate is
+    below `threshold` or no estimate is available.
+    """
+    threshold = settings.ESTIMATED_COUNT_THRESHOLD if threshold is None else threshold
+
+    if queryset.query.is_sliced or queryset.query.distinct:
+        return queryset.count(), False
+
+    if not queryset.query.where:
+        estimate = table_estimate(queryset.model, using=queryset.db)
+    else:
+        estimate = plan_estimate(queryset)
+
+    if estimate is None or estimate < threshold:
+        return queryset.count(), False
+    return estimate, True
+
+
+class CountResult:
+    """A row count and how it was obtained: "exact", "estimate" or "cached"."""
+
+    __slots__ = ("value", "strategy")
+
+    def __init__(self, value, strategy):
+        self.value = value
+        self.strategy = strategy
+
+    @property
+    def is_estimate(self):
+        return self.strategy != "exact"
+
+    def as_dict(self, key="count"):
+        """Response fields, e.g. {"count": 120000, "count_is_estimate": True}."""
+        return {key: self.value, f"{key}_is_estimate": self.is_estimate}
+
+
+def count_rows(queryset, threshold=None):
+    """Exact count for small (or unestimable) sets, planner estimate for large ones."""
+    count, is_estimate = estimated_count(queryset, threshold)
+    return CountResult(count, "estimate" if is_estimate else "exact")
+
+
+def cached_count(key, queryset, seconds=None, threshold=None):
+    """
+    `count_rows()` for a total that every request shows (e.g. an unfiltered
+    staff list), shared through the cache for COUNT_CACHE_SECONDS. Always
+    flagged as an estimate: it can lag writes made since it was computed.
+    """
+    seconds = settings.COUNT_CACHE_SECONDS if seconds is None else seconds
+    count = cached_single_flight(
+        f"counts:{key}",
+        lambda: count_rows(queryset, threshold).value,
+        fresh_seconds=seconds,
+    )
+    return CountResult(count, "cached")
+
+
+class EstimatedCount(int):
+    """A row count that is a planner estimate; renders as "~N" (e.g. admin result counts)."""
+
+    def __str__(self):
+        return f"~{int(self)}"
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator (admin changelists) that avoids exact COUNT(*) on big tables.
+    An estimated count comes back as an EstimatedCount, so the changelist's
+    "N results" line shows "~N" while page arithmetic stays numeric.
+    """
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, "query"):
+            return super().count
+        result = count_rows(self.object_list)
+        return EstimatedCount(result.value) if result.is_estimate else result.value
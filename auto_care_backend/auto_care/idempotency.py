@@ -0,0 +1,134 @@
+"""
+`Idempotency-Key` support for POST endpoints.
+
+A client that retries a request with the same `Idempotency-Key` header gets
+the first response replayed instead of having the work redone. Responses are
+stored in the default cache under (client, key) for `IDEMPOTENCY_TTL_SECONDS`.
+The client is the authenticated user; anonymous endpoints name it through
+the view's `get_idempotency_scope(request)` (SendOTPView uses the mobile
+number), falling back to the client IP.
+While the first request is still running, a cache lock (`cache.add`) makes
+concurrent duplicates wait for its result, answering 409 only if it takes
+longer than `IDEMPOTENCY_WAIT_SECONDS`.
+
+A key reused for a different request body or endpoint is rejected with 422.
+Server errors (5xx) and 429s are not stored, so a retry re-executes them.
+"""
+from functools import wraps
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+_POLL_INTERVAL = 0.05
+
+
+def _scope(view, request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    get_scope = getattr(view, "get_idempotency_scope", None)
+    scope = get_scope(request) if get_scope is not None else None
+    if scope:
+        return f"anon:{scope}"
+    # Same client identity as the throttles (honours NUM_PROXIES)
+    return f"ip:{BaseThrottle().get_ident(request)}"
+
+
+def _fingerprint(request):
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _cache_keys(scope, key):
+    hashed = hashlib.sha256(f"{scope}\n{key}".encode()).hexdigest()
+    base = f"idempotency:{hashed}"
+    return f"{base}:response", f"{base}:lock"
+
+
+def _should_store(response):
+    return response.status_code < 500 and response.status_code != status.HTTP_429_TOO_MANY_REQUESTS
+
+
+def _replay(stored, fingerprint):
+    if stored["fingerprint"] != fingerprint:
+        return Response(
+            {"error": f"{IDEMPOTENCY_HEADER} was already used for a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(stored["data"], status=stored["status"])
+    response[REPLAY_HEADER] = "true"
+    return response
+
+
+def _wait_for_response(response_key):
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(_POLL_INTERVAL)
+        stored = cache.get(response_key)
+        if stored is not None:
+            return stored
+    return None
+
+
+def idempotent(view_method):
+    """
+    Decorate an APIView handler (e.g. `post`) to honour `Idempotency-Key`.
+    Requests without the header are handled normally.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"error": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = _fingerprint(request)
+        scope = _scope(self, request)
+        response_key, lock_key = _cache_keys(scope, key)
+
+        stored = cache.get(response_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        if not cache.add(lock_key, fingerprint, settings.IDEMPOTENCY_LOCK_SECONDS):
+            # A duplicate is in flight - wait for its response instead of redoing the work
+            stored = _wait_for_response(response_key)
+            if stored is not None:
+                return _replay(stored, fingerprint)
+            logger.warning(f"Idempotent request still in progress for {scope}")
+            return Response(
+                {"error": f"A request with this {IDEMPOTENCY_HEADER} is still in progress"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+            if _should_store(response):
+                cache.set(
+                    response_key,
+                    {"fingerprint": fingerprint, "status": response.status_code, "data": response.data},
+                    settings.IDEMPOTENCY_TTL_SECONDS,
+                )
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    return wrapper
@@ -0,0 +1,84 @@
+"""
+Parsing and summarising `python -X importtime` output.
+
+Used by `manage.py startup_profile` to find the modules that dominate
+worker cold start. Times are in microseconds, as reported by CPython.
+"""
+from collections import defaultdict
+import re
+import subprocess
+import sys
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+# What each profile target imports in a fresh interpreter
+TARGETS = {
+    "setup": "import django; django.setup()",
+    "wsgi": "import auto_care.wsgi",
+    "asgi": "import auto_care.asgi",
+    "urls": (
+        "import django; django.setup(); "
+        "from django.conf import settings; from django.urls import get_resolver; "
+        "get_resolver(settings.ROOT_URLCONF).url_patterns"
+    ),
+    "celery": "from auto_care.celery import app; app.loader.import_default_modules()",
+}
+
+
+class ImportRecord:
+    __slots__ = ("module", "self_us", "cumulative_us", "depth")
+
+    def __init__(self, module, self_us, cumulative_us, depth):
+        self.module = module
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.depth = depth
+
+    @property
+    def package(self):
+        """Top-level package, or `apps.<app>` for project apps."""
+        parts = self.module.split(".")
+        return ".".join(parts[:2]) if parts[0] == "apps" and len(parts) > 1 else parts[0]
+
+
+def parse_importtime(output):
+    records = []
+    for line in output.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return records
+
+
+def run_importtime(target, settings_module, python=None):
+    """Import `target` in a fresh interpreter. Returns (records, wall_seconds)."""
+    code = (
+        "import os, time; "
+        f"os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings_module!r}); "
+        "start = time.perf_counter(); "
+        f"{TARGETS[target]}; "
+        "print(time.perf_counter() - start)"
+    )
+    result = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        tail = "\n".join(line for line in result.stderr.splitlines() if not line.startswith("import time:"))
+        raise RuntimeError(f"Importing target '{target}' failed:\n{tail[-2000:]}")
+    return parse_importtime(result.stderr), float(result.stdout.strip().splitlines()[-1])
+
+
+def top_modules(records, limit, key="cumulative_us"):
+    return sorted(records, key=lambda record: getattr(record, key), reverse=True)[:limit]
+
+
+def package_totals(records):
+    """[(package, self_us, module_count)] sorted by total self time."""
+    totals = defaultdict(lambda: [0, 0])
+    for record in records:
+        totals[record.package][0] += record.self_us
+        totals[record.package][1] += 1
+    return sorted(((name, us, count) for name, (us, count) in totals.items()), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,640 @@
+"""
+Index advice from real PostgreSQL query plans.
+
+Used by `manage.py index_advisor`. The corpus is NDJSON of executed
+statements with their parameters (written by `auto_care.querycorpus`);
+repeated statements are folded by normalized SQL. Each distinct statement
+is replayed once with EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) inside a
+transaction that is rolled back.
+
+EXPLAIN ANALYZE really executes the statement: captured writes and
+SELECT ... FOR UPDATE take their locks, fire triggers and advance sequences
+before the rollback. Run the advisor against a restored copy or a staging
+database, never production.
+
+From the plans:
+
+- Seq scans that throw away most of the rows they read are index
+  candidates. The filter columns become the key: equality columns first
+  (most distinct values first, per pg_stats), then one range column, then
+  the keys of a Sort directly above the scan. An equality/IN on a
+  low-cardinality column whose values cover a minority of the table (e.g.
+  status IN ('pending', 'confirmed')) becomes a partial-index predicate.
+- Indexes on the tables the corpus touched that no plan used are listed
+  with their size and pg_stat_user_indexes scan count. A corpus only covers
+  what it exercised, so these are leads, not verdicts.
+
+Estimated benefit: with the hypopg extension installed, every statement a
+candidate serves is re-planned with the candidate as a hypothetical index
+and the drop in planner cost is reported. Without it, the benefit is the
+time the replaced seq scans took (an upper bound).
+
+Partitions are reported under their parent table, and partition indexes
+under their parent index.
+"""
+import json
+import re
+
+from django.apps import apps
+from django.db import DatabaseError, transaction
+from django.db.models import Index, Q
+
+from auto_care.querybudget import normalize_sql
+
+REPLAYABLE = ("select", "with", "insert", "update", "delete")
+INDEX_SCANS = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+SORTS = ("Sort", "Incremental Sort")
+
+# A filter column with at most this many distinct values, whose filtered
+# values cover at most this share of the rows, becomes a partial predicate
+PARTIAL_MAX_DISTINCT = 20
+PARTIAL_MAX_FRACTION = 0.5
+
+_CONDITION_RE = re.compile(
+    r"""^\(*(?:"?\w+"?\.)?"?(?P<column>\w+)"?\)?(?:::[\w ]+?)?
+    \s+(?P<op>=\sANY|=|>=|<=|>|<|IS\sNULL|IS\sNOT\sNULL)
+    \s*(?P<value>.*)$""",
+    re.VERBOSE,
+)
+_LITERAL_RE = re.compile(r"^'(?P<text>(?:[^']|'')*)'(?:::[\w ]+(?:\[\])?)?$|^(?P<number>-?\d+(?:\.\d+)?)$")
+_PARAM_RE = re.compile(r"^\$\d+$")
+_COLUMN_REF_RE = re.compile(r'^(?:"?\w+"?\.)?"?[A-Za-z_]\w*"?$')
+_CAST_RE = re.compile(r"::[\w ]+?(?:\[\])?(?=\)|$)")
+_SORT_KEY_RE = re.compile(r'^(?:"?\w+"?\.)?"?(?P<column>\w+)"?(?P<desc>\s+DESC)?')
+_RANGE_OPS = (">=", "<=", ">", "<")
+
+
+# -------------------
+# Corpus
+# -------------------
+class CorpusStatement:
+    __slots__ = ("fingerprint", "sql", "params", "executions", "sites", "plan", "cost", "error")
+
+    def __init__(self, fingerprint, sql, params):
+        self.fingerprint = fingerprint
+        self.sql = sql
+        self.params = params
+        self.executions = 0
+        self.sites = set()
+        self.plan = None
+        self.cost = None
+        self.error = None
+
+
+def load_corpus(paths):
+    """Distinct replayable statements from NDJSON corpus files, with execution counts."""
+    statements = {}
+    for path in paths:
+        with open(path) as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                sql = entry["sql"]
+                if not sql.lstrip().lower().startswith(REPLAYABLE):
+                    continue
+                fingerprint = normalize_sql(sql)
+                statement = statements.get(fingerprint)
+                if statement is None:
+                    statement = statements[fingerprint] = CorpusStatement(fingerprint, sql, entry.get("params") or [])
+                statement.executions += 1
+                if entry.get("site"):
+                    statement.sites.add(entry["site"])
+    return list(statements.values())
+
+
+# -------------------
+# Plan parsing
+# -------------------
+def walk_plan(node, parent=None):
+    """Yield (node, parent) for every node of an EXPLAIN JSON plan."""
+    yield node, parent
+    for child in node.get("Plans", ()):
+        yield from walk_plan(child, node)
+
+
+def _unwrap(text):
+    """Strip parentheses that enclose the whole expression."""
+    text = text.strip()
+    while text.startswith("(") and text.endswith(")"):
+        depth = 0
+        for position, char in enumerate(text):
+            depth += char == "("
+            depth -= char == ")"
+            if depth == 0 and position < len(text) - 1:
+                return text
+        text = text[1:-1].strip()
+    return text
+
+
+def _split_top_level(text, keyword):
+    parts, depth, start, quoted = [], 0, 0, False
+    position = 0
+    while position < len(text):
+        char = text[position]
+        if char == "'":
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and text.startswith(keyword, position):
+            parts.append(text[start:position])
+            start = position = position + len(keyword)
+            continue
+        position += 1
+    parts.append(text[start:])
+    return parts
+
+
+def _literal_values(op, value):
+    """
+    Literal values of a condition's right-hand side; None for $n params and
+    expressions like now(), False for a column (a join condition).
+    """
+    value = _unwrap(value)
+    if _PARAM_RE.match(value):
+        return None
+    if value in ("true", "false"):
+        return (value,)
+    match = _LITERAL_RE.match(value)
+    if not match:
+        bare = _unwrap(_CAST_RE.sub("", value))
+        return False if _COLUMN_REF_RE.match(bare) else None
+    if match.group("number") is not None:
+        return (match.group("number"),)
+    text = match.group("text").replace("''", "'")
+    if op == "= ANY":
+        return tuple(item.strip().strip('"') for item in text.strip("{}").split(","))
+    return (text,)
+
+
+class Condition:
+    __slots__ = ("column", "kind", "values")
+
+    def __init__(self, column, kind, values):
+        self.column = column
+        self.kind = kind  # "eq" (=, IN, IS NULL) or "range"
+        self.values = values  # literal values, () for IS NULL, None if not literal
+
+
+def parse_filter(expression):
+    """
+    Index-usable conditions of a plan Filter. Conjuncts that are ORs,
+    column-to-column comparisons or operators btree cannot use are skipped.
+    """
+    conditions = []
+    for conjunct in _split_top_level(_unwrap(expression or ""), " AND "):
+        conjunct = _unwrap(conjunct)
+        if not conjunct or len(_split_top_level(conjunct, " OR ")) > 1:
+            continue
+        match = _CONDITION_RE.match(conjunct)
+        if not match:
+            continue
+        op = " ".join(match.group("op").split())
+        if op == "IS NULL":
+            conditions.append(Condition(match.group("column"), "eq", ()))
+            continue
+        if op == "IS NOT NULL":
+            continue
+        values = _literal_values(op, match.group("value"))
+        if values is False:
+            continue
+        kind = "range" if op in _RANGE_OPS else "eq"
+        conditions.append(Condition(match.group("column"), kind, values if kind == "eq" else None))
+    return conditions
+
+
+def parse_sort_keys(keys):
+    columns = []
+    for key in keys or ():
+        match = _SORT_KEY_RE.match(key.strip())
+        if not match:
+            break
+        columns.append((match.group("column"), bool(match.group("desc"))))
+    return columns
+
+
+# -------------------
+# Results
+# -------------------
+class SeqScan:
+    __slots__ = ("table", "relation", "filter", "rows_returned", "rows_removed", "time_ms", "buffers", "statement")
+
+    def __init__(self, table, node, statement):
+        loops = node.get("Actual Loops", 1) or 1
+        self.table = table
+        self.relation = node.get("Relation Name")
+        self.filter = node.get("Filter")
+        self.rows_returned = node.get("Actual Rows", 0) * loops
+        self.rows_removed = node.get("Rows Removed by Filter", 0) * loops
+        self.time_ms = node.get("Actual Total Time", 0.0) * loops
+        self.buffers = node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0)
+        self.statement = statement
+
+    @property
+    def filtered_share(self):
+        read = self.rows_returned + self.rows_removed
+        return self.rows_removed / read if read else 0.0
+
+
+class IndexCandidate:
+    """A suggested index and the statements whose seq scans it would replace."""
+
+    def __init__(self, table, columns, predicate):
+        self.table = table
+        self.columns = tuple(columns)  # ((column, descending), ...)
+        self.predicate = tuple(predicate)  # ((column, values), ...); () values = IS NULL
+        self.statements = []
+        self.scans = []
+        self.covered_by = None
+        self.cost_before = None
+        self.cost_after = None
+
+    @property
+    def key(self):
+        return (self.table, self.columns, self.predicate)
+
+    @property
+    def executions(self):
+        return sum(statement.executions for statement in self.statements)
+
+    @property
+    def seq_scan_ms(self):
+        """Seq scan time over the whole corpus (per-statement time x executions)."""
+        return sum(scan.time_ms * scan.statement.executions for scan in self.scans)
+
+    @property
+    def benefit_pct(self):
+        if not self.cost_before or self.cost_after is None:
+            return None
+        return max(0.0, (self.cost_before - self.cost_after) / self.cost_before * 100)
+
+    def add(self, scan):
+        self.scans.append(scan)
+        if scan.statement not in self.statements:
+            self.statements.append(scan.statement)
+
+    def predicate_sql(self, connection):
+        clauses = []
+        for column, values in self.predicate:
+            name = connection.ops.quote_name(column)
+            if not values:
+                clauses.append(f"{name} IS NULL")
+            elif len(values) == 1:
+                clauses.append(f"{name} = {_quote_literal(values[0])}")
+            else:
+                clauses.append(f"{name} IN ({', '.join(_quote_literal(value) for value in values)})")
+        return " AND ".join(clauses)
+
+    def create_sql(self, connection, name="index_advisor_candidate"):
+        quote = connection.ops.quote_name
+        columns = ", ".join(quote(column) + (" DESC" if descending else "") for column, descending in self.columns)
+        sql = f"CREATE INDEX {quote(name)} ON {quote(self.table)} ({columns})"
+        if self.predicate:
+            sql += f" WHERE {self.predicate_sql(connection)}"
+        return sql
+
+    def describe(self):
+        columns = ", ".join(column + (" DESC" if descending else "") for column, descending in self.columns)
+        text = f"{self.table} ({columns})"
+        if self.predicate:
+            text += " WHERE " + " AND ".join(
+                f"{column} IS NULL" if not values else f"{column} IN ({', '.join(values)})"
+                for column, values in self.predicate
+            )
+        return text
+
+
+def _quote_literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class ExistingIndex:
+    __slots__ = ("name", "table", "columns", "predicate", "primary", "unique", "size_bytes", "scans", "used")
+
+    def __init__(self, name, table, columns, predicate, primary, unique, size_bytes, scans):
+        self.name = name
+        self.table = table
+        self.columns = tuple(column for column in columns if column)
+        self.predicate = predicate
+        self.primary = primary
+        self.unique = unique
+        self.size_bytes = size_bytes
+        self.scans = scans
+        self.used = False
+
+
+class ColumnStats:
+    __slots__ = ("distinct", "frequencies")
+
+    def __init__(self, distinct, frequencies):
+        self.distinct = distinct
+        self.frequencies = frequencies
+
+
+# -------------------
+# Advisor
+# -------------------
+_PARENTS_SQL = """
+    SELECT child.relname, parent.relname
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+"""
+
+_INDEXES_SQL = """
+    SELECT
+        index_class.relname,
+        table_class.relname,
+        ARRAY(
+            SELECT attribute.attname
+            FROM unnest(pg_index.indkey) WITH ORDINALITY AS key(attnum, position)
+            LEFT JOIN pg_attribute attribute
+                ON attribute.attrelid = table_class.oid AND attribute.attnum = key.attnum
+            ORDER BY key.position
+        ),
+        pg_get_expr(pg_index.indpred, pg_index.indrelid),
+        pg_index.indisprimary,
+        pg_index.indisunique,
+        pg_relation_size(index_class.oid) + COALESCE((
+            SELECT SUM(pg_relation_size(pg_inherits.inhrelid))
+            FROM pg_inherits WHERE pg_inherits.inhparent = index_class.oid
+        ), 0),
+        COALESCE(stats.idx_scan, 0) + COALESCE((
+            SELECT SUM(child_stats.idx_scan)
+            FROM pg_inherits
+            JOIN pg_stat_user_indexes child_stats ON child_stats.indexrelid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = index_class.oid
+        ), 0)
+    FROM pg_index
+    JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+    JOIN pg_class table_class ON table_class.oid = pg_index.indrelid
+    LEFT JOIN pg_stat_user_indexes stats ON stats.indexrelid = pg_index.indexrelid
+    WHERE table_class.relname = ANY(%s)
+      AND table_class.relnamespace = to_regnamespace(current_schema())
+"""
+
+_STATS_SQL = """
+    SELECT attname, n_distinct, most_common_vals::text, most_common_freqs
+    FROM pg_stats
+    WHERE schemaname = current_schema() AND tablename = %s
+    ORDER BY inherited DESC
+"""
+
+
+class IndexAdvisor:
+    def __init__(self, connection, min_rows=1000, min_filtered=0.8):
+        if connection.vendor != "postgresql":
+            raise RuntimeError("The index advisor needs PostgreSQL (EXPLAIN ANALYZE, pg_stats).")
+        self.connection = connection
+        self.min_rows = min_rows
+        self.min_filtered = min_filtered
+        self.statements = []
+        self.seq_scans = []
+        self.used_indexes = set()
+        self.candidates = []
+        self.unused_indexes = []
+        self.hypothetical = False
+        self._parents = None
+        self._table_rows = {}
+        self._column_stats = {}
+        self._indexes = None
+
+    # Catalog lookups
+    def _parent(self, name):
+        if self._parents is None:
+            with self.connection.cursor() as cursor:
+                cursor.execute(_PARENTS_SQL)
+                self._parents = dict(cursor.fetchall())
+        while name in self._parents:
+            name = self._parents[name]
+        return name
+
+    def table_rows(self, table):
+        if table not in self._table_rows:
+            with self.connection.cursor() as cursor:
+                # A partitioned parent has no rows of its own: sum its partitions
+                cursor.execute(
+                    "SELECT COALESCE(SUM(GREATEST(reltuples, 0)), 0)::bigint FROM pg_class "
+                    "WHERE oid = to_regclass(%s) OR oid IN "
+                    "(SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(%s))",
+                    [self.connection.ops.quote_name(table)] * 2,
+                )
+                self._table_rows[table] = cursor.fetchone()[0]
+        return self._table_rows[table]
+
+    def column_stats(self, table):
+        if table not in self._column_stats:
+            rows = self.table_rows(table)
+            stats = {}
+            with self.connection.cursor() as cursor:
+                cursor.execute(_STATS_SQL, [table])
+                for column, n_distinct, common_values, common_freqs in cursor.fetchall():
+                    if column in stats:
+                        continue
+                    distinct = -n_distinct * rows if n_distinct < 0 else n_distinct
+                    values = [value.strip('"') for value in (common_values or "{}").strip("{}").split(",") if value]
+                    stats[column] = ColumnStats(distinct, dict(zip(values, common_freqs or ())))
+            self._column_stats[table] = stats
+        return self._column_stats[table]
+
+    def existing_indexes(self, tables):
+        if self._indexes is None:
+            with self.connection.cursor() as cursor:
+                cursor.execute(_INDEXES_SQL, [sorted(tables)])
+                self._indexes = [ExistingIndex(*row) for row in cursor.fetchall()]
+        return self._indexes
+
+    # Replay
+    def explain(self, statement):
+        """EXPLAIN ANALYZE one statement in a rolled-back transaction."""
+        try:
+            with transaction.atomic(using=self.connection.alias):
+                with self.connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement.sql}", statement.params)
+                    plan = cursor.fetchone()[0]
+                transaction.set_rollback(True, using=self.connection.alias)
+        except DatabaseError as exc:
+            statement.error = str(exc).strip().splitlines()[0]
+            return None
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        statement.plan = plan[0]["Plan"]
+        return statement.plan
+
+    def plan_cost(self, statement):
+        """Planner total cost (no execution), or None if it cannot be planned."""
+        try:
+            with transaction.atomic(using=self.connection.alias):
+                with self.connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN (FORMAT JSON) {statement.sql}", statement.params)
+                    plan = cursor.fetchone()[0]
+        except DatabaseError:
+            return None
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]["Total Cost"]
+
+    def replay(self, statements):
+        self.statements = statements
+        for statement in statements:
+            plan = self.explain(statement)
+            if plan is None:
+                continue
+            for node, parent in walk_plan(plan):
+                if node.get("Node Type") in INDEX_SCANS and node.get("Index Name"):
+                    self.used_indexes.add(self._parent(node["Index Name"]))
+                if node.get("Node Type") == "Seq Scan" and node.get("Relation Name"):
+                    scan = SeqScan(self._parent(node["Relation Name"]), node, statement)
+                    self.seq_scans.append(scan)
+                    self._suggest(scan, node, parent)
+
+    # Suggestions
+    def _suggest(self, scan, node, parent):
+        if scan.filtered_share < self.min_filtered or self.table_rows(scan.table) < self.min_rows:
+            return
+        conditions = parse_filter(scan.filter)
+        if not conditions:
+            return
+
+        stats = self.column_stats(scan.table)
+        rows = self.table_rows(scan.table) or 1
+        predicate, equality, ranges = [], [], []
+        for condition in conditions:
+            column_stats = stats.get(condition.column)
+            if condition.kind == "range":
+                ranges.append(condition.column)
+                continue
+            if condition.values and column_stats and column_stats.distinct <= PARTIAL_MAX_DISTINCT:
+                share = sum(column_stats.frequencies.get(value, 1 / rows) for value in condition.values)
+                if share <= PARTIAL_MAX_FRACTION:
+                    predicate.append((condition.column, tuple(sorted(condition.values))))
+                    continue
+            distinct = column_stats.distinct if column_stats else 0
+            equality.append((distinct, condition.column))
+
+        columns = [(column, False) for _, column in sorted(equality, key=lambda item: -item[0])]
+        seen = {column for column, _ in columns}
+        if ranges:
+            columns.append((ranges[0], False))
+            seen.add(ranges[0])
+        elif parent is not None and parent.get("Node Type") in SORTS:
+            # Equality prefix + sort keys lets the index return rows already ordered
+            columns.extend(key for key in parse_sort_keys(parent.get("Sort Key")) if key[0] not in seen)
+        if not columns:
+            # Only the predicate column is filtered on: index it directly
+            columns = [(column, False) for column, _ in predicate]
+            predicate = []
+
+        candidate = IndexCandidate(scan.table, columns, sorted(set(predicate)))
+        for existing in self.candidates:
+            if existing.key == candidate.key:
+                candidate = existing
+                break
+        else:
+            self.candidates.append(candidate)
+        candidate.add(scan)
+
+    def finish(self, hypothetical=True):
+        """Match candidates against existing indexes, estimate benefit, list unused indexes."""
+        tables = {scan.table for scan in self.seq_scans}
+        for statement in self.statements:
+            if statement.plan is not None:
+                for node, _ in walk_plan(statement.plan):
+                    if node.get("Relation Name"):
+                        tables.add(self._parent(node["Relation Name"]))
+        if not tables:
+            return
+
+        indexes = self.existing_indexes(tables)
+        for index in indexes:
+            index.used = index.name in self.used_indexes
+        for candidate in self.candidates:
+            wanted = tuple(column for column, _ in candidate.columns)
+            for index in indexes:
+                if index.table == candidate.table and index.columns[:len(wanted)] == wanted and not index.predicate:
+                    candidate.covered_by = index.name
+                    break
+
+        self.unused_indexes = sorted(
+            (index for index in indexes if not index.used and not index.primary and not index.unique),
+            key=lambda index: -index.size_bytes,
+        )
+
+        if hypothetical and self._has_hypopg():
+            self.hypothetical = True
+            for candidate in self.candidates:
+                if candidate.covered_by is None:
+                    self._estimate(candidate)
+
+        self.candidates.sort(key=lambda candidate: (
+            candidate.covered_by is not None,
+            -(candidate.cost_before - candidate.cost_after) if candidate.benefit_pct is not None else 0,
+            -candidate.seq_scan_ms,
+        ))
+
+    def _has_hypopg(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'hypopg'")
+            return cursor.fetchone() is not None
+
+    def _estimate(self, candidate):
+        """Planner cost of the candidate's statements without and with it as a hypopg index."""
+        for statement in candidate.statements:
+            if statement.cost is None:
+                statement.cost = self.plan_cost(statement)
+        statements = [statement for statement in candidate.statements if statement.cost is not None]
+        if not statements:
+            return
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT indexrelid FROM hypopg_create_index(%s)", [candidate.create_sql(self.connection)])
+            after = [self.plan_cost(statement) for statement in statements]
+        except DatabaseError:
+            return
+        finally:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT hypopg_reset()")
+        if None in after:
+            return
+        candidate.cost_before = sum(statement.cost * statement.executions for statement in statements)
+        candidate.cost_after = sum(cost * statement.executions for cost, statement in zip(after, statements))
+
+
+# -------------------
+# Migration output
+# -------------------
+def model_for_table(table):
+    for model in apps.get_models():
+        if model._meta.db_table == table and not model._meta.proxy:
+            return model
+    return None
+
+
+def candidate_index(candidate, model):
+    """Django Index for a candidate on `model`, or None if a column has no field."""
+    fields_by_column = {field.column: field for field in model._meta.concrete_fields}
+    fields = []
+    for column, descending in candidate.columns:
+        field = fields_by_column.get(column)
+        if field is None:
+            return None
+        fields.append(("-" if descending else "") + field.name)
+
+    condition = Q()
+    for column, values in candidate.predicate:
+        field = fields_by_column.get(column)
+        if field is None:
+            return None
+        if not values:
+            condition &= Q(**{f"{field.name}__isnull": True})
+        elif len(values) == 1:
+            condition &= Q(**{field.name: field.to_python(values[0])})
+        else:
+            condition &= Q(**{f"{field.name}__in": [field.to_python(value) for value in values]})
+
+    index = Index(fields=fields, name="index_advisor_placeholder", condition=condition or None)
+    index.set_name_with_model(model)
+    return index
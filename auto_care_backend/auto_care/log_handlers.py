@@ -0,0 +1,17 @@
+from logging.handlers import RotatingFileHandler
+import os
+
+
+class LazyRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that opens its file (creating the directory) on the
+    first record instead of at import time, so loading settings touches no disk.
+    """
+
+    def __init__(self, filename, *args, **kwargs):
+        kwargs["delay"] = True
+        super().__init__(filename, *args, **kwargs)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
@@ -0,0 +1,155 @@
+"""
+PostgreSQL declarative range-partitioning helpers.
+
+Shared by the OTP (daily) and booking (monthly) partition maintenance code.
+Everything here is a no-op / False on other database vendors.
+"""
+import logging
+
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+def is_partitioned(table):
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(table):
+    """Names of the partitions attached to `table`."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+            [table],
+        )
+        return [name for (name,) in cursor.fetchall()]
+
+
+def default_partition(table):
+    return f"{table}_default"
+
+
+def create_range_partition(table, column, name, start, end):
+    """
+    Create partition `name` for `column` in [start, end).
+
+    Rows for that range may already sit in the default partition (a booking
+    dated beyond the partition horizon, OTPs written while maintenance was
+    behind), and PostgreSQL refuses to create the partition while they do.
+    Those rows are moved: detach the default partition, create the new one,
+    move the rows across, re-attach, all in one transaction.
+    """
+    default = default_partition(table)
+    create_sql = f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)'
+    in_range = f'"{column}" >= %s AND "{column}" < %s'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [f'"{default}"'])
+        if not cursor.fetchone()[0]:
+            cursor.execute(create_sql, [start, end])
+            return
+
+        # Blocks inserts routed to the default partition until we commit
+        cursor.execute(f'LOCK TABLE "{default}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'SELECT 1 FROM "{default}" WHERE {in_range} LIMIT 1', [start, end])
+        if cursor.fetchone() is None:
+            cursor.execute(create_sql, [start, end])
+            return
+
+        cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{default}"')
+        cursor.execute(create_sql, [start, end])
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{default}" WHERE {in_range} RETURNING *) '
+            f'INSERT INTO "{table}" SELECT * FROM moved',
+            [start, end],
+        )
+        moved = cursor.rowcount
+        cursor.execute(f'ALTER TABLE "{table}" ATTACH PARTITION "{default}" DEFAULT')
+    logger.info(f"Moved {moved} row(s) from {default} into new partition {name}")
+
+
+def drop_partition(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS "{name}"')
+
+
+def referencing_constraints(table):
+    """Foreign keys in *other* tables pointing at `table` (these block conversion)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT con.conname, src.relname FROM pg_constraint con "
+            "JOIN pg_class src ON src.oid = con.conrelid "
+            "JOIN pg_class dst ON dst.oid = con.confrelid "
+            "WHERE con.contype = 'f' AND dst.relname = %s AND src.relname <> %s",
+            [table, table],
+        )
+        return cursor.fetchall()
+
+
+def recreate_as_partitioned(model, partition_column, legacy_table):
+    """
+    Rename `model`'s table to `legacy_table` and create an empty table with the
+    same columns, PARTITION BY RANGE (`partition_column`). The primary key
+    becomes (id, partition_column), ids keep coming from a sequence, and the
+    model's Meta.indexes and outgoing foreign keys are recreated.
+    Must run inside a transaction; the caller copies rows and drops the legacy table.
+    """
+    table = model._meta.db_table
+    sequence = f"{table}_id_seq"
+    index_names = [index.name for index in model._meta.indexes]
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{table}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy_table}"')
+        # The pkey index and id sequence keep their names across a table rename
+        cursor.execute(f'ALTER INDEX IF EXISTS "{table}_pkey" RENAME TO "{legacy_table}_pkey"')
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [f'"{legacy_table}"'])
+        legacy_sequence = cursor.fetchone()[0]
+        if legacy_sequence:
+            cursor.execute(f'ALTER SEQUENCE {legacy_sequence} RENAME TO "{legacy_table}_id_seq"')
+        for index_name in index_names:
+            cursor.execute(f'ALTER INDEX IF EXISTS "{index_name}" RENAME TO "{index_name}_legacy"')
+
+        cursor.execute(
+            f'CREATE TABLE "{table}" (LIKE "{legacy_table}" INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE ("{partition_column}")'
+        )
+        cursor.execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, "{partition_column}")')
+        cursor.execute(f'CREATE SEQUENCE "{sequence}" OWNED BY "{table}".id')
+        cursor.execute(f"""ALTER TABLE "{table}" ALTER COLUMN id SET DEFAULT nextval('"{sequence}"')""")
+        cursor.execute(
+            f"""SELECT setval('"{sequence}"', COALESCE((SELECT MAX(id) FROM "{legacy_table}"), 0) + 1, false)"""
+        )
+
+        for index in model._meta.indexes:
+            columns = ", ".join(f'"{model._meta.get_field(f).column}"' for f in index.fields)
+            cursor.execute(f'CREATE INDEX "{index.name}" ON "{table}" ({columns})')
+
+        for field in model._meta.concrete_fields:
+            if field.remote_field is None or not field.db_constraint:
+                continue
+            target = field.remote_field.model._meta
+            target_column = target.get_field(field.remote_field.field_name).column
+            cursor.execute(
+                f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_{field.column}_fk" '
+                f'FOREIGN KEY ("{field.column}") REFERENCES "{target.db_table}" ("{target_column}") '
+                f"DEFERRABLE INITIALLY DEFERRED"
+            )
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS "{table}_{field.column}_idx" ON "{table}" ("{field.column}")')
+
+        # Safety net so inserts never fail if partition maintenance falls behind;
+        # create_range_partition() moves its rows out as their ranges are created
+        cursor.execute(f'CREATE TABLE "{default_partition(table)}" PARTITION OF "{table}" DEFAULT')
+
+    logger.info(f"Recreated {table} as a table partitioned by {partition_column}")
@@ -0,0 +1,146 @@
+"""
+Per-view query budgets with N+1 detection.
+
+`@query_budget(n)` records every SQL statement a view handler runs (through
+`connection.execute_wrapper`) and fingerprints it by normalized statement
+and call site - the first frame in project code, e.g.
+`apps/bookings/models.py:155`. After the handler returns:
+
+- more than `n` queries is a budget overrun;
+- the same fingerprint QUERY_REPEAT_THRESHOLD times or more is flagged as
+  a likely N+1 (a lazy FK or a per-row lookup inside a loop).
+
+Both are logged with the offending fingerprints. With QUERY_BUDGET_STRICT
+(turned on by the test runner in `auto_care.testrunner`) they raise
+QueryBudgetExceeded, so regressions fail the test that exercises the view.
+
+The budget covers the handler only: authentication and permission checks
+run in APIView.initial() before it. With QUERY_CORPUS_FILE set, the recorded
+statements are also written out for `manage.py index_advisor`
+(see auto_care.querycorpus).
+"""
+from collections import Counter
+from functools import wraps
+from pathlib import Path
+import logging
+import re
+import sys
+
+from django.conf import settings
+from django.db import connection
+
+from auto_care.querycorpus import get_corpus_writer
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = str(Path(settings.BASE_DIR)) + "/"
+_THIS_FILE = __file__
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN \((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+# Django names savepoints uniquely (e.g. "s140370208066432_x12")
+_SAVEPOINT_RE = re.compile(r'"s\d+_x\d+"')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def normalize_sql(sql):
+    """Collapse literals and IN-lists so the same statement with other values matches."""
+    sql = _SAVEPOINT_RE.sub("?", sql)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def _call_site():
+    """First frame in project code (outside this module), as 'path:line'."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_PROJECT_ROOT) and filename != _THIS_FILE:
+            return f"{filename[len(_PROJECT_ROOT):]}:{frame.f_lineno}"
+        frame = frame.f_back
+    return "?"
+
+
+class QueryRecorder:
+    """execute_wrapper that counts statements per (normalized SQL, call site)."""
+
+    def __init__(self, corpus=None):
+        self.total = 0
+        self.fingerprints = Counter()
+        self.corpus = corpus
+
+    def __call__(self, execute, sql, params, many, context):
+        site = _call_site()
+        self.total += 1
+        self.fingerprints[(normalize_sql(sql), site)] += 1
+        if self.corpus is not None and not many:
+            self.corpus.write(sql, params, site)
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        return [(fingerprint, count) for fingerprint, count in self.fingerprints.most_common() if count >= threshold]
+
+
+def _describe(fingerprints):
+    return "; ".join(f"{count}x at {site}: {sql[:200]}" for (sql, site), count in fingerprints)
+
+
+def check_budget(label, recorder, budget):
+    problems = []
+    if recorder.total > budget:
+        problems.append(f"{recorder.total} queries (budget {budget})")
+    repeated = recorder.repeated(settings.QUERY_REPEAT_THRESHOLD)
+    if repeated:
+        problems.append(f"repeated statements, likely N+1: {_describe(repeated)}")
+    if not problems:
+        return
+
+    message = f"{label}: " + " | ".join(problems)
+    if recorder.total > budget:
+        message += f" | top statements: {_describe(recorder.fingerprints.most_common(5))}"
+    if settings.QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(f"Query budget: {message}")
+
+
+def _budgeted(handler, budget, label=None):
+    label = label or handler.__qualname__
+
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        if not settings.QUERY_BUDGET_ENABLED:
+            return handler(*args, **kwargs)
+
+        recorder = QueryRecorder(get_corpus_writer())
+        with connection.execute_wrapper(recorder):
+            response = handler(*args, **kwargs)
+        check_budget(label, recorder, budget)
+        return response
+
+    wrapper.query_budget = budget
+    return wrapper
+
+
+def query_budget(budget):
+    """
+    Limit a view handler to `budget` queries. Apply it to an APIView method,
+    to the function under `@api_view`, or to a view class to give every
+    HTTP handler on it (including inherited generic ones) the same budget.
+    """
+    def decorator(target):
+        if isinstance(target, type):
+            for method in target.http_method_names:
+                handler = getattr(target, method, None)
+                if method != "options" and handler is not None:
+                    setattr(target, method, _budgeted(handler, budget, f"{target.__qualname__}.{method}"))
+            return target
+        return _budgeted(target, budget)
+
+    return decorator
@@ -0,0 +1,59 @@
+"""
+Query corpus capture for `manage.py index_advisor`.
+
+With QUERY_CORPUS_FILE set, every statement a query-budgeted view runs (see
+`auto_care.querybudget`, which covers all API views) is appended to that
+file as one NDJSON line:
+
+    {"sql": "SELECT ...", "params": [...], "site": "apps/bookings/api/views.py:85"}
+
+Run the test suite or a load test against PostgreSQL with it set to collect
+real statements with real parameters, then replay them with the advisor.
+"""
+from threading import Lock
+import json
+import logging
+import os
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+
+class CorpusWriter:
+    """Appends executed statements to an NDJSON file, opened on first write."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._lock = Lock()
+
+    def write(self, sql, params, site):
+        try:
+            line = json.dumps({"sql": sql, "params": list(params or ()), "site": site}, cls=DjangoJSONEncoder)
+        except TypeError as exc:
+            logger.debug(f"Query corpus: skipping statement with unserializable params: {exc}")
+            return
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, "a", buffering=1)
+            self._file.write(line + "\n")
+
+
+_writer = None
+_writer_lock = Lock()
+
+
+def get_corpus_writer():
+    """The CorpusWriter for QUERY_CORPUS_FILE, or None when capture is off."""
+    global _writer
+    path = settings.QUERY_CORPUS_FILE
+    if not path:
+        return None
+    if _writer is None or _writer.path != path:
+        with _writer_lock:
+            if _writer is None or _writer.path != path:
+                _writer = CorpusWriter(path)
+    return _writer
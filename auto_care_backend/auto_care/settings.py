@@ -53,6 +53,8 @@ INSTALLED_APPS = [
     "apps.payments.apps.PaymentsConfig",
     "apps.notifications.apps.NotificationsConfig",
     "apps.locations.apps.LocationsConfig",
+    "apps.profiling.apps.ProfilingConfig",
+    "apps.core.apps.CoreConfig",
 ]
 
 MIDDLEWARE = [
@@ -62,6 +64,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.profiling.middleware.RequestProfilerMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -144,8 +147,71 @@ REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
     ],
+    # Sliding-window / token-bucket throttles (auto_care/throttling.py)
+    "DEFAULT_THROTTLE_CLASSES": [
+        "auto_care.throttling.AnonSlidingWindowThrottle",
+        "auto_care.throttling.UserSlidingWindowThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": env("THROTTLE_RATE_ANON", default="120/min"),
+        "user": env("THROTTLE_RATE_USER", default="600/min"),
+        "otp": env("THROTTLE_RATE_OTP", default="10/hour"),
+        "otp_verify": env("THROTTLE_RATE_OTP_VERIFY", default="30/hour"),
+        "service_check": env("THROTTLE_RATE_SERVICE_CHECK", default="60/min"),
+        "slots": env("THROTTLE_RATE_SLOTS", default="30/min"),
+    },
 }
 
+# Throttle counter store ("redis" or per-process "memory")
+THROTTLE_BACKEND = env("THROTTLE_BACKEND", default="redis")
+THROTTLE_REDIS_URL = env("THROTTLE_REDIS_URL", default="redis://localhost:6379/4")
+THROTTLE_KEY_PREFIX = "throttle:"
+
+# -------------------------------------------------------------------
+# CACHE
+# -------------------------------------------------------------------
+# Shared across workers (idempotency keys must be seen by every process)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": env("CACHE_URL", default="redis://localhost:6379/3"),
+        "KEY_PREFIX": "auto_care",
+    },
+}
+
+# Idempotency-Key replay (auto_care/idempotency.py)
+IDEMPOTENCY_TTL_SECONDS = env.int("IDEMPOTENCY_TTL_SECONDS", default=24 * 60 * 60)
+IDEMPOTENCY_LOCK_SECONDS = env.int("IDEMPOTENCY_LOCK_SECONDS", default=30)
+IDEMPOTENCY_WAIT_SECONDS = env.int("IDEMPOTENCY_WAIT_SECONDS", default=5)
+
+# Single-flight coalescing + stale-while-revalidate (auto_care/singleflight.py)
+SINGLE_FLIGHT_FRESH_SECONDS = env.int("SINGLE_FLIGHT_FRESH_SECONDS", default=5)
+SINGLE_FLIGHT_STALE_SECONDS = env.int("SINGLE_FLIGHT_STALE_SECONDS", default=30)
+SINGLE_FLIGHT_LOCK_SECONDS = env.int("SINGLE_FLIGHT_LOCK_SECONDS", default=10)
+SINGLE_FLIGHT_WAIT_SECONDS = env.int("SINGLE_FLIGHT_WAIT_SECONDS", default=5)
+
+# In-process service-area coverage index lifetime (also rebuilt on change)
+SERVICE_AREA_CACHE_SECONDS = env.int("SERVICE_AREA_CACHE_SECONDS", default=300)
+# How often a worker checks the shared cache for service area changes
+SERVICE_AREA_CHECK_SECONDS = env.int("SERVICE_AREA_CHECK_SECONDS", default=5)
+
+# In-process active time slot table lifetime (also rebuilt on change)
+TIME_SLOT_CACHE_SECONDS = env.int("TIME_SLOT_CACHE_SECONDS", default=300)
+# How often a worker checks the shared cache for time slot changes
+TIME_SLOT_CHECK_SECONDS = env.int("TIME_SLOT_CHECK_SECONDS", default=5)
+
+# Public service-area snapshot: polygon simplification tolerance and client cache lifetime
+SERVICE_AREA_SNAPSHOT_TOLERANCE_M = env.int("SERVICE_AREA_SNAPSHOT_TOLERANCE_M", default=50)
+SERVICE_AREA_SNAPSHOT_MAX_AGE = env.int("SERVICE_AREA_SNAPSHOT_MAX_AGE", default=6 * 60 * 60)
+
+# How often a worker checks the shared cache for service catalog changes
+SERVICE_CATALOG_CHECK_SECONDS = env.int("SERVICE_CATALOG_CHECK_SECONDS", default=5)
+
+# Counts above this use PostgreSQL planner estimates (see auto_care/counts.py)
+ESTIMATED_COUNT_THRESHOLD = env.int("ESTIMATED_COUNT_THRESHOLD", default=10000)
+# How long cached totals (auto_care.counts.cached_count) are shared
+COUNT_CACHE_SECONDS = env.int("COUNT_CACHE_SECONDS", default=60)
+
 # -------------------------------------------------------------------
 # JWT SETTINGS
 # -------------------------------------------------------------------
@@ -169,8 +235,17 @@ SIMPLE_JWT = {
     
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
     "TOKEN_TYPE_CLAIM": "token_type",
+
+    # Rotated refresh tokens are blacklisted by jti in TOKEN_BLACKLIST_BACKEND
+    "TOKEN_REFRESH_SERIALIZER": "apps.accounts.api.serializers.RotatingTokenRefreshSerializer",
 }
 
+# Refresh-token blacklist store ("redis" or per-process "memory")
+TOKEN_BLACKLIST_BACKEND = env("TOKEN_BLACKLIST_BACKEND", default="redis")
+TOKEN_BLACKLIST_REDIS_URL = env("TOKEN_BLACKLIST_REDIS_URL", default="redis://localhost:6379/2")
+TOKEN_BLACKLIST_KEY_PREFIX = "jwt:bl:"
+TOKEN_FLUSH_BATCH_SIZE = env.int("TOKEN_FLUSH_BATCH_SIZE", default=5000)
+
 # -------------------------------------------------------------------
 # CORS
 # -------------------------------------------------------------------
@@ -194,14 +269,14 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
+    "idempotency-key",
 ]
 
 # -------------------------------------------------------------------
 # LOGGING
 # -------------------------------------------------------------------
-# Create logs directory if it doesn't exist
+# The directory is created by the handler when it first writes
 LOGS_DIR = BASE_DIR / "logs"
-LOGS_DIR.mkdir(exist_ok=True)
 
 LOGGING = {
     "version": 1,
@@ -219,7 +294,7 @@ LOGGING = {
     "handlers": {
         "file": {
             "level": "INFO",
-            "class": "logging.handlers.RotatingFileHandler",
+            "class": "auto_care.log_handlers.LazyRotatingFileHandler",
             "filename": LOGS_DIR / "django.log",
             "maxBytes": 1024 * 1024 * 10,  # 10MB
             "backupCount": 5,
@@ -232,7 +307,7 @@ LOGGING = {
         },
         "security_file": {
             "level": "WARNING",
-            "class": "logging.handlers.RotatingFileHandler",
+            "class": "auto_care.log_handlers.LazyRotatingFileHandler",
             "filename": LOGS_DIR / "security.log",
             "maxBytes": 1024 * 1024 * 10,  # 10MB
             "backupCount": 5,
@@ -268,6 +343,125 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
 
+CELERY_BEAT_SCHEDULE = {
+    "purge-expired-otps": {
+        "task": "apps.accounts.tasks.purge_expired_otps",
+        "schedule": 15 * 60,  # every 15 minutes
+    },
+    "ensure-booking-partitions": {
+        "task": "apps.bookings.tasks.ensure_booking_partitions",
+        "schedule": 24 * 60 * 60,  # daily
+    },
+    "flush-expired-jwt-rows": {
+        "task": "apps.accounts.tasks.flush_expired_token_rows",
+        "schedule": 6 * 60 * 60,  # every 6 hours
+    },
+    "relay-notification-outbox": {
+        "task": "apps.notifications.tasks.relay_outbox",
+        "schedule": 60,  # safety net; a relay is also queued on every commit
+    },
+    "process-payment-events": {
+        "task": "apps.payments.tasks.process_payment_events",
+        "schedule": 30,  # safety net; webhooks queue a run as they arrive
+    },
+    "archive-old-bookings": {
+        "task": "apps.bookings.tasks.archive_old_bookings",
+        "schedule": 24 * 60 * 60,  # daily
+    },
+    "forecast-booking-demand": {
+        "task": "apps.bookings.tasks.forecast_booking_demand",
+        "schedule": 24 * 60 * 60,  # daily
+    },
+}
+
+# Admin bulk booking actions: selections above the limit run in Celery chunks
+BOOKING_BULK_SYNC_LIMIT = env.int("BOOKING_BULK_SYNC_LIMIT", default=200)
+BOOKING_BULK_CHUNK_SIZE = env.int("BOOKING_BULK_CHUNK_SIZE", default=500)
+
+# Monthly booking partitions kept ahead of today (apps/bookings/partitions.py)
+BOOKING_PARTITION_MONTHS_AHEAD = env.int("BOOKING_PARTITION_MONTHS_AHEAD", default=3)
+
+# Rows fetched per server-side cursor round trip in booking exports
+BOOKING_EXPORT_CHUNK_SIZE = env.int("BOOKING_EXPORT_CHUNK_SIZE", default=2000)
+
+# Ops map clustering (apps/bookings/clustering.py): grid cell size in screen
+# pixels, max clusters per response and how long results are shared
+BOOKING_MAP_CELL_PX = env.int("BOOKING_MAP_CELL_PX", default=80)
+BOOKING_MAP_MAX_CLUSTERS = env.int("BOOKING_MAP_MAX_CLUSTERS", default=400)
+BOOKING_MAP_CACHE_SECONDS = env.int("BOOKING_MAP_CACHE_SECONDS", default=15)
+
+# Nightly demand forecast (apps/bookings/forecast.py)
+BOOKING_FORECAST_HISTORY_WEEKS = env.int("BOOKING_FORECAST_HISTORY_WEEKS", default=12)
+BOOKING_FORECAST_ALPHA = env.float("BOOKING_FORECAST_ALPHA", default=0.3)
+BOOKING_FORECAST_CHUNK_SIZE = env.int("BOOKING_FORECAST_CHUNK_SIZE", default=5000)
+
+# Cold archival of old completed/cancelled bookings (apps/bookings/archive.py)
+# Storage is "table" (ArchivedBooking.payload) or "file" (gzip NDJSON in BOOKING_ARCHIVE_DIR)
+BOOKING_ARCHIVE_AFTER_MONTHS = env.int("BOOKING_ARCHIVE_AFTER_MONTHS", default=12)
+BOOKING_ARCHIVE_STORAGE = env("BOOKING_ARCHIVE_STORAGE", default="table")
+BOOKING_ARCHIVE_DIR = env("BOOKING_ARCHIVE_DIR", default=str(BASE_DIR / "archive" / "bookings"))
+BOOKING_ARCHIVE_BATCH_SIZE = env.int("BOOKING_ARCHIVE_BATCH_SIZE", default=1000)
+BOOKING_ARCHIVE_MAX_BATCHES = env.int("BOOKING_ARCHIVE_MAX_BATCHES", default=100)
+
+# -------------------------------------------------------------------
+# NOTIFICATIONS (transactional outbox)
+# -------------------------------------------------------------------
+NOTIFICATION_CHANNELS = env.list(
+    "NOTIFICATION_CHANNELS",
+    default=["apps.notifications.channels.LogChannel"],
+)
+NOTIFICATION_RELAY_BATCH_SIZE = env.int("NOTIFICATION_RELAY_BATCH_SIZE", default=100)
+NOTIFICATION_RELAY_MAX_BATCHES = env.int("NOTIFICATION_RELAY_MAX_BATCHES", default=50)
+NOTIFICATION_MAX_ATTEMPTS = env.int("NOTIFICATION_MAX_ATTEMPTS", default=8)
+NOTIFICATION_RETRY_BASE_SECONDS = env.int("NOTIFICATION_RETRY_BASE_SECONDS", default=30)
+# How long a relay worker owns a claimed batch before another may retake it
+NOTIFICATION_CLAIM_LEASE_SECONDS = env.int("NOTIFICATION_CLAIM_LEASE_SECONDS", default=300)
+
+# -------------------------------------------------------------------
+# PAYMENT WEBHOOKS
+# -------------------------------------------------------------------
+# Per-provider signing secrets, e.g. PAYMENT_WEBHOOK_SECRETS=razorpay=xxx,stripe=yyy
+PAYMENT_WEBHOOK_SECRETS = env.dict("PAYMENT_WEBHOOK_SECRETS", default={})
+PAYMENT_WEBHOOK_TOLERANCE_SECONDS = env.int("PAYMENT_WEBHOOK_TOLERANCE_SECONDS", default=300)
+PAYMENT_CONSUMER_KICK_SECONDS = env.int("PAYMENT_CONSUMER_KICK_SECONDS", default=2)
+PAYMENT_CONSUMER_BATCH_SIZE = env.int("PAYMENT_CONSUMER_BATCH_SIZE", default=500)
+PAYMENT_CONSUMER_MAX_BATCHES = env.int("PAYMENT_CONSUMER_MAX_BATCHES", default=20)
+PAYMENT_EVENT_MAX_ATTEMPTS = env.int("PAYMENT_EVENT_MAX_ATTEMPTS", default=5)
+PAYMENT_EVENT_RETRY_BASE_SECONDS = env.int("PAYMENT_EVENT_RETRY_BASE_SECONDS", default=10)
+
+# -------------------------------------------------------------------
+# REQUEST PROFILING (apps/profiling)
+# -------------------------------------------------------------------
+# Requests with a valid X-Profile-Token (manage.py profile_token) are always
+# profiled; PROFILING_SAMPLE_RATE=N also profiles 1 in N requests (0 = off)
+PROFILING_ENABLED = env.bool("PROFILING_ENABLED", default=True)
+PROFILING_SAMPLE_RATE = env.int("PROFILING_SAMPLE_RATE", default=0)
+PROFILING_MODE = env("PROFILING_MODE", default="sampling")  # "sampling" or "cprofile"
+PROFILING_INTERVAL_MS = env.int("PROFILING_INTERVAL_MS", default=5)
+PROFILING_TOKEN_MAX_AGE = env.int("PROFILING_TOKEN_MAX_AGE", default=60 * 60)
+PROFILING_DIR = env("PROFILING_DIR", default=str(BASE_DIR / "profiles"))
+PROFILING_MAX_PROFILES = env.int("PROFILING_MAX_PROFILES", default=200)
+
+# -------------------------------------------------------------------
+# QUERY BUDGETS (auto_care/querybudget.py)
+# -------------------------------------------------------------------
+# Overruns and repeated statements are logged; strict mode raises instead.
+# The test runner turns strict mode on so regressions fail the suite
+QUERY_BUDGET_ENABLED = env.bool("QUERY_BUDGET_ENABLED", default=True)
+QUERY_BUDGET_STRICT = env.bool("QUERY_BUDGET_STRICT", default=False)
+TEST_RUNNER = "auto_care.testrunner.StrictQueryBudgetRunner"
+QUERY_REPEAT_THRESHOLD = env.int("QUERY_REPEAT_THRESHOLD", default=3)
+# NDJSON file that budgeted views append their SQL to, as the corpus for
+# `manage.py index_advisor` (auto_care/querycorpus.py); empty = off
+QUERY_CORPUS_FILE = env("QUERY_CORPUS_FILE", default="")
+
+# -------------------------------------------------------------------
+# OTP CLEANUP
+# -------------------------------------------------------------------
+OTP_PURGE_BATCH_SIZE = env.int("OTP_PURGE_BATCH_SIZE", default=5000)
+OTP_PURGE_MAX_BATCHES = env.int("OTP_PURGE_MAX_BATCHES", default=50)
+OTP_PARTITION_DAYS_AHEAD = env.int("OTP_PARTITION_DAYS_AHEAD", default=3)
+
 # -------------------------------------------------------------------
 # CHANNELS (for WebSocket)
 # -------------------------------------------------------------------
@@ -0,0 +1,140 @@
+"""
+Single-flight request coalescing with a short result cache.
+
+`cached_single_flight(key, compute)` makes sure that, for a given key, only
+one caller computes the value at a time:
+
+* inside a process, concurrent callers (threads, or asyncio tasks through
+  `acached_single_flight`) share one in-flight future;
+* across processes, a short cache lock (`cache.add`) elects one worker to
+  compute while the others poll the cache for its result.
+
+Results are cached for `fresh_seconds`. For a further `stale_seconds` the old
+value is served immediately while a single background refresh runs
+(stale-while-revalidate). If the lock holder dies, the lock expires after
+`SINGLE_FLIGHT_LOCK_SECONDS` and waiters fall back to computing themselves.
+"""
+from concurrent.futures import Future
+from threading import Lock, Thread
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_POLL_INTERVAL = 0.02
+
+_inflight = {}
+_inflight_lock = Lock()
+
+
+def _cache_key(key):
+    return f"singleflight:{key}"
+
+
+def _lock_key(key):
+    return f"singleflight:{key}:lock"
+
+
+def _store(key, value, fresh_seconds, stale_seconds):
+    entry = {"value": value, "fresh_until": time.time() + fresh_seconds}
+    cache.set(_cache_key(key), entry, fresh_seconds + stale_seconds)
+
+
+def _compute_across_processes(key, compute, fresh_seconds, stale_seconds):
+    """Compute under the cross-process lock, or wait for the worker holding it."""
+    lock_key = _lock_key(key)
+    if cache.add(lock_key, 1, settings.SINGLE_FLIGHT_LOCK_SECONDS):
+        try:
+            value = compute()
+            _store(key, value, fresh_seconds, stale_seconds)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(_POLL_INTERVAL)
+        entry = cache.get(_cache_key(key))
+        if entry is not None and entry["fresh_until"] > time.time():
+            return entry["value"]
+
+    logger.warning(f"Single-flight wait timed out for {key}, computing locally")
+    value = compute()
+    _store(key, value, fresh_seconds, stale_seconds)
+    return value
+
+
+def _in_flight(key, run):
+    """
+    Return (future, is_leader). The leader must call `run()` and resolve the
+    future; everyone else just waits on it.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future, False
+        future = Future()
+        _inflight[key] = future
+
+    try:
+        future.set_result(run())
+    except BaseException as exc:
+        future.set_exception(exc)
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+    return future, True
+
+
+def _refresh_in_background(key, compute, fresh_seconds, stale_seconds):
+    def refresh():
+        try:
+            _in_flight(key, lambda: _compute_across_processes(key, compute, fresh_seconds, stale_seconds))
+        except Exception as exc:
+            logger.error(f"Background refresh of {key} failed: {exc}")
+        finally:
+            close_old_connections()
+
+    with _inflight_lock:
+        if key in _inflight:
+            return
+    Thread(target=refresh, name=f"singleflight-refresh:{key}", daemon=True).start()
+
+
+def cached_single_flight(key, compute, fresh_seconds=None, stale_seconds=None):
+    """Return compute()'s value for `key`, coalescing concurrent callers."""
+    fresh_seconds = settings.SINGLE_FLIGHT_FRESH_SECONDS if fresh_seconds is None else fresh_seconds
+    stale_seconds = settings.SINGLE_FLIGHT_STALE_SECONDS if stale_seconds is None else stale_seconds
+
+    entry = cache.get(_cache_key(key))
+    if entry is not None:
+        if entry["fresh_until"] <= time.time():
+            _refresh_in_background(key, compute, fresh_seconds, stale_seconds)
+        return entry["value"]
+
+    future, _ = _in_flight(key, lambda: _compute_across_processes(key, compute, fresh_seconds, stale_seconds))
+    return future.result()
+
+
+async def acached_single_flight(key, compute, fresh_seconds=None, stale_seconds=None):
+    """
+    Async variant: waiting tasks share the same in-flight future as threads,
+    and the blocking `compute` runs in a worker thread.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+    if future is not None:
+        return await asyncio.wrap_future(future)
+    return await sync_to_async(cached_single_flight, thread_sensitive=False)(
+        key, compute, fresh_seconds, stale_seconds
+    )
+
+
+def invalidate(key):
+    cache.delete(_cache_key(key))
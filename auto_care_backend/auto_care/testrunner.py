@@ -0,0 +1,20 @@
+"""
+Test runner that turns on strict query budgets.
+
+Under `manage.py test` every `@query_budget` overrun or likely N+1 raises
+QueryBudgetExceeded instead of logging, so a regression fails the test that
+exercises the view. Deployments leave QUERY_BUDGET_STRICT off.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class StrictQueryBudgetRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._query_budget_strict = settings.QUERY_BUDGET_STRICT
+        settings.QUERY_BUDGET_STRICT = True
+
+    def teardown_test_environment(self, **kwargs):
+        settings.QUERY_BUDGET_STRICT = self._query_budget_strict
+        super().teardown_test_environment(**kwargs)
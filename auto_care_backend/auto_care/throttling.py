@@ -0,0 +1,302 @@
+"""
+Sliding-window and token-bucket DRF throttles on a shared counter store.
+
+Rates use DRF's "<count>/<period>" syntax and live in
+REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], keyed by scope. Requests are
+identified by user id when authenticated, otherwise by client IP
+(`BaseThrottle.get_ident`, which honours NUM_PROXIES).
+
+- Sliding window: at most `count` requests in any trailing `period`.
+- Token bucket: bursts of up to `count`, refilled at `count` per `period`.
+
+Denied requests get DRF's 429 with a `Retry-After` header from `wait()`.
+
+Stores (THROTTLE_BACKEND):
+- "redis": one atomic Lua script per check, shared by all workers (default)
+- "memory": per-process stand-in for tests and local development
+"""
+from collections import deque
+from threading import Lock
+import logging
+import math
+import time
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------
+# Stores
+# -------------------
+class InMemoryRateStore:
+    """
+    Process-local counters; each check returns (allowed, retry_after_seconds).
+    Like the Redis keys, an entry expires one window after its last check
+    (an idle bucket is full again, an idle window empty); expired entries are
+    pruned at most every PRUNE_INTERVAL seconds so memory stays bounded by
+    the clients seen in the last window.
+    """
+
+    PRUNE_INTERVAL = 60.0
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._windows = {}  # key -> (deque of hit times, expires_at)
+        self._buckets = {}  # key -> (tokens, updated_at, expires_at)
+        self._lock = Lock()
+        self._pruned_at = clock()
+
+    def _prune(self, now):
+        if now - self._pruned_at < self.PRUNE_INTERVAL:
+            return
+        self._pruned_at = now
+        for entries in (self._windows, self._buckets):
+            expired = [key for key, entry in entries.items() if entry[-1] <= now]
+            for key in expired:
+                del entries[key]
+
+    def sliding_window(self, key, limit, window):
+        now = self._clock()
+        with self._lock:
+            self._prune(now)
+            hits = self._windows[key][0] if key in self._windows else deque()
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) < limit:
+                hits.append(now)
+                self._windows[key] = (hits, now + window)
+                return True, 0.0
+            self._windows[key] = (hits, hits[-1] + window)
+            return False, hits[0] + window - now
+
+    def token_bucket(self, key, capacity, window):
+        now = self._clock()
+        refill_rate = capacity / window
+        with self._lock:
+            self._prune(now)
+            tokens, updated_at, _ = self._buckets.get(key, (capacity, now, None))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now, now + window)
+                return True, 0.0
+            self._buckets[key] = (tokens, now, now + window)
+            return False, (1 - tokens) / refill_rate
+
+    def __len__(self):
+        with self._lock:
+            return len(self._windows) + len(self._buckets)
+
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+            self._buckets.clear()
+
+
+# KEYS[1] = window key, KEYS[2] = its member sequence key (same hash slot);
+# ARGV = limit, window_ms. Returns {allowed, retry_after_ms}.
+SLIDING_WINDOW_LUA = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    local seq = redis.call('INCR', KEYS[2])
+    redis.call('PEXPIRE', KEYS[2], window)
+    redis.call('ZADD', KEYS[1], now, now .. '-' .. seq)
+    redis.call('PEXPIRE', KEYS[1], window)
+    return {1, 0}
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {0, tonumber(oldest[2]) + window - now}
+"""
+
+# KEYS[1] = bucket key; ARGV = capacity, window_ms. Returns {allowed, retry_after_ms}.
+TOKEN_BUCKET_LUA = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local capacity = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local rate = capacity / window
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = math.ceil((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], window)
+return {allowed, retry_after}
+"""
+
+
+class RedisRateStore:
+    """Atomic checks via server-side Lua scripts, timed by the Redis clock."""
+
+    def __init__(self, url, key_prefix):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._key_prefix = key_prefix
+        self._sliding_window = self._client.register_script(SLIDING_WINDOW_LUA)
+        self._token_bucket = self._client.register_script(TOKEN_BUCKET_LUA)
+
+    def _key(self, key):
+        # Hash tag: every key a script touches for this ident maps to one cluster slot
+        return f"{{{self._key_prefix}{key}}}"
+
+    def _run(self, script, keys, limit, window):
+        allowed, retry_after_ms = script(keys=keys, args=[limit, int(window * 1000)])
+        return bool(allowed), retry_after_ms / 1000
+
+    def sliding_window(self, key, limit, window):
+        key = self._key(key)
+        return self._run(self._sliding_window, [key, f"{key}:seq"], limit, window)
+
+    def token_bucket(self, key, capacity, window):
+        return self._run(self._token_bucket, [self._key(key)], capacity, window)
+
+    def clear(self):
+        for key in self._client.scan_iter(match=f"{{{self._key_prefix}*"):
+            self._client.delete(key)
+
+
+_store = None
+_store_lock = Lock()
+
+
+def get_rate_store():
+    """Return the configured throttle store (created once per process)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = settings.THROTTLE_BACKEND
+                if backend == "redis":
+                    _store = RedisRateStore(settings.THROTTLE_REDIS_URL, settings.THROTTLE_KEY_PREFIX)
+                elif backend == "memory":
+                    _store = InMemoryRateStore()
+                else:
+                    raise ValueError(f"Unknown THROTTLE_BACKEND: {backend}")
+                logger.info(f"Throttle backend: {backend}")
+    return _store
+
+
+# -------------------
+# DRF throttle classes
+# -------------------
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Base class. Subclasses set `scope`, or leave it None to use the view's
+    `throttle_scope` (requests to views without one are not throttled).
+    """
+    scope = None
+    algorithm = "sliding_window"
+    # "user": user id, falling back to IP for anonymous requests; "ip": always IP
+    ident_by = "user"
+
+    def __init__(self):
+        self.retry_after = None
+
+    def get_scope(self, view):
+        return self.scope or getattr(view, "throttle_scope", None)
+
+    def get_rate(self, scope):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return None
+        count, period = rate.split("/")
+        window = {"s": 1, "m": 60, "h": 3600, "d": 86400}[period[0]]
+        return int(count), window
+
+    def get_ident_key(self, request):
+        user = getattr(request, "user", None)
+        if self.ident_by == "user" and user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        rate = self.get_rate(scope) if scope else None
+        if rate is None:
+            return True
+
+        limit, window = rate
+        key = f"{self.algorithm}:{scope}:{self.get_ident_key(request)}"
+        try:
+            allowed, retry_after = getattr(get_rate_store(), self.algorithm)(key, limit, window)
+        except Exception as exc:
+            # Fail open - a store outage must not take the API down with it
+            logger.warning(f"Throttle store unavailable, allowing request: {exc}")
+            return True
+
+        if not allowed:
+            self.retry_after = retry_after
+            logger.warning(f"Throttled {key} (retry after {retry_after:.1f}s)")
+        return allowed
+
+    def wait(self):
+        if self.retry_after is None:
+            return None
+        return max(1, math.ceil(self.retry_after))
+
+
+class TokenBucketThrottle(SlidingWindowThrottle):
+    algorithm = "token_bucket"
+
+
+class UserSlidingWindowThrottle(SlidingWindowThrottle):
+    """Global per-user limit for authenticated requests."""
+    scope = "user"
+
+    def allow_request(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return True
+        return super().allow_request(request, view)
+
+
+class AnonSlidingWindowThrottle(SlidingWindowThrottle):
+    """Global per-IP limit for anonymous requests."""
+    scope = "anon"
+    ident_by = "ip"
+
+    def allow_request(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return True
+        return super().allow_request(request, view)
+
+
+class ScopedSlidingWindowThrottle(SlidingWindowThrottle):
+    """Per-endpoint limit from the view's `throttle_scope`."""
+
+
+class ScopedTokenBucketThrottle(TokenBucketThrottle):
+    """Per-endpoint burst limit from the view's `throttle_scope`."""
+
+
+class OTPRequestThrottle(TokenBucketThrottle):
+    """OTP sends are keyed by IP: callers are anonymous by definition."""
+    scope = "otp"
+    ident_by = "ip"
+
+
+class OTPVerifyThrottle(SlidingWindowThrottle):
+    scope = "otp_verify"
+    ident_by = "ip"
+
+
+class ServiceCheckThrottle(SlidingWindowThrottle):
+    scope = "service_check"
+
+
+class SlotLookupThrottle(TokenBucketThrottle):
+    scope = "slots"
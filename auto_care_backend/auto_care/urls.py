@@ -22,6 +22,8 @@ urlpatterns = [
     path('api/accounts/', include('apps.accounts.api.urls')),
     path("api/bookings/", include("apps.bookings.api.urls")),
     path('api/locations/', include('apps.locations.api.urls')),
+    path('api/payments/', include('apps.payments.api.urls')),
+    path('api/services/', include('apps.services.api.urls')),
 
      # 🆕 API versioning (optional for future)
     # path('api/v1/accounts/', include('apps.accounts.api.urls')),